@@ -0,0 +1,155 @@
+import socket
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip('aiosmtpd.controller')
+
+from website.database import close_connections
+from website.mail_manager import MailOutboxManager, MailSender
+from website.migrations import run_migrations
+
+COMMERCE_DB = Path(__file__).resolve().parent.parent / 'website' / 'db' / 'Commerce.db'
+REJECTED = 'abgelehnt@example.com'
+
+
+class RecordingHandler:
+    """Lokales Relay: nimmt alles an, lehnt REJECTED mit 550 ab und zählt die Sitzungen."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = 0
+        self.noops = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_NOOP(self, server, session, envelope, arg):
+        self.noops += 1
+        return '250 OK'
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == REJECTED:
+            return '550 5.1.1 Mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.extend(envelope.rcpt_tos)
+        return '250 Message accepted for delivery'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Frisch migrierte Kopie der Commerce.db mit leerer Outbox."""
+    path = str(tmp_path / 'Commerce.db')
+    shutil.copy(COMMERCE_DB, path)
+    monkeypatch.setenv('DB_PATH', path)
+    run_migrations(path)
+    yield path
+    close_connections()
+
+
+@pytest.fixture
+def relay(monkeypatch):
+    """aiosmtpd auf einem freien Port, MailSender per .env-Variablen darauf gerichtet."""
+    port = _free_port()
+    monkeypatch.setenv('SMTP_HOST', '127.0.0.1')
+    monkeypatch.setenv('SMTP_PORT', str(port))
+    monkeypatch.setenv('SMTP_SECURITY', 'none')
+    monkeypatch.delenv('SMTP_USER', raising=False)
+    monkeypatch.delenv('SMTP_PASS', raising=False)
+
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    yield handler
+    controller.stop()
+
+
+def _enqueue(count, recipient='kunde{}@example.com'):
+    outbox = MailOutboxManager()
+    return [
+        outbox.enqueue(recipient.format(i), f"Test {i}", f"<p>Test {i}</p>", f"Test {i}")
+        for i in range(count)
+    ]
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return {row['OutboxID']: row for row in conn.execute('SELECT * FROM MailOutbox')}
+    finally:
+        conn.close()
+
+
+def test_batches_share_one_smtp_session(db_path, relay):
+    _enqueue(120)
+    sender = MailSender(batch_size=50)
+    try:
+        assert sender.run_once() == (120, 0)
+
+        _enqueue(5)
+        assert sender.run_once() == (5, 0)
+    finally:
+        sender.close()
+
+    assert len(relay.messages) == 125
+    assert relay.sessions == 1
+    # NOOP nur einmal zu Beginn des zweiten Laufs, nicht vor jeder Mail
+    assert relay.noops == 1
+    assert MailOutboxManager().get_queue_metrics()['sent'] == 125
+
+
+def test_rejected_recipient_is_retried_with_backoff(db_path, relay):
+    good_ids = _enqueue(2)
+    rejected_id, = _enqueue(1, recipient=REJECTED)
+
+    sender = MailSender(batch_size=50)
+    try:
+        assert sender.run_once() == (2, 1)
+    finally:
+        sender.close()
+
+    rows = _rows(db_path)
+    assert all(rows[outbox_id]['Status'] == 'SENT' for outbox_id in good_ids)
+
+    rejected = rows[rejected_id]
+    assert rejected['Status'] == 'PENDING'
+    assert rejected['Attempts'] == 1
+    assert rejected['NextAttemptAt'] > rejected['CreatedAt']
+    assert '550' in rejected['LastError']
+
+    # Noch im Backoff → der nächste Lauf fasst die Mail nicht an
+    sender = MailSender(batch_size=50)
+    try:
+        assert sender.run_once() == (0, 0)
+    finally:
+        sender.close()
+
+
+def test_unreachable_relay_releases_the_batch(db_path, monkeypatch):
+    monkeypatch.setenv('SMTP_HOST', '127.0.0.1')
+    monkeypatch.setenv('SMTP_PORT', str(_free_port()))   # niemand lauscht
+    monkeypatch.setenv('SMTP_SECURITY', 'none')
+    first_id, *other_ids = _enqueue(3)
+
+    assert MailSender(batch_size=50).run_once() == (0, 1)
+
+    rows = _rows(db_path)
+    # Nur der tatsächlich versuchte Datensatz zählt einen Versuch, der Rest wird freigegeben
+    assert rows[first_id]['Status'] == 'PENDING' and rows[first_id]['Attempts'] == 1
+    for outbox_id in other_ids:
+        assert rows[outbox_id]['Status'] == 'PENDING'
+        assert rows[outbox_id]['Attempts'] == 0
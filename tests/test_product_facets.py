@@ -0,0 +1,49 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from website import product_manager
+from website.database import close_connections
+from website.migrations import run_migrations
+from website.product_manager import ProductManager
+
+COMMERCE_DB = Path(__file__).resolve().parent.parent / 'website' / 'db' / 'Commerce.db'
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """ProductManager auf einer frisch migrierten Kopie der ausgelieferten Commerce.db."""
+    db_path = str(tmp_path / 'Commerce.db')
+    shutil.copy(COMMERCE_DB, db_path)
+    monkeypatch.setenv('DB_PATH', db_path)
+    run_migrations(db_path)
+    product_manager._facet_cache.clear()
+    yield ProductManager()
+    product_manager._facet_cache.clear()
+    close_connections()
+
+
+def test_unsearchable_query_does_not_empty_catalog_facets(manager):
+    catalog = manager.get_facet_counts()
+    assert catalog['total'] > 0
+
+    product_manager._facet_cache.clear()
+
+    # Erst die Suche ohne suchbare Wörter, danach die Sidebar ohne Suche
+    assert manager.get_facet_counts('!!!')['total'] == 0
+    assert manager.get_facet_counts() == catalog
+    assert manager.get_filter_options()['categories'] == list(catalog['categories'])
+
+
+def test_catalog_facets_do_not_leak_into_unsearchable_query(manager):
+    catalog = manager.get_facet_counts()
+    assert catalog['total'] > 0
+
+    # Umgekehrte Reihenfolge: Katalog-Raster liegt schon im Cache
+    facets = manager.get_facet_counts('!!!')
+    products = manager.get_filtered_products('!!!')
+
+    assert facets['total'] == 0
+    assert facets['categories'] == {} and facets['materials'] == {}
+    assert len(products) == 0
@@ -8,6 +8,10 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_apscheduler import APScheduler
 from .user_manager import UserManager
+from . import database
+from . import migrations
+from .uploads import UploadRequest, handle_upload_too_large
+from werkzeug.exceptions import RequestEntityTooLarge
 
 # Globales Logging konfigurieren
 logging.basicConfig(
@@ -28,6 +32,8 @@ DB_PATH = os.path.join(os.path.dirname(__file__), '..', '3dbutler.db')
 
 def create_app():
     app = Flask(__name__, template_folder=os.path.join(os.path.dirname(__file__), 'website', 'templates'))
+    # Datei-Uploads der Projekt-Routen direkt in den Upload-Ordner streamen (website/uploads.py)
+    app.request_class = UploadRequest
 
     # Konfigurationen
     app.config['SECRET_KEY'] = 'dsdsdfsdfsdfsdf'
@@ -37,12 +43,43 @@ def create_app():
     
     # HINWEIS: os.getenv Standard auf 30.0 Minuten geändert, statt 0.5 (30 Sekunden)
     app.config['BANK_UPDATE_INTERVAL'] = float(os.getenv('BANK_UPDATE_INTERVAL', 30.0))
+    # Voller 30-Tage-Abgleich der Umsätze in Stunden (der reguläre Sync holt nur das Delta)
+    app.config['BANK_RECONCILE_INTERVAL'] = float(os.getenv('BANK_RECONCILE_INTERVAL', 24.0))
+    # Abfrage-Intervall der Mail-Outbox in Sekunden
+    app.config['MAIL_POLL_INTERVAL'] = int(os.getenv('MAIL_POLL_INTERVAL', 5))
+    # Wo laufen die Hintergrundjobs? 'web' (im App-Prozess) oder 'worker' (python -m website.worker)
+    app.config['BACKGROUND_JOBS'] = os.getenv('BACKGROUND_JOBS', 'web').lower()
+    # Max. Laufzeit einer Job-Lease in Sekunden, danach darf ein anderer Prozess übernehmen
+    app.config['BANK_SYNC_LEASE_SECONDS'] = int(os.getenv('BANK_SYNC_LEASE_SECONDS', 900))
+    # Dashboard-Charts: 'server' (Matplotlib-PNG, gecacht) oder 'client' (JSON-API + SVG im Browser)
+    app.config['DASHBOARD_CHART_MODE'] = os.getenv('DASHBOARD_CHART_MODE', 'server').lower()
+    # Job-Erzeugung aus der BOM: 'unit' (ein Job pro Stück) oder 'batch' (ein Job pro BOM-Zeile mit Stückzahl)
+    app.config['PRODUCTION_JOB_MODE'] = os.getenv('PRODUCTION_JOB_MODE', 'unit').lower()
+    # Max. Gesamtgröße aller Dateien eines Projekt-Uploads in MB (wird beim Streamen erzwungen)
+    app.config['UPLOAD_LIMIT_MB'] = int(os.getenv('UPLOAD_LIMIT_MB', 25))
+    # Neue Jobs nach generate_jobs sofort automatisch auf die Drucker verteilen (print_scheduler)
+    app.config['AUTO_SCHEDULE_JOBS'] = os.getenv('AUTO_SCHEDULE_JOBS', 'false').lower() == 'true'
+
+    # SQLite-Profil (siehe database.DEFAULT_DB_PROFILE) – per .env überschreibbar
+    app.config['DB_JOURNAL_MODE'] = os.getenv('DB_JOURNAL_MODE', 'WAL')
+    app.config['DB_SYNCHRONOUS'] = os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+    app.config['DB_BUSY_TIMEOUT'] = int(os.getenv('DB_BUSY_TIMEOUT', 5000))
+    app.config['DB_CACHE_SIZE'] = int(os.getenv('DB_CACHE_SIZE', -16000))
+    app.config['DB_MMAP_SIZE'] = int(os.getenv('DB_MMAP_SIZE', 268435456))
+    app.config['DB_TEMP_STORE'] = os.getenv('DB_TEMP_STORE', 'MEMORY')
 
     # Instanzen initialisieren
     app.user_manager = UserManager()
     Session(app)
     limiter.init_app(app)
     scheduler.init_app(app) # Nur initialisieren
+    database.init_app(app)  # DB-Profil (WAL etc.) + Teardown-Hook des Verbindungs-Pools
+
+    # Schema-Migrationen (versioniert, idempotent) vor dem ersten Request anwenden
+    try:
+        migrations.run_migrations()
+    except Exception as e:
+        logger.error(f"❌ Schema-Migration fehlgeschlagen: {e}")
 
     # Blueprints importieren & registrieren
     from .views import views
@@ -52,6 +89,7 @@ def create_app():
     app.register_blueprint(views, url_prefix='/')
     app.register_blueprint(auth, url_prefix='/')
     app.register_blueprint(admin_bp)
+    app.register_error_handler(RequestEntityTooLarge, handle_upload_too_large)
     
     # Context Processor für CSRF
     @app.context_processor
@@ -62,27 +100,76 @@ def create_app():
             return session['csrf_token']
         return dict(csrf_token=get_csrf_token)
 
-# ==================== ZEITGESTEUERTER BANK SYNC ====================
-    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not app.debug:
-        from .bank_service import sync_bank_balance
-        
-        def scheduled_bank_sync():
-            with app.app_context():
-                sync_bank_balance(app)
-
-        # Job sauber registrieren – doppelte IDs überschreiben sich im Live-Betrieb
-        scheduler.add_job(
-            id='sync_bank_task',
-            func=scheduled_bank_sync,
-            trigger='interval',
-            minutes=app.config['BANK_UPDATE_INTERVAL'],
-            misfire_grace_time=900,
-            max_instances=1,
-            replace_existing=True
-        )
-
+# ==================== HINTERGRUNDJOBS (Bank-Sync, Mail-Outbox) ====================
+    # BACKGROUND_JOBS=web    → Scheduler läuft im Web-Prozess (Entwicklung, Einzelprozess)
+    # BACKGROUND_JOBS=worker → nur `python -m website.worker` führt Jobs aus, Web-Worker bleiben frei
+    if app.config['BACKGROUND_JOBS'] == 'web' and (os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not app.debug):
+        register_background_jobs(app)
         scheduler.start()
         logger.info("🚀 APScheduler im Hauptprozess gestartet.")
     # ===================================================================
 
-    return app
\ No newline at end of file
+    return app
+
+
+def register_background_jobs(app):
+    """
+    Registriert alle Hintergrundjobs am Scheduler (Web-Prozess oder website.worker).
+    Jeder Lauf holt sich vorher eine Job-Lease in der DB → clusterweit läuft
+    höchstens ein Bank-Sync bzw. ein Mail-Versand gleichzeitig.
+    """
+    from .bank_service import sync_bank_balance
+    from .mail_manager import MailSender
+    from .job_manager import JobLeaseManager
+
+    job_leases = JobLeaseManager()
+    bank_lease = app.config['BANK_SYNC_LEASE_SECONDS']
+
+    # Delta-Sync und voller Abgleich teilen sich eine Lease ('bank_sync')
+    def scheduled_bank_sync():
+        with app.app_context():
+            job_leases.run_exclusive('bank_sync', lambda: sync_bank_balance(app), bank_lease)
+
+    # Job sauber registrieren – doppelte IDs überschreiben sich im Live-Betrieb
+    scheduler.add_job(
+        id='sync_bank_task',
+        func=scheduled_bank_sync,
+        trigger='interval',
+        minutes=app.config['BANK_UPDATE_INTERVAL'],
+        misfire_grace_time=900,
+        max_instances=1,
+        replace_existing=True
+    )
+
+    # Voller Abgleich (RECONCILE_WINDOW_DAYS) – fängt spät gebuchte Umsätze außerhalb der Überlappung
+    def scheduled_bank_reconcile():
+        with app.app_context():
+            job_leases.run_exclusive('bank_sync', lambda: sync_bank_balance(app, full=True), bank_lease)
+
+    scheduler.add_job(
+        id='reconcile_bank_task',
+        func=scheduled_bank_reconcile,
+        trigger='interval',
+        hours=app.config['BANK_RECONCILE_INTERVAL'],
+        misfire_grace_time=3600,
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+    # Mail-Outbox: Hintergrund-Versand mit wiederverwendeter SMTP-Sitzung
+    mail_sender = MailSender()
+
+    def scheduled_mail_delivery():
+        with app.app_context():
+            job_leases.run_exclusive('mail_outbox', mail_sender.run_once, 120)
+
+    scheduler.add_job(
+        id='mail_outbox_task',
+        func=scheduled_mail_delivery,
+        trigger='interval',
+        seconds=app.config['MAIL_POLL_INTERVAL'],
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
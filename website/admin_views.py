@@ -1,7 +1,8 @@
 import os # Für Dateipfade
 import json # Für BOM-Handling
+import datetime # Für Datumsparameter der Metrik-API
 from flask import send_from_directory, abort # Für sicheren Datei-Download
-from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify # Flask-Module für Routing, Templates, Formulardaten, Flash-Messages und JSON-Antworten
+from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify, make_response, current_app, Response # Flask-Module für Routing, Templates, Formulardaten, Flash-Messages und JSON-Antworten
 ### Importiere den ProjectManager, um Projekt-Daten abzurufen, den CalculationManager für Berechnungen ###
 from .project_manager import ProjectManager
 from .calculation_manager import CalculationManager
@@ -10,6 +11,11 @@ from .order_manager import OrderManager
 from .material_manager import MaterialManager
 from .user_manager import UserManager
 from .transaction_manager import TransactionManager
+from .mail_manager import MailOutboxManager
+from .job_manager import JobLeaseManager
+from .print_scheduler import PrintScheduler
+from .event_bus import production_events
+from . import limiter
 ### Importiere den Decorator aus der user.py ###
 from .user import check_admin
 from dotenv import load_dotenv
@@ -26,6 +32,64 @@ order_manager = OrderManager()
 material_manager = MaterialManager()
 user_manager = UserManager()
 transaction_manager = TransactionManager()
+mail_outbox = MailOutboxManager()
+job_leases = JobLeaseManager()
+print_scheduler = PrintScheduler()
+
+# --- METRIKEN: Mail-Outbox (Warteschlangentiefe, Fehler, Alter) ---
+@admin_bp.route('/api/metrics/mail', methods=['GET'])
+@check_admin
+def mail_queue_metrics():
+    return jsonify(mail_outbox.get_queue_metrics()), 200
+
+# --- METRIKEN: Hintergrundjobs (letzter Lauf, Dauer, Status, laufende Lease) ---
+@admin_bp.route('/api/metrics/jobs', methods=['GET'])
+@check_admin
+def background_job_metrics():
+    return jsonify(job_leases.get_job_statuses()), 200
+
+# --- METRIKEN: Zeitreihen für Dashboard-Charts (Umsatz, Bank-Cashflow) ---
+# Spaltenweises JSON: {"dates": [...], "revenue": [...], ...}
+# Query-Parameter: from / to (YYYY-MM-DD, inklusive), bucket = day | week | month
+@admin_bp.route('/api/metrics/orders', methods=['GET'])
+@check_admin
+def order_metrics():
+    return _metric_series_response('orders')
+
+@admin_bp.route('/api/metrics/cashflow', methods=['GET'])
+@check_admin
+def cashflow_metrics():
+    return _metric_series_response('cashflow')
+
+def _metric_series_response(metric):
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in transaction_manager.METRIC_BUCKETS:
+        return jsonify({'error': f"Ungültiger bucket '{bucket}' (erlaubt: day, week, month)."}), 400
+
+    try:
+        date_from = _parse_metric_date(request.args.get('from'))
+        date_to = _parse_metric_date(request.args.get('to'))
+    except ValueError:
+        return jsonify({'error': "from/to müssen im Format YYYY-MM-DD angegeben werden."}), 400
+
+    # ETag aus Datenversion + Parametern: solange sich nichts geändert hat,
+    # antwortet der Server mit 304 ohne die Rollups überhaupt zu lesen
+    version = transaction_manager.get_metric_version(metric)
+    etag = f"{metric}-{version}-{bucket}-{date_from or ''}-{date_to or ''}"
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = jsonify(transaction_manager.get_metric_series(metric, date_from, date_to, bucket))
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'  # immer revalidieren (→ 304)
+    return response
+
+def _parse_metric_date(value):
+    """'YYYY-MM-DD' → normalisierter ISO-String, leer → None, sonst ValueError."""
+    if not value:
+        return None
+    return datetime.date.fromisoformat(value).isoformat()
 
 # --- 1. ENDPOINT FÜR DASHBOARD (Übersicht) ---
 # Konstante Liste aller verfügbaren Sektionen in ihrer Basisreihenfolge
@@ -45,19 +109,52 @@ def dashboard():
     account_data = transaction_manager.get_primary_bank_account()
     orders_data = transaction_manager.get_recent_orders(limit=5)
     
-    # 4. Plots generieren (über existierende Plot-Routinen/Manager)
-    order_plot_url = transaction_manager.generate_order_plot() # Oder entsprechende Plot-Logik
-    bank_plot_url = transaction_manager.generate_bank_plot()
+    # 4. Charts: clientseitig (JSON-API, kein Matplotlib auf dem Server) oder als PNG.
+    #    PNGs nur per URL einbinden – gerendert wird nur bei geänderter Datenversion,
+    #    sonst kommt das PNG aus dem Cache (und der Browser cacht die versionierte URL)
+    chart_mode = current_app.config.get('DASHBOARD_CHART_MODE', 'server')
+    if chart_mode == 'client':
+        order_plot_url = bank_plot_url = None
+    else:
+        order_plot_url = _dashboard_plot_url('orders')
+        bank_plot_url = _dashboard_plot_url('bank')
     
     return render_template(
         'admin/admin_dashboard.html', # Dein Template-Pfad bleibt gleich
         section_order=current_order,
         account=account_data,
         orders=orders_data,
+        chart_mode=chart_mode,
         order_plot_url=order_plot_url,
         bank_plot_url=bank_plot_url
     )
 
+def _dashboard_plot_url(name):
+    """Versionierte Bild-URL des Plots oder None, wenn (noch) keine Daten existieren."""
+    png, version = transaction_manager.get_plot_png(name)
+    if png is None:
+        return None
+    return url_for('admin_views.dashboard_plot', name=name, v=version)
+
+@admin_bp.route('/admin/dashboard/plots/<name>.png', methods=['GET'])
+@check_admin
+def dashboard_plot(name):
+    if name not in transaction_manager.PLOTS:
+        abort(404)
+
+    png, version = transaction_manager.get_plot_png(name)
+    if png is None:
+        abort(404)
+
+    response = make_response(png)
+    response.headers['Content-Type'] = 'image/png'
+    if request.args.get('v') == str(version):
+        # URL enthält die Datenversion → Inhalt ändert sich unter dieser URL nie mehr
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @admin_bp.route('/admin/dashboard/rotate', methods=['POST'])
 @check_admin
 def rotate_dashboard():
@@ -121,11 +218,12 @@ def admin_download_file(file_id):
     file_name = file_info['FileName']
     # Absoluten Pfad zur Prüfung bauen
     target_path = os.path.join(TEMP_UPLOAD_FOLDER, file_name)
+    relative_path = file_name
 
     if not os.path.exists(target_path):
-        # Fallback: Aus dem DB-Pfad extrahieren
-        file_name = os.path.basename(file_info['FilePath'])
-        target_path = os.path.join(TEMP_UPLOAD_FOLDER, file_name)
+        # Fallback: DB-Pfad (Blob-Store: blobs/ab/cd/<sha256>, Altbestand: FILE_<uuid>.<ext>)
+        relative_path = file_info['FilePath']
+        target_path = os.path.join(TEMP_UPLOAD_FOLDER, relative_path)
         
         if not os.path.exists(target_path):
             if project_id:
@@ -133,7 +231,8 @@ def admin_download_file(file_id):
                 return redirect(url_for('admin_views.project_details', project_id=project_id))
             abort(404, description="Datei physisch auf Datenträger nicht gefunden.")
 
-    return send_from_directory(TEMP_UPLOAD_FOLDER, file_name, as_attachment=True)
+    # Download immer unter dem Originalnamen (Blobs haben keinen sprechenden Dateinamen)
+    return send_from_directory(TEMP_UPLOAD_FOLDER, relative_path, as_attachment=True, download_name=file_name)
 
 @admin_bp.route('/project/<string:project_id>/files', methods=['GET'])
 @check_admin
@@ -717,16 +816,42 @@ def admin_get_bom(project_id):
         return jsonify({"success": True, "data": empty_bom}), 200
 
 @admin_bp.route('/get_printers', methods=['GET'])
+@limiter.exempt  # wird nach jedem Live-Ereignis und als Fallback regelmäßig abgefragt
 @check_admin 
 def get_printers():
     try:
         # Business-Logik und DB-Abfragen komplett ausgelagert
-        printer_list = project_manager.get_all_printers_with_queue()
-        return jsonify(printer_list), 200
+        # ETag aus dem Queue-Versionszähler: unveränderte Polls → 304 ohne Board-Query
+        version, printers = project_manager.get_printer_board()
+        etag = f"printers-{version}"
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = jsonify(printers)
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'  # immer revalidieren (→ 304)
+        return response
         
     except Exception as e:
         return jsonify({"success": False, "message": f"Interner Fehler: {str(e)}"}), 500
 
+# --- LIVE-EREIGNISSE: Server-Sent Events für Drucker-Board und Job-Pool ---
+@admin_bp.route('/events', methods=['GET'])
+@limiter.exempt
+@check_admin
+def production_event_stream():
+    """
+    text/event-stream mit 'queue'- und 'jobs'-Ereignissen aus dem Event-Bus.
+    Nach Verbindungsabbruch setzt der Browser per Last-Event-ID fort; die Verbindung
+    endet nach event_bus.STREAM_MAX_SECONDS (Admin-Prüfung beim Neuverbinden).
+    """
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    response = Response(production_events.stream(last_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: nicht puffern
+    return response
+
 @admin_bp.route('/initialize_printer', methods=['POST'])
 @check_admin 
 def initialize_printer():
@@ -763,18 +888,28 @@ def initialize_printer():
 @admin_bp.route('/generate_jobs/<string:project_id>', methods=['POST'])
 @check_admin 
 def generate_jobs(project_id):
-    success, result = project_manager.process_bom_to_production(project_id)
+    # Stückzahl-Jobs (ein Job pro BOM-Zeile) oder ein Job pro Stück, siehe PRODUCTION_JOB_MODE
+    batched = current_app.config.get('PRODUCTION_JOB_MODE') == 'batch'
+    success, result = project_manager.process_bom_to_production(project_id, batched=batched)
     
     if not success:
         return jsonify({
             "success": False, 
             "message": result
         }), 400
+
+    # Optional: neue Jobs sofort auf die Drucker verteilen (hinten an die Queues)
+    schedule = None
+    if result and current_app.config.get('AUTO_SCHEDULE_JOBS'):
+        scheduled, schedule = print_scheduler.schedule_open_jobs()
+        if not scheduled:
+            schedule = None
         
     return jsonify({
         "success": True, 
         "message": f"Jobs erfolgreich hinzugefügt: {result}",
-        "jobs_created": result
+        "jobs_created": result,
+        "schedule": schedule
     }), 200
 
 @admin_bp.route('/jobs/data', methods=['GET'])
@@ -888,16 +1023,27 @@ def assign_job_to_printer():
     data = request.get_json() or {}
     job_id = data.get('job_id')
     printer_id = data.get('printer_id')
+    quantity = data.get('quantity')   # optional: Teilmenge, sonst eine volle Druckplatte
+    at_end = data.get('position') == 'end'   # Standard: vorne einreihen (Position 1)
 
     if not job_id or not printer_id:
         return jsonify({"success": False, "message": "Fehlende JobID oder PrinterID."}), 400
 
+    if quantity is not None:
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "message": "Ungültige Menge."}), 400
+
     try:
         # DB-Logik und Positions-Verschiebung komplett ausgelagert
-        success, message = project_manager.assign_job_to_printer_queue(job_id, printer_id)
+        success, message = project_manager.assign_job_to_printer_queue(job_id, printer_id, quantity, at_end)
         
         if not success:
             return jsonify({"success": False, "message": message}), 400
+
+        # Neuer Eintrag verschiebt die Planzeiten dieses Druckers → neu rechnen
+        print_scheduler.refresh_timelines([printer_id])
             
         return jsonify({"success": True, "message": message}), 200
 
@@ -921,12 +1067,78 @@ def remove_job_from_printer():
         
         if not success:
             return jsonify({"success": False, "message": message}), 442
+
+        print_scheduler.refresh_timelines([printer_id])
             
         return jsonify({"success": True, "message": message}), 200
 
     except Exception as e:
         return jsonify({"success": False, "message": f"Interner Fehler: {str(e)}"}), 500
 
+@admin_bp.route('/reorder_printer_queue', methods=['POST'])
+@check_admin 
+def reorder_printer_queue():
+    data = request.get_json() or {}
+    printer_id = data.get('printer_id')
+    queue_ids = data.get('queue_ids')   # komplette neue Reihenfolge der Queue (Drag & Drop)
+
+    if not printer_id or not isinstance(queue_ids, list):
+        return jsonify({"success": False, "message": "Fehlende PrinterID oder Reihenfolge."}), 400
+
+    try:
+        success, result = project_manager.reorder_printer_queue(printer_id, queue_ids)
+
+        if not success:
+            return jsonify({"success": False, "message": result}), 409
+
+        # Ziel- und ggf. Quelldrucker: Planzeiten neu rechnen
+        print_scheduler.refresh_timelines(result)
+        return jsonify({"success": True, "message": "Reihenfolge gespeichert."}), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Interner Fehler: {str(e)}"}), 500
+
+
+@admin_bp.route('/schedule_jobs', methods=['POST'])
+@check_admin 
+def schedule_jobs():
+    # Alle offenen QUEUED-Jobs automatisch auf passende Drucker verteilen (LPT)
+    success, result = print_scheduler.schedule_open_jobs()
+
+    if not success:
+        return jsonify({"success": False, "message": result}), 500
+
+    message = f"{result['plates_planned']} Druckplatten für {result['jobs_planned']} Jobs eingeplant."
+    if result['unschedulable']:
+        message += f" {len(result['unschedulable'])} Job(s) passen auf keinen verfügbaren Drucker."
+
+    return jsonify({"success": True, "message": message, **result}), 200
+
+
+@admin_bp.route('/complete_queue_entry', methods=['POST'])
+@check_admin 
+def complete_queue_entry():
+    data = request.get_json() or {}
+    queue_id = data.get('queue_id')
+    printer_id = data.get('printer_id')
+
+    if not queue_id or not printer_id:
+        return jsonify({"success": False, "message": "Fehlende QueueID oder PrinterID."}), 400
+
+    try:
+        # Druckplatte fertig → Stückzahl auf den Job buchen, Eintrag aus der Queue nehmen
+        success, message = project_manager.complete_queue_entry(queue_id, printer_id)
+
+        if not success:
+            return jsonify({"success": False, "message": message}), 400
+
+        print_scheduler.refresh_timelines([printer_id])
+
+        return jsonify({"success": True, "message": message}), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Interner Fehler: {str(e)}"}), 500
+
 @admin_bp.route('/manage_users', methods=['GET', 'POST'])
 @check_admin  # Dein Decorator sichert die Route bereits komplett ab
 def manage_users():
@@ -975,8 +1187,7 @@ def project_autofill(project_id):
 @admin_bp.route('/start_project', methods=['GET','POST'])
 @check_admin 
 def start_project():
-    #TODO: hier die db-abfrage hin die die configuratios ausliest, damit die upload_limit_mb dynamisch im Template verfügbar ist
-    upload_limit_mb = 25 # Beispielhafter Wert, in der Realität aus DB oder Config laden
+    upload_limit_mb = current_app.config['UPLOAD_LIMIT_MB'] # wird beim Upload serverseitig erzwungen (website/uploads.py)
     current_user_id = session['user_id']
 
     # NEU: Dropdown-Quellen für Profil/Material, analog zu manufacturing_control
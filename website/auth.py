@@ -3,45 +3,21 @@ from flask import request, redirect, url_for, flash, render_template, Blueprint,
 from flask import current_app
 import secrets
 import os
-import smtplib
-import ssl
-from email.message import EmailMessage
 from .utils import require_csrf
+from .mail_manager import MailOutboxManager
 from . import limiter # aus init.py importierter request-limiter
 
 auth = Blueprint('auth', __name__)
+mail_outbox = MailOutboxManager()
 
 def send_system_email(recipient_email, subject, body_html, body_plain):
     """
-    Zentrale Funktion für den E-Mail-Versand via SMTP.
-    Nutzt Umgebungsvariablen für die Konfiguration.
+    Zentrale Funktion für den E-Mail-Versand.
+    Legt die Mail nur in der Outbox ab (schnell, kein SMTP im Request);
+    der Versand erfolgt im Hintergrund über MailSender (mail_manager.py).
     """
-    smtp_host = os.environ.get('SMTP_HOST', 'localhost')
-    smtp_port = int(os.environ.get('SMTP_PORT', '465'))
-    smtp_user = os.environ.get('SMTP_USER')
-    smtp_pass = os.environ.get('SMTP_PASS')
-    sender = os.environ.get('SMTP_SENDER', 'noreply@yourdomain.com')
-
-    msg = EmailMessage()
-    msg['Subject'] = subject
-    msg['From'] = sender
-    msg['To'] = recipient_email
-    msg.set_content(body_plain)
-    msg.add_alternative(body_html, subtype='html')
-
     try:
-        if smtp_port == 465:
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(smtp_host, smtp_port, context=context) as server:
-                if smtp_user and smtp_pass:
-                    server.login(smtp_user, smtp_pass)
-                server.send_message(msg)
-        else:
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
-                server.starttls(context=ssl.create_default_context())
-                if smtp_user and smtp_pass:
-                    server.login(smtp_user, smtp_pass)
-                server.send_message(msg)
+        mail_outbox.enqueue(recipient_email, subject, body_html, body_plain)
         return True
     except Exception as e:
         print(f"Kritischer Mail-Fehler an {recipient_email}: {e}")
@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+
+from . import bank_service
+from .bank_providers import SyntheticBankProvider
+from .migrations import run_migrations
+from .database import DEFAULT_DB_PROFILE, apply_database_profile, close_connections
+
+# =================================================================
+# BENCHMARK: Bank-Sync ohne echte Bank
+# =================================================================
+# Misst sync_bank_balance mit dem SyntheticBankProvider gegen eine frisch
+# migrierte Temp-Datenbank im Produktionsprofil (WAL):
+#   1. Lauf: alle Umsätze sind neu                → Einfügepfad (executemany)
+#   2. Lauf: Delta-Sync ab Wasserstand            → nur die Überlappung wird geprüft
+#   3. Lauf: voller Abgleich (30 Tage) nochmal    → reiner Duplikatpfad
+#
+# Schreibverstärkung = im WAL geschriebene Bytes / Nutzdaten der neuen Zeilen.
+# Jeder Sync ist genau eine Transaktion → die WAL-Größe nach dem Lauf entspricht
+# allen geschriebenen Seiten (inkl. Indizes, Rollup-Triggern, Kontostand).
+#
+# Aufruf: python -m website.bank_benchmark [--statements 5000] [--duplicates 0.1]
+
+# Nutzdaten einer Transaktionszeile (Textlängen + 8 Byte für den REAL-Betrag)
+_PAYLOAD_BYTES = """
+    SELECT COUNT(*), COALESCE(SUM(
+        length(TransactionID) + length(AccountID) + length(Primanota) + length(BookingDate)
+        + length(COALESCE(PartnerName, '')) + 8 + length(COALESCE(Currency, ''))
+        + length(COALESCE(Purpose, ''))
+    ), 0)
+    FROM BankTransactions
+"""
+
+
+def _table_stats(observer):
+    """(Anzahl Zeilen, Nutzdaten-Bytes) von BankTransactions."""
+    return observer.execute(_PAYLOAD_BYTES).fetchone()
+
+
+def _reset_wal(observer):
+    """Checkpoint + WAL auf 0 Byte kürzen, damit der nächste Lauf bei null beginnt."""
+    observer.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+def _wal_pages(db_path, page_size):
+    """Anzahl der im WAL stehenden Seiten (Header 32 Byte, je Frame 24 Byte + Seite)."""
+    wal_path = db_path + '-wal'
+    if not os.path.exists(wal_path):
+        return 0
+    return max(0, (os.path.getsize(wal_path) - 32) // (page_size + 24))
+
+
+def run_benchmark(statement_count, duplicate_rate):
+    """Führt die drei Sync-Läufe aus und gibt die Messwerte als Liste von dicts zurück."""
+    provider = SyntheticBankProvider(transaction_count=statement_count, duplicate_rate=duplicate_rate)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bank_benchmark.db')
+        db_backup = os.environ.get('DB_PATH')
+        observer = None
+
+        try:
+            os.environ['DB_PATH'] = db_path
+            apply_database_profile(DEFAULT_DB_PROFILE, db_path)
+            run_migrations(db_path)
+            close_connections()
+
+            # Beobachter-Verbindung bleibt offen: schließt der Sync die letzte Verbindung,
+            # würde SQLite das WAL sonst einchecken und löschen, bevor wir es messen
+            observer = sqlite3.connect(db_path, isolation_level=None)
+            page_size = observer.execute('PRAGMA page_size').fetchone()[0]
+
+            runs = (
+                ('Erstimport', False),
+                ('Delta-Sync (Wasserstand)', False),
+                ('Voller Abgleich', True),
+            )
+            for label, full in runs:
+                _reset_wal(observer)
+                rows_before, payload_before = _table_stats(observer)
+
+                started = time.perf_counter()
+                ok = bank_service.sync_bank_balance(None, full=full, provider=provider)
+                elapsed = time.perf_counter() - started
+
+                rows_after, payload_after = _table_stats(observer)
+                wal_bytes = _wal_pages(db_path, page_size) * page_size
+                payload = payload_after - payload_before
+                fetched = provider.last_delivery_size
+
+                results.append({
+                    'run': label,
+                    'ok': ok,
+                    'seconds': elapsed,
+                    'fetched': fetched,
+                    'statements_per_second': fetched / elapsed if elapsed else float('inf'),
+                    'inserted': rows_after - rows_before,
+                    'wal_bytes': wal_bytes,
+                    'write_amplification': wal_bytes / payload if payload else None,
+                })
+        finally:
+            if observer:
+                observer.close()
+            if db_backup is None:
+                os.environ.pop('DB_PATH', None)
+            else:
+                os.environ['DB_PATH'] = db_backup
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark für sync_bank_balance mit synthetischem Bank-Provider")
+    parser.add_argument('--statements', type=int, default=5000, help="Anzahl Umsätze im 30-Tage-Fenster")
+    parser.add_argument('--duplicates', type=float, default=0.1, help="Anteil echter Mehrfachbuchungen (0..1)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    print(f"Bank-Sync-Benchmark: {args.statements} Umsätze, Duplikatrate {args.duplicates:.0%}")
+    for result in run_benchmark(args.statements, args.duplicates):
+        amplification = result['write_amplification']
+        print(f"  {result['run']:<26} {result['seconds'] * 1000:9.1f} ms  "
+              f"{result['fetched']:6d} abgerufen  {result['statements_per_second']:9.0f} Umsätze/s  "
+              f"{result['inserted']:6d} eingefügt  WAL {result['wal_bytes'] / 1024:8.1f} KiB  "
+              f"Verstärkung {f'{amplification:5.1f}x' if amplification else '    -'}  "
+              f"{'OK' if result['ok'] else 'FEHLER'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+import os
+import random
+import logging
+import datetime
+from collections import namedtuple
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+# =================================================================
+# BANK-PROVIDER: Schnittstelle zwischen sync_bank_balance und der Bank
+# =================================================================
+# sync_bank_balance spricht nur noch mit einem BankProvider. Die echte Anbindung
+# ist FinTSProvider (ING per FinTS/PIN-TAN); SyntheticBankProvider liefert
+# deterministische Fake-Umsätze für Benchmarks und Lasttests ohne Bank und ohne SCA.
+# Auswahl über BANK_PROVIDER in der .env (fints | synthetic), Standard: fints.
+
+# Normalisierter Umsatz – genau die Felder, die in BankTransactions landen
+BankStatement = namedtuple(
+    'BankStatement', ['booking_date', 'amount', 'partner', 'purpose', 'currency', 'primanota']
+)
+
+# Minimale Kontodarstellung (FinTS liefert eigene SEPA-Objekte mit denselben Attributen)
+BankAccountInfo = namedtuple('BankAccountInfo', ['iban', 'bic', 'accountnumber'])
+
+
+class BankProvider:
+    """
+    Basisklasse aller Bank-Anbindungen. Wird als Kontextmanager benutzt,
+    damit Anbieter mit Sitzung (FinTS-Dialog) sauber öffnen und schließen.
+    """
+
+    bank_name = "Bank"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get_accounts(self):
+        """Liste der Konten (Objekte mit mindestens .iban)."""
+        raise NotImplementedError
+
+    def get_balance(self, account):
+        """Aktueller Saldo des Kontos als float (Euro)."""
+        raise NotImplementedError
+
+    def get_transactions(self, account, start_date):
+        """Umsätze ab start_date (inklusive) als Liste von BankStatement."""
+        raise NotImplementedError
+
+
+class FinTSProvider(BankProvider):
+    """Echte Anbindung per FinTS (python-fints), Zugangsdaten aus der .env."""
+
+    bank_name = "ING"
+    PRODUCT_ID = "6151256F3D4F9975B877BD4A2"
+
+    def __init__(self):
+        user = os.getenv('BANK_USER')
+        pin = os.getenv('BANK_PIN')
+        if not user or not pin:
+            raise ValueError("BANK_USER oder BANK_PIN fehlen in der .env!")
+
+        # Import erst hier: Synthetic-Provider und Benchmarks laufen auch ohne python-fints
+        from fints.client import FinTS3PinTanClient
+
+        self.client = FinTS3PinTanClient(
+            bank_identifier=os.getenv('BANK_BLZ', '50010517'),
+            user_id=user,
+            customer_id=user,
+            pin=pin,
+            server=os.getenv('BANK_URL', 'https://fints.ing.de/fints/'),
+            product_id=self.PRODUCT_ID
+        )
+
+    def __enter__(self):
+        self.client.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.client.__exit__(*exc)
+
+    def get_accounts(self):
+        accounts = self.client.get_sepa_accounts()
+        if self.client.init_tan_response:
+            logger.warning("🔒 [SCA erforderlich] Bitte Freigabe in der ING-App erteilen!")
+        return accounts
+
+    def get_balance(self, account):
+        balance_data = self.client.get_balance(account)
+        return float(balance_data.amount.amount)
+
+    def get_transactions(self, account, start_date):
+        today_str = datetime.date.today().isoformat()
+        statements = self.client.get_transactions(account, start_date) or []
+        return [self._normalize(tx, today_str) for tx in statements]
+
+    @staticmethod
+    def _normalize(tx, today_str):
+        """Zieht die für DB und Duplikaterkennung relevanten Felder aus einem MT940-Umsatz."""
+        tx_date = tx.data.get('date')
+        tx_date = tx_date.isoformat() if isinstance(tx_date, datetime.date) else (str(tx_date) if tx_date else today_str)
+
+        amt_obj = tx.data.get('amount')
+        tx_amount_val = float(amt_obj.amount) if amt_obj and hasattr(amt_obj, 'amount') else 0.0
+
+        tx_purpose = tx.data.get('purpose')
+
+        return BankStatement(
+            booking_date=tx_date,
+            amount=tx_amount_val,
+            partner=tx.data.get('applicant_name', 'Unbekannter Partner'),
+            purpose=str(tx_purpose) if tx_purpose else 'Kein Verwendungszweck',
+            currency=getattr(amt_obj, 'currency', 'EUR'),
+            primanota=tx.data.get('primanota') or tx.data.get('id'),
+        )
+
+
+class SyntheticBankProvider(BankProvider):
+    """
+    Deterministischer Offline-Provider für Benchmarks und Lasttests.
+
+    Erzeugt transaction_count Umsätze über die letzten days Tage; duplicate_rate ist der
+    Anteil echter Mehrfachbuchungen (gleiches Datum, Betrag und Verwendungszweck), die
+    die Duplikaterkennung von sync_bank_balance korrekt mehrfach speichern muss.
+    """
+
+    bank_name = "Synthetic"
+
+    def __init__(self, transaction_count=1000, duplicate_rate=0.1, days=30, seed=42, balance=1234.56):
+        self.balance = balance
+        self.accounts = [
+            BankAccountInfo(iban='DE00000000000000000000', bic='SYNTDEFFXXX', accountnumber='0000000000'),
+            BankAccountInfo(iban='DE00123456780000000000', bic='SYNTDEFFXXX', accountnumber='1234567800'),
+        ]
+        self.statements = self._generate(transaction_count, duplicate_rate, days, seed)
+        self.last_delivery_size = 0
+
+    @classmethod
+    def from_env(cls):
+        """Konfiguration für BANK_PROVIDER=synthetic (Lasttests gegen eine laufende App)."""
+        return cls(
+            transaction_count=int(os.getenv('SYNTHETIC_BANK_TRANSACTIONS', 1000)),
+            duplicate_rate=float(os.getenv('SYNTHETIC_BANK_DUPLICATE_RATE', 0.1)),
+        )
+
+    @staticmethod
+    def _generate(count, duplicate_rate, days, seed):
+        rng = random.Random(seed)
+        today = datetime.date.today()
+        statements = []
+
+        for i in range(count):
+            if statements and rng.random() < duplicate_rate:
+                template = rng.choice(statements)
+                booking_date, amount, purpose = template.booking_date, template.amount, template.purpose
+            else:
+                booking_date = (today - datetime.timedelta(days=rng.randrange(days))).isoformat()
+                amount = float(Decimal(rng.randrange(-50000, 50000)) / 100)
+                purpose = f"Rechnung {i:06d}"
+
+            statements.append(BankStatement(
+                booking_date=booking_date,
+                amount=amount,
+                partner=f"Partner {rng.randrange(200)}",
+                purpose=purpose,
+                currency='EUR',
+                primanota=rng.choice(['NMSC', f"{rng.randrange(1000, 9999)}"]),
+            ))
+        return statements
+
+    def get_accounts(self):
+        return list(self.accounts)
+
+    def get_balance(self, account):
+        return self.balance
+
+    def get_transactions(self, account, start_date):
+        # Wie die Bank: nur Umsätze ab start_date
+        start_str = start_date.isoformat()
+        delivery = [tx for tx in self.statements if tx.booking_date >= start_str]
+        self.last_delivery_size = len(delivery)
+        return delivery
+
+
+BANK_PROVIDERS = {
+    'fints': FinTSProvider,
+    'synthetic': SyntheticBankProvider.from_env,
+}
+
+
+def get_bank_provider(name=None):
+    """
+    Erzeugt den konfigurierten Provider (BANK_PROVIDER, Standard: fints).
+    Wirft ValueError bei unbekanntem Namen oder fehlenden Zugangsdaten.
+    """
+    name = (name or os.getenv('BANK_PROVIDER', 'fints')).lower()
+    factory = BANK_PROVIDERS.get(name)
+    if factory is None:
+        raise ValueError(f"Unbekannter BANK_PROVIDER '{name}' (erlaubt: {', '.join(BANK_PROVIDERS)})")
+    return factory()
@@ -1,56 +1,152 @@
 import os
 import logging
 import datetime
-import sqlite3
 import uuid
-from fints.client import FinTS3PinTanClient
+import threading
+from collections import Counter
+from .database import get_connection
+from .bank_providers import get_bank_provider
 
 logger = logging.getLogger(__name__)
 
+# Voller Abgleich: so viele Tage werden komplett neu abgefragt (expliziter, seltener Job)
+RECONCILE_WINDOW_DAYS = 30
+# Delta-Sync: Überlappung vor dem Wasserstand für nachträglich gebuchte Umsätze
+SYNC_OVERLAP_DAYS = 3
+
+# Delta-Sync und voller Abgleich dürfen nicht parallel schreiben (gleiche Duplikatprüfung)
+_sync_lock = threading.Lock()
+
 def generate_unique_id(prefix):
     return f"{prefix}_{uuid.uuid4()}"
 
-def sync_bank_balance(app):
+def _sync_start_date(last_booking_date, full, today):
+    """
+    Ab welchem Buchungstag Umsätze abgefragt werden:
+    - voller Abgleich (oder noch kein Wasserstand): die letzten RECONCILE_WINDOW_DAYS Tage
+    - Delta-Sync: ab dem Wasserstand minus SYNC_OVERLAP_DAYS (spät gebuchte Umsätze)
+    """
+    if full or not last_booking_date:
+        return today - datetime.timedelta(days=RECONCILE_WINDOW_DAYS)
+    return datetime.date.fromisoformat(last_booking_date) - datetime.timedelta(days=SYNC_OVERLAP_DAYS)
+
+def _store_transactions(cursor, account_id, statements, last_sequence_no=0):
+    """
+    Schreibt die neuen Umsätze einer Provider-Lieferung (Liste von BankStatement) in BankTransactions.
+
+    Duplikaterkennung über Multimengen der Schlüssel (Datum, Betrag, Verwendungszweck):
+    Kommt ein Schlüssel in der Lieferung n-mal vor und liegt bereits m-mal in der DB,
+    werden genau n - m Buchungen eingefügt (mehrere echte Buchungen mit gleichem
+    Schlüssel bleiben erhalten). Die DB-Seite kommt aus EINER Bereichsabfrage über
+    das Datumsfenster der Lieferung, geschrieben wird per executemany → linear statt O(n²).
+
+    Returns:
+        (Anzahl neu eingefügter Transaktionen, höchste vergebene NMSC-Nummer, jüngstes Buchungsdatum)
+    """
+    rows = list(statements)
+    if not rows:
+        return 0, last_sequence_no, None
+
+    # CRITICAL GOBD-FIX: Sortiere den API-Stream chronologisch nach Datum vor!
+    # Das stellt sicher, dass die Sequenz-Nummern (NMSC-xxxxxx) immer in der korrekten 
+    # zeitlichen Reihenfolge vergeben werden. (sort ist stabil → Lieferreihenfolge je Tag bleibt)
+    rows.sort(key=lambda tx: tx.booking_date)
+
+    # 1. Multimenge der Lieferung
+    delivery_counts = Counter((tx.booking_date, tx.amount, tx.purpose) for tx in rows)
+
+    # 2. Multimenge der DB-Zeilen im Datumsfenster der Lieferung (eine Query, Index auf AccountID+BookingDate)
+    cursor.execute('''
+        SELECT BookingDate, Amount, Purpose, COUNT(*) FROM BankTransactions
+        WHERE AccountID = ? AND BookingDate BETWEEN ? AND ?
+        GROUP BY BookingDate, Amount, Purpose
+    ''', (account_id, rows[0].booking_date, rows[-1].booking_date))
+    existing_counts = Counter({(tx_date, amount, purpose): count for tx_date, amount, purpose, count in cursor.fetchall()})
+
+    # Höchste vergebene NMSC-Primanota kommt aus dem Wasserstand (BankAccounts.LastSequenceNo)
+    current_max_num = last_sequence_no
+
+    # 3. VERGLEICHEN: pro Schlüssel nur die fehlenden Exemplare einfügen
+    missing = {key: delivery_counts[key] - existing_counts[key] for key in delivery_counts}
+    inserts = []
+    partner_updates = set()
+
+    for tx_date, tx_amount_val, tx_applicant, tx_purpose, tx_curr, raw_primanota in rows:
+        if not raw_primanota:
+            continue
+
+        key = (tx_date, tx_amount_val, tx_purpose)
+        if missing[key] > 0:
+            missing[key] -= 1
+
+            # --- GOBD PRIMANOTA ENGINE (FIXED) ---
+            if raw_primanota in ['NMSC', '0000', '0']:
+                current_max_num += 1
+                primanota = f"NMSC-{current_max_num:06d}"
+            else:
+                primanota = raw_primanota
+
+            inserts.append((
+                generate_unique_id("TRAN"), account_id, primanota, tx_date,
+                tx_applicant, tx_amount_val, tx_curr, tx_purpose
+            ))
+        elif tx_applicant != 'Unbekannter Partner':
+            # Reines Scheduler-Duplikat: nur fehlenden Partnernamen nachtragen
+            partner_updates.add((tx_applicant, account_id, tx_date, tx_amount_val, tx_purpose))
+
+    if inserts:
+        cursor.executemany('''
+            INSERT OR IGNORE INTO BankTransactions (
+                TransactionID, AccountID, Primanota, BookingDate, PartnerName, Amount, Currency, Purpose
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', inserts)
+    inserted_tx_count = cursor.rowcount if inserts else 0
+
+    if partner_updates:
+        cursor.executemany('''
+            UPDATE BankTransactions
+            SET PartnerName = ?
+            WHERE AccountID = ? AND BookingDate = ? AND Amount = ? AND Purpose = ? AND PartnerName = 'Unbekannter Partner'
+        ''', sorted(partner_updates))
+
+    return inserted_tx_count, current_max_num, rows[-1].booking_date
+
+def sync_bank_balance(app, full=False, provider=None):
     """
-    Verbindet sich mit der ING, zieht Kontostand + Umsätze 
+    Verbindet sich mit der Bank, zieht Kontostand + Umsätze 
     und schreibt die Daten direkt in die SQLite-Datenbank.
+
+    full=False → Delta-Sync ab dem Wasserstand des Kontos (regulärer Scheduler-Tick)
+    full=True  → voller Abgleich der letzten RECONCILE_WINDOW_DAYS Tage (seltener Job)
+    provider   → BankProvider (Standard: get_bank_provider() laut BANK_PROVIDER in der .env)
     """
-    blz = os.getenv('BANK_BLZ', '50010517')
-    user = os.getenv('BANK_USER')
-    pin = os.getenv('BANK_PIN')
-    url = os.getenv('BANK_URL', 'https://fints.ing.de/fints/')
-    product_id = "6151256F3D4F9975B877BD4A2"
-
-    if not user or not pin:
-        logger.error("❌ FinTS-Sync abgebrochen: BANK_USER oder BANK_PIN fehlen in der .env!")
-        return False
+    with _sync_lock:
+        return _run_sync(full, provider)
 
-    logger.info("🚀 Starte automatischen FinTS-Sync und DB-Import mit UUID-Präfixen...")
-    
-    client = FinTS3PinTanClient(
-        bank_identifier=blz,
-        user_id=user,
-        customer_id=user,
-        pin=pin,
-        server=url,
-        product_id=product_id
-    )
-
-    conn = None
+def _run_sync(full, provider):
+    if provider is None:
+        try:
+            provider = get_bank_provider()
+        except ValueError as e:
+            logger.error(f"❌ Bank-Sync abgebrochen: {e}")
+            return False
+
+    logger.info(f"🚀 Starte automatischen Bank-Sync über {provider.bank_name} ({'voller Abgleich' if full else 'Delta'}) und DB-Import mit UUID-Präfixen...")
+
+    conn = cursor = None
     try:
         db_connect = os.getenv('DB_PATH')
         if not db_connect:
             logger.error("❌ DB-Fehler: DB_PATH ist nicht in der .env definiert!")
             return False
             
-        conn = sqlite3.connect(db_connect)
+        # Gepoolte Verbindung des Scheduler-/Worker-Threads (Autocommit, Profil wie der Shop)
+        # → Transaktion explizit öffnen, Verbindung am Ende NICHT schließen
+        conn = get_connection(db_connect)
         cursor = conn.cursor()
 
-        with client:
-            accounts = client.get_sepa_accounts()
-            
-            if client.init_tan_response:
-                logger.warning("🔒 [SCA erforderlich] Bitte Freigabe in der ING-App erteilen!")
+        with provider:
+            accounts = provider.get_accounts()
             
             target_index = 1  
             if len(accounts) <= target_index:
@@ -60,153 +156,106 @@ def sync_bank_balance(app):
             main_account = accounts[target_index]
             
             # --- 1. KONTOSTAND (SALDO) AUSLESEN ---
-            balance_data = client.get_balance(main_account)
-            amount = float(balance_data.amount.amount)
+            # Saldo und Umsätze werden außerhalb jeder Transaktion abgeholt: der FinTS-Dialog (ggf. inkl. SCA-Freigabe in der
+            # Bank-App) darf die Schreibsperre der DB nicht halten, sonst warten alle
+            # Schreibzugriffe des Shops (Bestellungen, Outbox, Leases) bis zum Busy-Timeout.
+            amount = provider.get_balance(main_account)
             iban = main_account.iban
             today_str = datetime.date.today().isoformat()
             local_now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-            cursor.execute('SELECT AccountID FROM BankAccounts WHERE IBAN = ?', (iban,))
+            # Wasserstand ohne Transaktion lesen (bestimmt nur das Abruffenster)
+            cursor.execute('SELECT LastBookingDate FROM BankAccounts WHERE IBAN = ?', (iban,))
             row = cursor.fetchone()
-            
-            if row:
-                account_id = row[0]
-                cursor.execute('''
-                    UPDATE BankAccounts 
-                    SET CurrentBalance = ?, LastSync = ? 
-                    WHERE AccountID = ?
-                ''', (amount, local_now, account_id))
-            else:
-                account_id = generate_unique_id("ACCO")
-                cursor.execute('''
-                    INSERT INTO BankAccounts (AccountID, IBAN, AccountName, BankName, CurrentBalance, LastSync)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (account_id, iban, "Girokonto", "ING", amount, local_now))
-
-            cursor.execute('''
-                SELECT HistoryID, Balance FROM BankBalanceHistories 
-                WHERE AccountID = ? AND Date = ?
-            ''', (account_id, today_str))
-            history_row = cursor.fetchone()
-            
-            if history_row:
-                existing_hist_id, existing_balance = history_row
-                if float(existing_balance) != amount:
-                    cursor.execute('''
-                        UPDATE BankBalanceHistories 
-                        SET Balance = ? 
-                        WHERE HistoryID = ?
-                    ''', (amount, existing_hist_id))
-                    logger.info(f"🔄 Kontostand-Historie für heute aktualisiert (neuer Saldo: {amount})")
-            else:
-                history_id = generate_unique_id("HIST")
-                cursor.execute('''
-                    INSERT INTO BankBalanceHistories (HistoryID, AccountID, Date, Balance)
-                    VALUES (?, ?, ?, ?)
-                ''', (history_id, account_id, today_str, amount))
-                logger.info(f"📁 Neuer Historie-Eintrag für heute angelegt ({history_id})")
-            
-            # --- 2. UMSÄTZE AUSLESEN ---
-            start_date = datetime.date.today() - datetime.timedelta(days=30)
+            last_booking_date = row[0] if row else None
+
+            # --- 2. UMSÄTZE AUSLESEN (Delta ab Wasserstand bzw. volles Fenster) ---
+            start_date = _sync_start_date(last_booking_date, full, datetime.date.today())
             
             try:
-                statements = client.get_transactions(main_account, start_date)
-                inserted_tx_count = 0
+                statements = provider.get_transactions(main_account, start_date)
                 
                 if not statements:
-                    logger.info("📊 Keine Umsätze im angegebenen Zeitraum gefunden.")
-                    conn.commit()
-                    return True
-
-                # CRITICAL GOBD-FIX: Sortiere den API-Stream chronologisch nach Datum vor!
-                # Das stellt sicher, dass die Sequenz-Nummern (NMSC-xxxxxx) immer in der korrekten 
-                # zeitlichen Reihenfolge vergeben werden.
-                statements.sort(key=lambda x: x.data.get('date') if x.data.get('date') else datetime.date.min)
+                    logger.info(f"📊 Keine Umsätze seit {start_date.isoformat()} gefunden.")
 
-                # Cache zur Ermittlung der höchsten Primanota im aktuellen Lauf (Vermeidet DB-Abfrage-Kollision)
+                # --- 3. SCHREIBEN: Saldo, Historie, Umsätze, Wasserstand → EINE kurze Transaktion ---
+                cursor.execute("BEGIN IMMEDIATE")
+                # Unter der Sperre neu lesen: LastSequenceNo muss zu den neuen Primanota passen
                 cursor.execute('''
-                    SELECT Primanota FROM BankTransactions 
-                    WHERE AccountID = ? AND Primanota LIKE 'NMSC-%'
-                    ORDER BY CAST(SUBSTR(Primanota, 6) AS INTEGER) DESC LIMIT 1
-                ''', (account_id,))
-                last_primanota_row = cursor.fetchone()
-                current_max_num = int(last_primanota_row[0].split('-')[1]) if last_primanota_row else 0
-
-                for tx in statements:
-                    tx_date = tx.data.get('date')
-                    tx_date = tx_date.isoformat() if isinstance(tx_date, datetime.date) else (str(tx_date) if tx_date else today_str)
-                    
-                    amt_obj = tx.data.get('amount')
-                    tx_amount_val = float(amt_obj.amount) if amt_obj and hasattr(amt_obj, 'amount') else 0.0
-                    
-                    tx_applicant = tx.data.get('applicant_name', 'Unbekannter Partner')
-                    tx_purpose = tx.data.get('purpose')
-                    tx_purpose = str(tx_purpose) if tx_purpose else 'Kein Verwendungszweck'
-                    tx_curr = getattr(amt_obj, 'currency', 'EUR')
-                    
-                    raw_primanota = tx.data.get('primanota') or tx.data.get('id')
-                    if not raw_primanota:
-                        continue 
-
-                    # 1. ZÄHLEN: Wie viele identische Buchungen existieren bereits in der DB?
+                    SELECT AccountID, LastSequenceNo FROM BankAccounts WHERE IBAN = ?
+                ''', (iban,))
+                row = cursor.fetchone()
+
+                if row:
+                    account_id, last_sequence_no = row
                     cursor.execute('''
-                        SELECT COUNT(*) FROM BankTransactions 
-                        WHERE AccountID = ? AND BookingDate = ? AND Amount = ? AND Purpose = ?
-                    ''', (account_id, tx_date, tx_amount_val, tx_purpose))
-                    existing_count = cursor.fetchone()[0]
-
-                    # 2. ZÄHLEN: Wie oft kommt dieser Umsatz in der aktuellen API-Lieferung vor?
-                    current_delivery_count = sum(
-                        1 for match in statements
-                        if (match.data.get('date').isoformat() if isinstance(match.data.get('date'), datetime.date) else str(match.data.get('date'))) == tx_date
-                        and float(match.data.get('amount').amount) == tx_amount_val
-                        and (str(match.data.get('purpose')) if match.data.get('purpose') else 'Kein Verwendungszweck') == tx_purpose
-                    )
-
-                    # 3. VERGLEICHEN: Nur einfügen, wenn physisch neu
-                    if existing_count < current_delivery_count:
-                        
-                        # --- GOBD PRIMANOTA ENGINE (FIXED) ---
-                        if raw_primanota in ['NMSC', '0000', '0']:
-                            current_max_num += 1
-                            primanota = f"NMSC-{current_max_num:06d}"
-                        else:
-                            primanota = raw_primanota
-
-                        tx_id = generate_unique_id("TRAN")
-                        
+                        UPDATE BankAccounts 
+                        SET CurrentBalance = ?, LastSync = ? 
+                        WHERE AccountID = ?
+                    ''', (amount, local_now, account_id))
+                else:
+                    account_id, last_sequence_no = generate_unique_id("ACCO"), 0
+                    cursor.execute('''
+                        INSERT INTO BankAccounts (AccountID, IBAN, AccountName, BankName, CurrentBalance, LastSync)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (account_id, iban, "Girokonto", provider.bank_name, amount, local_now))
+
+                cursor.execute('''
+                    SELECT HistoryID, Balance FROM BankBalanceHistories 
+                    WHERE AccountID = ? AND Date = ?
+                ''', (account_id, today_str))
+                history_row = cursor.fetchone()
+                
+                if history_row:
+                    existing_hist_id, existing_balance = history_row
+                    if float(existing_balance) != amount:
                         cursor.execute('''
-                            INSERT OR IGNORE INTO BankTransactions (
-                                TransactionID, AccountID, Primanota, BookingDate, PartnerName, Amount, Currency, Purpose
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (tx_id, account_id, primanota, tx_date, tx_applicant, tx_amount_val, tx_curr, tx_purpose))
-                        
-                        if cursor.rowcount > 0:
-                            inserted_tx_count += 1
-                    else:
-                        # Reines Scheduler-Duplikat
-                        if tx_applicant != 'Unbekannter Partner':
-                            cursor.execute('''
-                                UPDATE BankTransactions
-                                SET PartnerName = ?
-                                WHERE AccountID = ? AND BookingDate = ? AND Amount = ? AND Purpose = ? AND PartnerName = 'Unbekannter Partner'
-                            ''', (tx_applicant, account_id, tx_date, tx_amount_val, tx_purpose))
+                            UPDATE BankBalanceHistories 
+                            SET Balance = ? 
+                            WHERE HistoryID = ?
+                        ''', (amount, existing_hist_id))
+                        logger.info(f"🔄 Kontostand-Historie für heute aktualisiert (neuer Saldo: {amount})")
+                else:
+                    history_id = generate_unique_id("HIST")
+                    cursor.execute('''
+                        INSERT INTO BankBalanceHistories (HistoryID, AccountID, Date, Balance)
+                        VALUES (?, ?, ?, ?)
+                    ''', (history_id, account_id, today_str, amount))
+                    logger.info(f"📁 Neuer Historie-Eintrag für heute angelegt ({history_id})")
+
+                inserted_tx_count, last_sequence_no, newest_booking = _store_transactions(
+                    cursor, account_id, statements, last_sequence_no
+                )
+
+                # --- 4. WASSERSTAND FORTSCHREIBEN (gleiche Transaktion wie die Umsätze) ---
+                cursor.execute('''
+                    UPDATE BankAccounts
+                    SET LastBookingDate = NULLIF(max(COALESCE(LastBookingDate, ''), COALESCE(?, '')), ''),
+                        LastSequenceNo = ?,
+                        LastFullSync = CASE WHEN ? THEN ? ELSE LastFullSync END
+                    WHERE AccountID = ?
+                ''', (newest_booking, last_sequence_no, full, local_now, account_id))
 
                 # PERFORMANCE-FIX: Nur ein einziges Commit für alle Änderungen am Ende des gesamten Syncs!
                 conn.commit()
-                logger.info(f"📊 Umsatz-Sync beendet. {inserted_tx_count} neue Transaktionen in DB gespeichert.")
+                logger.info(
+                    f"📊 Umsatz-Sync beendet ({len(statements)} Umsätze ab {start_date.isoformat()} geprüft). "
+                    f"{inserted_tx_count} neue Transaktionen in DB gespeichert."
+                )
                 return True
                 
             except Exception as tx_err:
-                if conn: conn.rollback()
+                if conn.in_transaction: conn.rollback()
                 logger.error(f"⚠️ Umsätze konnten nicht ausgelesen/gespeichert werden: {str(tx_err)}")
                 return False
 
     except Exception as e:
-        if conn: conn.rollback()
-        logger.error(f"🔴 FinTS-Sync fehlgeschlagen: {str(e)}")
+        logger.error(f"🔴 Bank-Sync fehlgeschlagen: {str(e)}")
         return False
         
     finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+        # Frühe Returns (z.B. fehlender Konto-Index) lassen keine offene Transaktion zurück
+        if cursor is not None:
+            cursor.close()
+        if conn is not None and conn.in_transaction:
+            conn.rollback()
\ No newline at end of file
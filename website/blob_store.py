@@ -0,0 +1,90 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# =================================================================
+# BLOB-STORE: inhaltsadressierte Ablage der hochgeladenen Dateien
+# =================================================================
+# Jede Datei liegt genau einmal unter ihrem SHA-256 im Upload-Ordner:
+#     <UPLOAD_DIR_PATH>/blobs/ab/cd/abcd…ef   (zwei Ebenen à 2 Hex-Zeichen → max. 65536 Ordner)
+# Files.FilePath zeigt relativ darauf, mehrere Files-Zeilen (gleiche Datei in Chat und
+# neuem Projekt, erneuter Upload) teilen sich einen Blob. Referenzzähler ist die Files-
+# Tabelle selbst: ein Blob wird erst gelöscht, wenn keine Zeile mehr auf ihn zeigt.
+#
+# Blobs werden nie verändert, nur angelegt oder gelöscht → inkrementelle Backups
+# (rsync, restic, ...) übertragen jede Datei genau einmal.
+#
+# Ältere Einträge (FilePath = FILE_<uuid>.<ext>) bleiben gültig und werden wie bisher
+# pro FileID gelöscht.
+
+BLOB_DIR = 'blobs'
+_DELETING_SUFFIX = '.deleting'
+
+
+def blob_relpath(sha256: str) -> str:
+    """Relativer Pfad (für Files.FilePath) eines Blobs."""
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def is_blob_path(rel_path: str) -> bool:
+    return bool(rel_path) and rel_path.startswith(f"{BLOB_DIR}/")
+
+
+def store(upload, root: str):
+    """
+    Legt eine fertig empfangene Datei (uploads.StreamingUpload) im Store ab.
+    Existiert der Blob schon (gleicher Inhalt), wird der Upload nur verworfen.
+    Muss innerhalb der Schreibtransaktion laufen, die auch die Files-Zeile anlegt
+    (siehe ProjectManager._save_files_and_metadata), sonst kann ein paralleles
+    delete_project den Blob zwischen Prüfung und INSERT entfernen.
+
+    Returns:
+        (relativer Pfad, True wenn dedupliziert)
+    """
+    rel_path = blob_relpath(upload.sha256)
+    target = os.path.join(root, rel_path)
+
+    # Gleiche Größe = vorhandener Blob ist vollständig; sonst (abgebrochener Altbestand) ersetzen
+    if os.path.exists(target) and os.path.getsize(target) == upload.size:
+        upload.discard()
+        return rel_path, True
+
+    upload.finalize(target)
+    return rel_path, False
+
+
+def mark_for_deletion(root: str, rel_paths) -> list:
+    """
+    Benennt verwaiste Dateien vor dem COMMIT um (rückgängig machbar per restore()).
+    Returns: Liste (Originalpfad, umbenannter Pfad) der tatsächlich vorhandenen Dateien.
+    """
+    marked = []
+    try:
+        for rel_path in rel_paths:
+            path = os.path.join(root, rel_path)
+            if os.path.exists(path):
+                os.replace(path, path + _DELETING_SUFFIX)
+                marked.append((path, path + _DELETING_SUFFIX))
+    except OSError:
+        restore(marked)
+        raise
+    return marked
+
+
+def restore(marked):
+    """Rollback: umbenannte Dateien wieder an ihren Platz legen."""
+    for path, marked_path in marked:
+        os.replace(marked_path, path)
+
+
+def purge(marked) -> int:
+    """Nach dem COMMIT: umbenannte Dateien endgültig löschen. Returns: Anzahl gelöschter Dateien."""
+    removed = 0
+    for path, marked_path in marked:
+        try:
+            os.remove(marked_path)
+            removed += 1
+        except OSError as e:
+            logger.warning(f"⚠️ Datei {path} konnte nicht gelöscht werden: {e}")
+    return removed
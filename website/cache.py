@@ -0,0 +1,57 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Kleiner threadsicherer In-Process-Cache mit Ablaufzeit (TTL) und LRU-Verdrängung.
+    Gedacht für kurzlebige, teure Leseergebnisse (Facetten, Benutzerstatus, ...).
+    Jeder Prozess (Gunicorn-Worker) hat seinen eigenen Cache → TTL kurz halten.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=256, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key → (expires_at, value), älteste zuerst
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Liefert den Wert oder default, wenn nicht vorhanden bzw. abgelaufen."""
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)  # zuletzt benutzt → hinten
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Speichert einen Wert; verdrängt bei Überlauf den am längsten ungenutzten Eintrag."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """Entfernt einen einzelnen Eintrag (gezielte Invalidierung)."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Leert den kompletten Cache."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -1,8 +1,9 @@
 import os
 import sqlite3
 from typing import Tuple, Dict
+from .database import DatabaseManager
 
-class CalculationManager:
+class CalculationManager(DatabaseManager):
     """
     Verantwortlich für die gesamte Preisberechnungslogik,
     basierend auf Slicing-Daten und DB-Konstanten.
@@ -19,7 +20,7 @@ class CalculationManager:
 
     def __init__(self):
 
-        self.db_path = os.getenv('DB_PATH')
+        super().__init__()
 
         # Sicherstellen, dass die Datenbank existiert
         if not os.path.exists(self.db_path):
@@ -30,23 +31,18 @@ class CalculationManager:
         Führt eine SQL-Abfrage aus und gibt die Ergebnisse als sqlite3.Row-Objekte zurück.
         Stellt die Typsicherheit und den Schutz vor SQL Injection sicher.
         """
-        conn = None
+        cursor = self._get_connection().cursor()  # gepoolte Verbindung, row_factory = sqlite3.Row
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Zugriff auf Spaltennamen
-            cursor = conn.cursor()
             cursor.execute(query, params)
             if query.strip().upper().startswith("SELECT"):
                 return cursor.fetchall()
             else:
-                conn.commit()
                 return []
         except sqlite3.Error as e:
             print(f"Datenbankfehler im CalculationManager: {e}")
             raise RuntimeError(f"Datenbankfehler: {e}")
         finally:
-            if conn:
-                conn.close()
+            cursor.close()
 
     def get_constants(self, profile_id: int, material_name: str) -> Dict[str, float]:
         """
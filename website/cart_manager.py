@@ -1,84 +1,12 @@
-import os
 import uuid
-import sqlite3
+from .database import DatabaseManager
 
 # Annahme: DB_PATH ist global verfügbar oder hier definiert
 # TODO: alle  INSERTs in eine Transaktion packen (multi_queries=True), aktuell noch  separate _execute_query → Race-Condition möglich
 
-class CartManager:
+class CartManager(DatabaseManager):
     """Verwaltet Datenbankoperationen für den Warenkorb (Shopping Cart)."""
-    
-    def __init__(self):
-        self.db_path = os.getenv('DB_PATH')
-        
 
-    def _execute_query(
-        self,
-        query,
-        params=(),
-        fetch=False,
-        get_lastrowid=False,
-        fetch_one=False,
-        multi_queries=False
-    ):
-        """
-        Erweiterte DB-Execution mit Unterstützung für mehrere Queries in einer Transaktion.
-    
-        Args:
-            query: 
-                - str → einzelner SQL-String
-                - list of (query_str, params_tuple) → mehrere Queries (nur bei multi_queries=True)
-            params: Parameter für einzelne Query (tuple)
-            fetch: Soll ein Resultset zurückgegeben werden? (SELECT)
-            get_lastrowid: Soll cursor.lastrowid zurückgegeben werden? (INSERT)
-            fetch_one: fetchone() statt fetchall()
-            multi_queries: True → query ist Liste von (query, params)-Tuplen
-    
-        Returns:
-            - Bei fetch: sqlite3.Row oder Liste von sqlite3.Row
-            - Bei get_lastrowid: int (lastrowid)
-            - Sonst: None
-            - Bei Fehler: wirft sqlite3.Error
-        """
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            # ── Wichtig: row_factory für dict-ähnlichen Zugriff ──
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-    
-            if multi_queries and isinstance(query, list):
-                # Mehrere Queries → Transaktion
-                cursor.execute("BEGIN TRANSACTION")
-                for q, p in query:
-                    cursor.execute(q, p)
-                conn.commit()
-            else:
-                # Einzelne Query
-                cursor.execute(query, params)
-                conn.commit()
-    
-            # Ergebnis abholen (nur bei SELECT relevant)
-            if fetch:
-                if fetch_one:
-                    return cursor.fetchone()           # → sqlite3.Row oder None
-                return cursor.fetchall()               # → Liste von sqlite3.Row
-    
-            # Letzte eingefügte ID (für INSERT)
-            if get_lastrowid:
-                return cursor.lastrowid
-    
-            # Standard-Rückgabe (UPDATE, DELETE, INSERT ohne ID-Interesse)
-            return None
-    
-        except sqlite3.Error as e:
-            if conn:
-                conn.rollback()
-            raise  # Fehler weiterwerfen – aufrufende Methode kann loggen/flashen
-        
-        finally:
-            if conn:
-                conn.close()
 
     def get_cart_items_for_user(self, user_id):
         """
@@ -90,13 +18,8 @@ class CartManager:
             FROM ShoppingCarts sc
             JOIN CartPositions cp ON sc.CartID = cp.CartID
             JOIN Products p ON cp.ProductID = p.ProductID
-            JOIN ProductPrices pp ON p.ProductID = pp.ProductID
+            JOIN CurrentProductPrices pp ON p.ProductID = pp.ProductID
             WHERE sc.UserID = ?
-            AND pp.DateAdded = (
-                SELECT MAX(DateAdded) 
-                FROM ProductPrices 
-                WHERE ProductID = pp.ProductID
-            )
         """
         # Die ursprüngliche, nicht standardisierte Abfrage wurde direkt übernommen.
         return self._execute_query(query, (user_id,), fetch=True)
@@ -106,9 +29,8 @@ class CartManager:
         query = """
             SELECT pp.ProductPrice, p.StockQuantity 
             FROM Products p
-            JOIN ProductPrices pp ON p.ProductID = pp.ProductID
+            JOIN CurrentProductPrices pp ON p.ProductID = pp.ProductID
             WHERE p.ProductID = ?
-            ORDER BY pp.DateAdded DESC LIMIT 1
         """
         return self._execute_query(query, (product_id,), fetch=True, fetch_one=True)
 
@@ -190,9 +112,8 @@ class CartManager:
         query_prod = """
             SELECT p.ProductName, p.ImagePath, pp.ProductPrice
             FROM Products p
-            JOIN ProductPrices pp ON p.ProductID = pp.ProductID
+            JOIN CurrentProductPrices pp ON p.ProductID = pp.ProductID
             WHERE p.ProductID = ?
-            ORDER BY pp.DateAdded DESC LIMIT 1
         """
         product = self._execute_query(query_prod, (product_id,), fetch=True, fetch_one=True)
         
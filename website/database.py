@@ -0,0 +1,280 @@
+import os
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Standard-Profil der Datenbank. Überschreibbar über app.config bzw. .env
+# (Schlüssel jeweils mit Präfix DB_, z.B. DB_JOURNAL_MODE, DB_BUSY_TIMEOUT).
+DEFAULT_DB_PROFILE = {
+    'journal_mode': 'WAL',     # Leser blockieren Schreiber nicht mehr (und umgekehrt)
+    'synchronous': 'NORMAL',   # im WAL-Modus sicher, fsync nur beim Checkpoint
+    'busy_timeout': 5000,      # ms warten statt sofort "database is locked"
+    'cache_size': -16000,      # negativ = KiB → ca. 16 MB Page-Cache pro Verbindung
+    'mmap_size': 268435456,    # 256 MB Memory-Mapped I/O für Lesezugriffe
+    'temp_store': 'MEMORY',    # Sortierungen / temporäre Indizes im RAM
+}
+
+# Erlaubte Werte der Text-PRAGMAs (die Werte landen per f-String im SQL!)
+_PRAGMA_CHOICES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+
+# journal_mode wird in der Datenbankdatei gespeichert → einmal beim Start setzen
+DATABASE_PRAGMAS = ('journal_mode',)
+
+# PRAGMAs, die genau einmal pro neu geöffneter Verbindung gesetzt werden.
+# Wird von init_app() mit dem konfigurierten Profil überschrieben.
+CONNECTION_PRAGMAS = {
+    key: value for key, value in DEFAULT_DB_PROFILE.items()
+    if key not in DATABASE_PRAGMAS
+}
+
+# Verbindungs-Pool: eine Verbindung pro Thread und Datenbankpfad.
+# sqlite3-Verbindungen dürfen nicht zwischen Threads geteilt werden,
+# innerhalb eines Threads (= eines Requests / Scheduler-Jobs) aber beliebig oft.
+_local = threading.local()
+
+
+def _open_connection(db_path):
+    """Öffnet eine neue Verbindung und wendet die Verbindungs-PRAGMAs an."""
+    # isolation_level=None → Autocommit: jede Einzel-Query ist ihre eigene Transaktion,
+    # Multi-Queries öffnen ihre Transaktion explizit mit BEGIN.
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    # ── Wichtig: row_factory für dict-ähnlichen Zugriff ──
+    conn.row_factory = sqlite3.Row
+    apply_connection_pragmas(conn)
+    return conn
+
+
+def apply_connection_pragmas(conn):
+    """Setzt die Verbindungs-PRAGMAs (auch für Verbindungen außerhalb des Pools)."""
+    for pragma, value in CONNECTION_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+def get_connection(db_path=None):
+    """
+    Liefert die gepoolte Verbindung des aktuellen Threads für db_path.
+    Die Verbindung wird beim ersten Zugriff geöffnet und danach wiederverwendet.
+    Aufrufer dürfen die Verbindung NICHT schließen.
+    """
+    db_path = db_path or os.getenv('DB_PATH')
+    if not db_path:
+        raise RuntimeError("DB_PATH-Umgebungsvariable ist nicht gesetzt!")
+
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = _open_connection(db_path)
+        connections[db_path] = conn
+
+    return conn
+
+
+def release_connections(exception=None):
+    """
+    Request-Teardown: rollt liegen gebliebene Transaktionen zurück,
+    damit die nächste Nutzung der Thread-Verbindung sauber startet.
+    """
+    for conn in getattr(_local, 'connections', {}).values():
+        if conn.in_transaction:
+            logger.warning("Offene DB-Transaktion am Request-Ende zurückgerollt.")
+            conn.rollback()
+
+
+def close_connections():
+    """Schließt alle Verbindungen des aktuellen Threads (z.B. am Ende eines Worker-Threads)."""
+    connections = getattr(_local, 'connections', {})
+    for conn in connections.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    connections.clear()
+
+
+def build_profile(config):
+    """
+    Baut das DB-Profil aus der App-Konfiguration (DB_JOURNAL_MODE, DB_SYNCHRONOUS, ...).
+    Fehlende Schlüssel fallen auf DEFAULT_DB_PROFILE zurück.
+    Wirft ValueError bei ungültigen Werten.
+    """
+    profile = {}
+    for pragma, default in DEFAULT_DB_PROFILE.items():
+        value = config.get(f'DB_{pragma.upper()}', default)
+        if value is None or value == '':
+            value = default
+
+        if pragma in _PRAGMA_CHOICES:
+            value = str(value).upper()
+            if value not in _PRAGMA_CHOICES[pragma]:
+                raise ValueError(f"Ungültiger Wert für PRAGMA {pragma}: {value}")
+        else:
+            value = int(value)
+
+        profile[pragma] = value
+    return profile
+
+
+def apply_database_profile(profile, db_path=None):
+    """
+    Setzt die datenbankweiten PRAGMAs (journal_mode) einmalig beim Start
+    und gibt den tatsächlich aktiven journal_mode zurück.
+    """
+    db_path = db_path or os.getenv('DB_PATH')
+    if not db_path:
+        raise RuntimeError("DB_PATH-Umgebungsvariable ist nicht gesetzt!")
+
+    # Eigene Kurzzeit-Verbindung: der Wechsel auf WAL braucht kurz exklusiven Zugriff
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=profile['busy_timeout'] / 1000)
+    try:
+        return conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def get_active_settings(db_path=None):
+    """Liest die tatsächlich aktiven PRAGMA-Werte der gepoolten Verbindung aus (für /health)."""
+    conn = get_connection(db_path)
+    settings = {}
+    for pragma in DEFAULT_DB_PROFILE:
+        settings[pragma] = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+
+    # synchronous / temp_store liefert SQLite als Zahl → lesbaren Namen zurückgeben
+    settings['synchronous'] = _PRAGMA_CHOICES['synchronous'][settings['synchronous']]
+    settings['temp_store'] = _PRAGMA_CHOICES['temp_store'][settings['temp_store']]
+    return settings
+
+
+def init_app(app):
+    """
+    Wendet das DB-Profil aus app.config an und registriert
+    den Teardown-Hook des Pools an der Flask-App.
+    """
+    profile = build_profile(app.config)
+    app.config['DB_PROFILE'] = profile
+
+    CONNECTION_PRAGMAS.clear()
+    CONNECTION_PRAGMAS.update(
+        {key: value for key, value in profile.items() if key not in DATABASE_PRAGMAS}
+    )
+
+    # Bereits geöffnete Verbindungen dieses Threads mit altem Profil verwerfen
+    close_connections()
+
+    try:
+        journal_mode = apply_database_profile(profile)
+        if journal_mode.upper() != profile['journal_mode']:
+            logger.warning(f"journal_mode={profile['journal_mode']} angefordert, aktiv ist '{journal_mode}'.")
+        else:
+            logger.info(f"🗄️ DB-Profil aktiv: {profile}")
+    except (sqlite3.Error, RuntimeError) as e:
+        logger.error(f"❌ DB-Profil konnte nicht angewendet werden: {e}")
+
+    app.teardown_appcontext(release_connections)
+
+
+def execute_query(
+    query,
+    params=(),
+    fetch=False,
+    get_lastrowid=False,
+    fetch_one=False,
+    multi_queries=False,
+    db_path=None
+):
+    """
+    Erweiterte DB-Execution mit Unterstützung für mehrere Queries in einer Transaktion.
+
+    Args:
+        query:
+            - str → einzelner SQL-String
+            - list of (query_str, params_tuple) → mehrere Queries (nur bei multi_queries=True)
+        params: Parameter für einzelne Query (tuple)
+        fetch: Soll ein Resultset zurückgegeben werden? (SELECT)
+        get_lastrowid: Soll cursor.lastrowid zurückgegeben werden? (INSERT)
+        fetch_one: fetchone() statt fetchall()
+        multi_queries: True → query ist Liste von (query, params)-Tuplen
+        db_path: Pfad zur Datenbank (Standard: DB_PATH aus der .env)
+
+    Returns:
+        - Bei fetch: sqlite3.Row oder Liste von sqlite3.Row
+        - Bei get_lastrowid: int (lastrowid)
+        - Sonst: None
+        - Bei Fehler: wirft sqlite3.Error
+    """
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    try:
+        if multi_queries and isinstance(query, list):
+            # Mehrere Queries → Transaktion
+            cursor.execute("BEGIN TRANSACTION")
+            for q, p in query:
+                cursor.execute(q, p)
+            conn.commit()
+        else:
+            # Einzelne Query (Autocommit)
+            cursor.execute(query, params)
+
+        # Ergebnis abholen (nur bei SELECT relevant)
+        if fetch:
+            if fetch_one:
+                return cursor.fetchone()           # → sqlite3.Row oder None
+            return cursor.fetchall()               # → Liste von sqlite3.Row
+
+        # Letzte eingefügte ID (für INSERT)
+        if get_lastrowid:
+            return cursor.lastrowid
+
+        # Standard-Rückgabe (UPDATE, DELETE, INSERT ohne ID-Interesse)
+        return None
+
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.rollback()
+        raise  # Fehler weiterwerfen – aufrufende Methode kann loggen/flashen
+
+    finally:
+        # Statement zurücksetzen, damit keine Lesesperre an der gepoolten Verbindung hängen bleibt
+        cursor.close()
+
+
+class DatabaseManager:
+    """
+    Gemeinsame Basisklasse aller Manager: kapselt den DB-Pfad und den
+    Zugriff auf die gepoolte Thread-Verbindung.
+    """
+
+    def __init__(self):
+        self.db_path = os.getenv('DB_PATH')
+
+    def _get_connection(self):
+        """Gepoolte Verbindung des aktuellen Threads (nicht schließen!)."""
+        return get_connection(self.db_path)
+
+    def _execute_query(
+        self,
+        query,
+        params=(),
+        fetch=False,
+        get_lastrowid=False,
+        fetch_one=False,
+        multi_queries=False
+    ):
+        """Siehe execute_query() – gleiche Semantik, DB-Pfad des Managers."""
+        return execute_query(
+            query,
+            params,
+            fetch=fetch,
+            get_lastrowid=get_lastrowid,
+            fetch_one=fetch_one,
+            multi_queries=multi_queries,
+            db_path=self.db_path
+        )
@@ -0,0 +1,89 @@
+import json
+import time
+import threading
+from collections import deque
+
+# =================================================================
+# EVENT-BUS: Live-Ereignisse für das Produktions-Board (Server-Sent Events)
+# =================================================================
+# Die Manager melden nach erfolgreichem COMMIT kleine Ereignisse ('queue', 'jobs'),
+# /admin/events streamt sie an alle offenen Admin-Tabs. Ein publish() ist genau ein
+# Eintrag im Ringpuffer + ein notify_all – egal wie viele Tabs zuhören; jeder
+# Abonnent liest selbst ab seiner letzten Sequenznummer weiter.
+#
+# Der Bus lebt im Prozess: Bei mehreren Gunicorn-Workern (oder website.worker) sieht
+# ein Tab nur Ereignisse seines Workers. Das Board pollt deshalb zusätzlich selten
+# per ETag (siehe /admin/get_printers) als Sicherheitsnetz.
+
+EVENT_BUFFER_SIZE = 256       # so viele Ereignisse kann ein Tab per Last-Event-ID nachholen
+HEARTBEAT_SECONDS = 15.0      # Kommentarzeile gegen Proxy-Timeouts
+STREAM_MAX_SECONDS = 300.0    # danach Verbindung beenden → EventSource verbindet neu
+
+
+class EventBus:
+    """Threadsicherer Ringpuffer mit fortlaufender Sequenznummer und Condition zum Aufwecken."""
+
+    def __init__(self, maxlen=EVENT_BUFFER_SIZE):
+        self._events = deque(maxlen=maxlen)   # (seq, event, data), älteste zuerst
+        self._seq = 0
+        self._condition = threading.Condition()
+
+    @property
+    def last_id(self) -> int:
+        with self._condition:
+            return self._seq
+
+    def publish(self, event: str, **data) -> int:
+        """Hängt ein Ereignis an und weckt alle wartenden Streams. Gibt die Sequenznummer zurück."""
+        with self._condition:
+            self._seq += 1
+            self._events.append((self._seq, event, data))
+            self._condition.notify_all()
+            return self._seq
+
+    def events_since(self, last_id: int, timeout: float = None) -> list:
+        """
+        Alle Ereignisse mit seq > last_id; wartet bis zu timeout Sekunden, falls keine da sind.
+        Ist last_id älter als der Puffer, kommt nur ein 'resync' (Client lädt komplett neu).
+        """
+        with self._condition:
+            if self._seq <= last_id:
+                self._condition.wait(timeout)
+
+            if not self._events or self._seq <= last_id:
+                return []
+
+            # Lücke: ältere Ereignisse sind schon aus dem Puffer gefallen
+            if last_id < self._events[0][0] - 1:
+                return [(self._seq, 'resync', {})]
+            return [e for e in self._events if e[0] > last_id]
+
+    def stream(self, last_id: int = None, heartbeat: float = HEARTBEAT_SECONDS,
+               max_seconds: float = STREAM_MAX_SECONDS):
+        """
+        Generator im text/event-stream-Format. Ohne last_id beginnt der Stream beim
+        aktuellen Stand (neue Tabs laden den Ist-Zustand ohnehin per Fetch).
+        """
+        if last_id is None or last_id > self.last_id:
+            last_id = self.last_id
+        deadline = time.monotonic() + max_seconds
+
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            events = self.events_since(last_id, timeout=heartbeat)
+            if not events:
+                yield ": ping\n\n"
+                continue
+
+            for seq, event, data in events:
+                yield f"id: {seq}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+                last_id = seq
+
+
+# Prozessweiter Bus für Produktions-Ereignisse
+production_events = EventBus()
+
+
+def publish(event: str, **data) -> int:
+    """Kurzform für production_events.publish (von den Managern nach dem COMMIT aufgerufen)."""
+    return production_events.publish(event, **data)
@@ -0,0 +1,127 @@
+import os
+import time
+import uuid
+import socket
+import logging
+from datetime import datetime, timedelta
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# =================================================================
+# JOB-LEASES: prozessübergreifende Sperre für Hintergrundjobs
+# =================================================================
+# Jeder Lauf versucht, die Lease seines Jobs in JobLeases zu übernehmen (ein
+# atomares UPSERT). Nur wer sie bekommt, führt den Job aus – egal wie viele
+# Web-Worker oder `python -m website.worker`-Prozesse laufen. Stürzt ein Prozess
+# ab, läuft die Lease nach ttl Sekunden aus und ein anderer darf übernehmen.
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _now():
+    return datetime.now().strftime(_TIME_FORMAT)
+
+
+def _in_seconds(seconds):
+    return (datetime.now() + timedelta(seconds=seconds)).strftime(_TIME_FORMAT)
+
+
+class JobLeaseManager(DatabaseManager):
+    """Datenbankoperationen der Job-Leases (Tabelle JobLeases) inkl. Laufstatus."""
+
+    def _new_owner(self):
+        """Eindeutige Kennung EINES Laufs (Host, Prozess, Zufall)."""
+        return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self, job_name, ttl_seconds):
+        """
+        Versucht, die Lease für job_name zu übernehmen.
+
+        Returns:
+            Owner-Kennung bei Erfolg, sonst None (Lease wird gerade woanders gehalten).
+        """
+        owner = self._new_owner()
+        now = _now()
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            # Neu anlegen oder nur übernehmen, wenn die bestehende Lease abgelaufen ist
+            cursor.execute(
+                """
+                INSERT INTO JobLeases (JobName, Owner, LeaseUntil, LastStartedAt)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (JobName) DO UPDATE SET
+                    Owner = excluded.Owner,
+                    LeaseUntil = excluded.LeaseUntil,
+                    LastStartedAt = excluded.LastStartedAt
+                WHERE JobLeases.LeaseUntil < ?
+                """,
+                (job_name, owner, _in_seconds(ttl_seconds), now, now)
+            )
+            return owner if cursor.rowcount == 1 else None
+        finally:
+            cursor.close()
+
+    def release(self, job_name, owner, status, duration_ms, error=None):
+        """Gibt die Lease frei und speichert den Status des beendeten Laufs."""
+        self._execute_query(
+            """
+            UPDATE JobLeases
+            SET Owner = NULL, LeaseUntil = '', LastFinishedAt = ?, LastDurationMs = ?,
+                LastStatus = ?, LastError = ?, RunCount = RunCount + 1
+            WHERE JobName = ? AND Owner = ?
+            """,
+            (_now(), duration_ms, status, error, job_name, owner)
+        )
+
+    def run_exclusive(self, job_name, func, ttl_seconds):
+        """
+        Führt func() nur aus, wenn die Lease für job_name übernommen werden konnte.
+        Ein Rückgabewert False gilt als FAILED, eine Exception als ERROR.
+
+        Returns:
+            Rückgabewert von func() oder None, wenn der Job woanders läuft.
+        """
+        owner = self.acquire(job_name, ttl_seconds)
+        if owner is None:
+            logger.info(f"⏭️ Job '{job_name}' läuft bereits in einem anderen Prozess – übersprungen.")
+            return None
+
+        started = time.perf_counter()
+        status, error, result = 'OK', None, None
+        try:
+            result = func()
+            if result is False:
+                status = 'FAILED'
+            return result
+        except Exception as e:
+            status, error = 'ERROR', str(e)
+            logger.error(f"❌ Job '{job_name}' abgebrochen: {e}")
+            return None
+        finally:
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            try:
+                self.release(job_name, owner, status, duration_ms, error)
+            except Exception as e:
+                # Lease läuft dann spätestens nach ttl_seconds von selbst aus
+                logger.error(f"❌ Lease für Job '{job_name}' konnte nicht freigegeben werden: {e}")
+
+    def get_job_statuses(self):
+        """Status aller Jobs für Admin-Metriken / `python -m website.worker --status`."""
+        rows = self._execute_query(
+            """
+            SELECT JobName, Owner, LeaseUntil, LastStartedAt, LastFinishedAt,
+                   LastDurationMs, LastStatus, LastError, RunCount
+            FROM JobLeases
+            ORDER BY JobName
+            """,
+            fetch=True
+        )
+        now = _now()
+        statuses = []
+        for row in rows:
+            status = dict(row)
+            status['Running'] = bool(row['Owner']) and row['LeaseUntil'] >= now
+            statuses.append(status)
+        return statuses
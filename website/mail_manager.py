@@ -0,0 +1,324 @@
+import os
+import ssl
+import uuid
+import time
+import logging
+import smtplib
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# =================================================================
+# MAIL-OUTBOX: Request-Handler schreiben nur in die Tabelle MailOutbox,
+# der Hintergrund-Sender (MailSender.run_once, Scheduler-Job) verschickt.
+# =================================================================
+# Status-Lebenszyklus: PENDING → SENDING (geclaimt) → SENT | PENDING (Retry) | FAILED
+# Ein geclaimter Datensatz wird nach Ablauf der Lease wieder fällig, falls der
+# sendende Prozess abstürzt (kein Mail-Verlust, schlimmstenfalls Doppelversand).
+
+MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', 50))
+MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', 6))
+MAIL_RETRY_BASE_SECONDS = int(os.getenv('MAIL_RETRY_BASE_SECONDS', 30))   # 30s, 60s, 120s, ...
+MAIL_RETRY_MAX_SECONDS = int(os.getenv('MAIL_RETRY_MAX_SECONDS', 3600))
+MAIL_CLAIM_LEASE_SECONDS = 300
+MAIL_SENT_RETENTION_DAYS = 30
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _now():
+    return datetime.now().strftime(_TIME_FORMAT)
+
+
+def _in_seconds(seconds):
+    return (datetime.now() + timedelta(seconds=seconds)).strftime(_TIME_FORMAT)
+
+
+class MailOutboxManager(DatabaseManager):
+    """Datenbankoperationen der persistenten Mail-Warteschlange (Tabelle MailOutbox)."""
+
+    def enqueue(self, recipient_email, subject, body_html, body_plain):
+        """Legt eine Mail zum Versand ab und gibt die OutboxID zurück."""
+        outbox_id = f"MAIL_{uuid.uuid4()}"
+        now = _now()
+        self._execute_query(
+            """
+            INSERT INTO MailOutbox (OutboxID, Recipient, Subject, BodyHtml, BodyPlain,
+                                    Status, Attempts, NextAttemptAt, CreatedAt)
+            VALUES (?, ?, ?, ?, ?, 'PENDING', 0, ?, ?)
+            """,
+            (outbox_id, recipient_email, subject, body_html, body_plain, now, now)
+        )
+        return outbox_id
+
+    def claim_due(self, limit):
+        """
+        Holt bis zu `limit` fällige Mails und markiert sie atomar als SENDING (mit Lease),
+        damit parallel laufende Sender dieselbe Mail nicht doppelt greifen.
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                """
+                SELECT OutboxID, Recipient, Subject, BodyHtml, BodyPlain, Attempts
+                FROM MailOutbox
+                WHERE Status IN ('PENDING', 'SENDING') AND NextAttemptAt <= ?
+                ORDER BY NextAttemptAt ASC
+                LIMIT ?
+                """,
+                (_now(), limit)
+            )
+            rows = cursor.fetchall()
+            if rows:
+                lease_until = _in_seconds(MAIL_CLAIM_LEASE_SECONDS)
+                cursor.executemany(
+                    "UPDATE MailOutbox SET Status = 'SENDING', NextAttemptAt = ? WHERE OutboxID = ?",
+                    [(lease_until, row['OutboxID']) for row in rows]
+                )
+            conn.commit()
+            return [dict(row) for row in rows]
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def mark_sent(self, outbox_ids):
+        """Markiert erfolgreich versendete Mails (ein executemany statt N Einzel-Updates)."""
+        if not outbox_ids:
+            return
+        sent_at = _now()
+        self._execute_query(
+            [
+                ("UPDATE MailOutbox SET Status = 'SENT', SentAt = ?, LastError = NULL WHERE OutboxID = ?",
+                 (sent_at, outbox_id))
+                for outbox_id in outbox_ids
+            ],
+            multi_queries=True
+        )
+
+    def mark_failed(self, message, error):
+        """
+        Verbucht einen Fehlversuch: exponentielles Backoff bis MAIL_MAX_ATTEMPTS,
+        danach endgültig FAILED (bleibt zur Kontrolle in der Tabelle).
+        """
+        attempts = message['Attempts'] + 1
+        if attempts >= MAIL_MAX_ATTEMPTS:
+            status, next_attempt = 'FAILED', _now()
+        else:
+            delay = min(MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAIL_RETRY_MAX_SECONDS)
+            status, next_attempt = 'PENDING', _in_seconds(delay)
+
+        self._execute_query(
+            "UPDATE MailOutbox SET Status = ?, Attempts = ?, NextAttemptAt = ?, LastError = ? WHERE OutboxID = ?",
+            (status, attempts, next_attempt, str(error)[:500], message['OutboxID'])
+        )
+        return status
+
+    def release(self, outbox_ids, delay_seconds=MAIL_RETRY_BASE_SECONDS):
+        """Gibt geclaimte, aber nicht versuchte Mails wieder frei (z.B. Relay nicht erreichbar)."""
+        if not outbox_ids:
+            return
+        next_attempt = _in_seconds(delay_seconds)
+        self._execute_query(
+            [
+                ("UPDATE MailOutbox SET Status = 'PENDING', NextAttemptAt = ? WHERE OutboxID = ?",
+                 (next_attempt, outbox_id))
+                for outbox_id in outbox_ids
+            ],
+            multi_queries=True
+        )
+
+    def purge_sent(self, older_than_days=MAIL_SENT_RETENTION_DAYS):
+        """Entfernt alte, erfolgreich versendete Mails (Tabelle bleibt klein)."""
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime(_TIME_FORMAT)
+        self._execute_query(
+            "DELETE FROM MailOutbox WHERE Status = 'SENT' AND SentAt < ?",
+            (cutoff,)
+        )
+
+    def get_queue_metrics(self):
+        """
+        Kennzahlen der Warteschlange für Monitoring / Admin-API.
+
+        Returns:
+            dict mit Anzahl je Status (pending, sending, sent, failed), 'depth'
+            (noch zu versendende Mails) und Alter der ältesten offenen Mail in Sekunden.
+        """
+        rows = self._execute_query(
+            "SELECT Status, COUNT(*) AS Count, MIN(CreatedAt) AS Oldest FROM MailOutbox GROUP BY Status",
+            fetch=True
+        )
+        metrics = {'pending': 0, 'sending': 0, 'sent': 0, 'failed': 0}
+        oldest_open = None
+        for row in rows:
+            metrics[row['Status'].lower()] = row['Count']
+            if row['Status'] in ('PENDING', 'SENDING') and row['Oldest']:
+                oldest_open = min(oldest_open or row['Oldest'], row['Oldest'])
+
+        metrics['depth'] = metrics['pending'] + metrics['sending']
+        metrics['oldest_pending_age_s'] = (
+            int((datetime.now() - datetime.strptime(oldest_open, _TIME_FORMAT)).total_seconds())
+            if oldest_open else 0
+        )
+        return metrics
+
+
+class MailSender:
+    """
+    Hintergrund-Sender: arbeitet die Outbox in Batches über EINE wiederverwendete
+    SMTP-Sitzung ab. Die Sitzung bleibt zwischen zwei Läufen offen und wird erst nach
+    MAIL_SMTP_IDLE_SECONDS ohne Versand geschlossen. Geprüft (NOOP) wird sie einmal zu
+    Beginn eines Laufs; trennt das Relay später, verbindet _send einmal neu.
+
+    Konfiguration (.env): SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, SMTP_SENDER und
+    SMTP_SECURITY = ssl | starttls | none (Standard: ssl bei Port 465, sonst starttls).
+    Lokal testbar mit aiosmtpd:  python -m aiosmtpd -n -l localhost:8025
+    und SMTP_HOST=localhost, SMTP_PORT=8025, SMTP_SECURITY=none.
+    Automatisiert: tests/test_mail_sender.py (Batch-Versand, abgelehnter Empfänger, Relay weg).
+    """
+
+    def __init__(self, outbox=None, batch_size=MAIL_BATCH_SIZE):
+        self.outbox = outbox or MailOutboxManager()
+        self.batch_size = batch_size
+        self.idle_seconds = int(os.getenv('MAIL_SMTP_IDLE_SECONDS', 60))
+        self._server = None
+        self._last_used = 0.0
+        self._last_purge = 0.0
+
+    # --- SMTP-Sitzung ---
+
+    def _connect(self):
+        """Baut eine neue SMTP-Sitzung gemäß .env auf (inkl. Login)."""
+        host = os.environ.get('SMTP_HOST', 'localhost')
+        port = int(os.environ.get('SMTP_PORT', '465'))
+        security = os.environ.get('SMTP_SECURITY') or ('ssl' if port == 465 else 'starttls')
+        user = os.environ.get('SMTP_USER')
+        password = os.environ.get('SMTP_PASS')
+
+        if security == 'ssl':
+            server = smtplib.SMTP_SSL(host, port, context=ssl.create_default_context(), timeout=30)
+        else:
+            server = smtplib.SMTP(host, port, timeout=30)
+            if security == 'starttls':
+                server.starttls(context=ssl.create_default_context())
+
+        if user and password:
+            server.login(user, password)
+        return server
+
+    def _get_server(self, check=False):
+        """
+        Liefert die offene Sitzung oder baut eine neue auf.
+        check=True prüft eine offene Sitzung vorher per NOOP (nur einmal je Lauf, nicht je Mail).
+        """
+        if self._server is not None and check:
+            try:
+                if self._server.noop()[0] != 250:
+                    self.close()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def _send(self, msg, check=False):
+        """Versendet über die offene Sitzung; hat das Relay sie getrennt, einmal neu verbinden."""
+        try:
+            self._get_server(check).send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._get_server().send_message(msg)
+
+    def close(self):
+        """Schließt die SMTP-Sitzung (Fehler beim QUIT sind egal)."""
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    @staticmethod
+    def _build_message(message):
+        msg = EmailMessage()
+        msg['Subject'] = message['Subject']
+        msg['From'] = os.environ.get('SMTP_SENDER', 'noreply@yourdomain.com')
+        msg['To'] = message['Recipient']
+        msg.set_content(message['BodyPlain'])
+        msg.add_alternative(message['BodyHtml'], subtype='html')
+        return msg
+
+    # --- Versand ---
+
+    def run_once(self):
+        """
+        Versendet alle aktuell fälligen Mails (Batch für Batch) und gibt
+        (gesendet, fehlgeschlagen) zurück. Verbindungsfehler brechen den Lauf ab;
+        noch nicht versuchte Mails werden ohne Zählung eines Versuchs freigegeben.
+        """
+        sent_total, failed_total = 0, 0
+        session_checked = False
+
+        while True:
+            batch = self.outbox.claim_due(self.batch_size)
+            if not batch:
+                break
+
+            sent_ids = []
+            connection_lost = False
+            for index, message in enumerate(batch):
+                try:
+                    self._send(self._build_message(message), check=not session_checked)
+                    session_checked = True
+                    sent_ids.append(message['OutboxID'])
+                    self._last_used = time.monotonic()
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                        smtplib.SMTPAuthenticationError, ConnectionError, TimeoutError) as e:
+                    # Relay nicht erreichbar → Versuch verbuchen, Rest des Batches freigeben
+                    logger.warning(f"📭 SMTP-Verbindung fehlgeschlagen: {e}")
+                    self.close()
+                    self.outbox.mark_failed(message, e)
+                    failed_total += 1
+                    self.outbox.release([m['OutboxID'] for m in batch[index + 1:]])
+                    connection_lost = True
+                    break
+                except smtplib.SMTPException as e:
+                    # Fehler nur dieser Mail (z.B. Empfänger abgelehnt)
+                    logger.warning(f"📭 Mail an {message['Recipient']} fehlgeschlagen: {e}")
+                    if self.outbox.mark_failed(message, e) == 'FAILED':
+                        logger.error(f"❌ Mail {message['OutboxID']} endgültig fehlgeschlagen.")
+                    failed_total += 1
+                except OSError as e:
+                    logger.warning(f"📭 SMTP-Netzwerkfehler: {e}")
+                    self.close()
+                    self.outbox.mark_failed(message, e)
+                    failed_total += 1
+                    self.outbox.release([m['OutboxID'] for m in batch[index + 1:]])
+                    connection_lost = True
+                    break
+
+            self.outbox.mark_sent(sent_ids)
+            sent_total += len(sent_ids)
+
+            if connection_lost or len(batch) < self.batch_size:
+                break
+
+        # Sitzung nach längerer Ruhe schließen (Relays trennen idle Verbindungen ohnehin)
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_seconds:
+            self.close()
+
+        # Höchstens stündlich alte SENT-Einträge aufräumen
+        if time.monotonic() - self._last_purge > 3600:
+            self.outbox.purge_sent()
+            self._last_purge = time.monotonic()
+
+        if sent_total or failed_total:
+            logger.info(f"📬 Mail-Outbox: {sent_total} gesendet, {failed_total} fehlgeschlagen.")
+        return sent_total, failed_total
@@ -4,15 +4,16 @@ import sqlite3
 from sys import prefix
 import uuid
 from typing import Tuple, List, Dict, Any
+from .database import DatabaseManager
 
-class MaterialManager:
+class MaterialManager(DatabaseManager):
     """
     Verwaltet die gesamte Datenbank- und Business-Logik für die 
     Werkstatt-Zentrale (Materials, SpareParts, PrintProfiles und Maschinenpark).
     """
 
     def __init__(self):
-        self.db_path = os.getenv('DB_PATH')
+        super().__init__()
         if not self.db_path:
             raise RuntimeError("DB_PATH-Umgebungsvariable ist nicht gesetzt!")
         
@@ -24,24 +25,19 @@ class MaterialManager:
         Zentraler DB-Executor für maximale Sicherheit (SQL-Injection-Schutz)
         und einheitlichen Zugriff über Spaltennamen.
         """
-        conn = None
+        cursor = self._get_connection().cursor()
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
             cursor.execute(query, params)
             
             if query.strip().upper().startswith("SELECT"):
                 return cursor.fetchall()
             else:
-                conn.commit()
                 return []
         except sqlite3.Error as e:
             print(f"Datenbankfehler im MaterialManager: {e}")
             raise RuntimeError(f"Datenbankfehler: {e}")
         finally:
-            if conn:
-                conn.close()
+            cursor.close()
 
     def generate_unique_id(self,prefix):
 
@@ -166,14 +162,16 @@ class MaterialManager:
     def add_printer(self, data: Dict[str, Any]) -> str:
         printer_id = self.generate_unique_id("PRIN")
         query = """
-            INSERT INTO Printers (PrinterID, PrinterName, PrinterStatus, HotendID, PrintHeadID, BuildPlateID, DimX, DimY, DimZ, CostPerMin, RuntimeHours, PowerKW)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO Printers (PrinterID, PrinterName, PrinterStatus, HotendID, PrintHeadID, BuildPlateID, DimX, DimY, DimZ, CostPerMin, RuntimeHours, PowerKW, NozzleDiam, Materials)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         params = (
             printer_id, data.get('PrinterName'), data.get('PrinterStatus', 'online'),
             data.get('HotendID') or None, data.get('PrintHeadID') or None, data.get('BuildPlateID') or None,
             int(data.get('DimX') or 0), int(data.get('DimY') or 0), int(data.get('DimZ') or 0),
-            float(data.get('CostPerMin') or 0.0), float(data.get('RuntimeHours') or 0.0), float(data.get('PowerKW') or 0.0)
+            float(data.get('CostPerMin') or 0.0), float(data.get('RuntimeHours') or 0.0), float(data.get('PowerKW') or 0.0),
+            # Leer = Drucker nimmt jede Düse / jedes Material (Einschränkung für die Auto-Planung)
+            float(data['NozzleDiam']) if data.get('NozzleDiam') else None, (data.get('Materials') or '').strip() or None
         )
         self._execute_query(query, params)
         return printer_id
@@ -0,0 +1,1077 @@
+import sys
+import logging
+import argparse
+import datetime
+import sqlite3
+from dotenv import load_dotenv
+from .database import get_connection
+from .search import fold_umlauts_sql
+
+logger = logging.getLogger(__name__)
+
+# =================================================================
+# VERSIONIERTE SCHEMA-MIGRATIONEN
+# =================================================================
+# Ersetzt das DROP/CREATE-Hilfsskript: jede Migration hat eine feste Versionsnummer,
+# wird genau einmal angewendet und in SchemaVersions protokolliert.
+# CREATE-Statements sind zusätzlich idempotent (IF NOT EXISTS), damit auch
+# bestehende Datenbanken ohne Versionstabelle sauber übernommen werden.
+# ALTER TABLE ... ADD COLUMN (ab Version 9) und Daten-UPDATEs (z.B. Version 14) sind
+# NICHT idempotent – vor doppelter Ausführung schützt allein der Eintrag in SchemaVersions.
+# NEUE ÄNDERUNGEN → immer als neue Version ANHÄNGEN, bestehende nie ändern!
+
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS "SchemaVersions" (
+        "Version" INTEGER NOT NULL PRIMARY KEY,
+        "Description" TEXT NOT NULL,
+        "AppliedAt" TEXT NOT NULL
+    )
+"""
+
+# Version 1: Basisschema (Stand der ausgelieferten Commerce.db)
+BASELINE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS "WishLists" (
+        "WishListID" TEXT NOT NULL PRIMARY KEY,
+        "UserID" TEXT NOT NULL,
+        "ProductID" TEXT NOT NULL,
+        "DateAdded" DATETIME NOT NULL,
+        FOREIGN KEY ("UserID") REFERENCES "Users" ("UserID"),
+        FOREIGN KEY ("ProductID") REFERENCES "Products" ("ProductID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Passwords" (
+        "UserID" TEXT NOT NULL PRIMARY KEY UNIQUE,
+        "Password" TEXT NOT NULL
+        )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "VerificationTokens" (
+        "TokenID" TEXT PRIMARY KEY,
+        "UserID" TEXT,
+        "TokenHash" TEXT NOT NULL UNIQUE,
+        "Expiry" DATETIME NOT NULL,
+        "Created" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, TokenType TEXT NOT NULL DEFAULT 'UNKNOWN',
+        FOREIGN KEY("UserID") REFERENCES "Users"("UserID")
+
+        )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Configurations" (
+        "Key" TEXT PRIMARY KEY,
+        "Value" INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "ProductCategories" (
+        "CategoryID" TEXT PRIMARY KEY,
+        "CategoryName" TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "ProjectMessages" (
+        "CommID" TEXT PRIMARY KEY,
+        "ProjectID" TEXT NOT NULL,
+        "SenderType" TEXT NOT NULL,
+        "MessageText" TEXT NOT NULL,
+        "Timestamp" TEXT NOT NULL,
+        "IsUnreadAdmin" INTEGER NOT NULL DEFAULT 1, RequiresFileUpload INTEGER DEFAULT 0, RequiredFilesProvided INTEGER DEFAULT 0,
+        FOREIGN KEY("ProjectID") REFERENCES "Projects"("ProjectID") ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "PrintProfiles" (
+        "ProfileID" TEXT PRIMARY KEY,
+        "ProfileName" TEXT NOT NULL,
+        "SpeedMultiplier" REAL,
+        "MarkupMultiplier" REAL,
+        "InfillDensity" INTEGER,
+        "LayerHeightMM" REAL,
+        "CostMultiplier" REAL,
+        "CostPerMin" REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Files" (
+        "FileID" TEXT PRIMARY KEY,
+        "UserID" TEXT NOT NULL,
+        "FilePath" TEXT NOT NULL,
+        "FileName" TEXT NOT NULL,
+        "FileSizeKB" INTEGER NOT NULL,
+        FOREIGN KEY("UserID") REFERENCES "Users"("UserID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "OrderPositions" (
+        "PositionID" TEXT NOT NULL PRIMARY KEY,
+        "OrderID" TEXT NOT NULL,
+        "ProductID" TEXT NOT NULL,
+        "ProductType" TEXT NOT NULL,
+        "Quantity" INTEGER NOT NULL,
+        "PricePerUnit" INTEGER NOT NULL,
+        FOREIGN KEY ("OrderID") REFERENCES "Orders" ("OrderID"),
+        FOREIGN KEY ("ProductID") REFERENCES "Products" ("ProductID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "CartPositions" (
+        "PositionID" TEXT NOT NULL PRIMARY KEY,  -- UUID als TEXT, nicht INTEGER
+        "CartID" TEXT NOT NULL,                  -- UUID für CartID als TEXT
+        "ProductID" TEXT NOT NULL,
+        "Quantity" INTEGER NOT NULL,
+        "DateAdded" TEXT NOT NULL,
+        FOREIGN KEY ("CartID") REFERENCES "ShoppingCarts" ("CartID"),
+        FOREIGN KEY ("ProductID") REFERENCES "Products" ("ProductID"),
+        UNIQUE ("CartID", "ProductID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Blueprints" (
+        "BlueprintID" TEXT PRIMARY KEY,
+        "ProjectID" TEXT NOT NULL,
+        "Status" TEXT NOT NULL DEFAULT 'INITIALIZED', -- INITIALIZED, IN_PROGRESS, COMPLETED
+        "BOMPath" TEXT,                               -- Pfad zur finalen .json Datei
+        "CreatedAt" DATETIME DEFAULT CURRENT_TIMESTAMP,
+        "UpdatedAt" DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY ("ProjectID") REFERENCES "Projects" ("ProjectID") ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Projects" (
+        "ProjectID" TEXT PRIMARY KEY,
+        "FileIDs" TEXT NOT NULL,
+        "UserID" TEXT NOT NULL,
+        "MaterialType" TEXT NOT NULL,
+        "ProjectDescription" TEXT,
+        "ProjectName" TEXT,
+        "ProjectQuantity" INTEGER,
+        "Status" TEXT,
+        "VolumeCM3" REAL,
+        "PrintTimeMin" INTEGER,
+        "EstimatedMaterialG" INTEGER,
+        "ProfileID" TEXT,
+        "MaterialID" TEXT,
+        "DateAdded" DATETIME,
+        "Priority" INTEGER,
+        "FinalQuotePrice" REAL,
+        "QuoteDate" TEXT,
+        FOREIGN KEY("FileIDs") REFERENCES "Files"("FileID"),
+        FOREIGN KEY("UserID") REFERENCES "Users"("UserID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "ProductPrices" (
+        "PriceID" TEXT NOT NULL PRIMARY KEY,
+        "ProductID" TEXT NOT NULL,
+        "ProductPrice" INTEGER NOT NULL,
+        "DateAdded" TEXT NOT NULL,
+        FOREIGN KEY ("ProductID") REFERENCES "Products"("ProductID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Printers" (
+        "PrinterID" TEXT PRIMARY KEY,
+        "PrinterName" TEXT NOT NULL,
+        "PrinterStatus" TEXT NOT NULL,
+        "HotendID" TEXT,
+        "PrintHeadID" TEXT,
+        "BuildPlateID" TEXT,
+        "DimX" INTEGER NOT NULL,
+        "DimY" INTEGER NOT NULL,
+        "DimZ" INTEGER NOT NULL,
+        "CostPerMin" REAL NOT NULL,
+        "RuntimeHours" REAL NOT NULL, PowerKW REAL,
+        FOREIGN KEY("HotendID") REFERENCES "SpareParts"("PartID"),
+        FOREIGN KEY("PrintHeadID") REFERENCES "SpareParts"("PartID"),
+        FOREIGN KEY("BuildPlateID") REFERENCES "SpareParts"("PartID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Products" (
+        "ProductID" TEXT NOT NULL PRIMARY KEY,
+        "UserID" TEXT NOT NULL,
+        "ProductCategory" TEXT NOT NULL,
+        "MaterialType" TEXT NOT NULL,
+        "ProductName" TEXT NOT NULL,
+        "ProductDescription" TEXT NOT NULL,
+        "WeightG" REAL NOT NULL,
+        "PrintTimeMin" INTEGER NOT NULL,
+        "CreatedAt" TEXT NOT NULL,
+        "StockQuantity" INTEGER NOT NULL,
+        "IsActive" INTEGER NOT NULL,
+        "ImagePath" TEXT,
+        "IsShopReady" INTEGER NOT NULL DEFAULT 0,
+        "IsShopVisible" INTEGER NOT NULL DEFAULT 0,
+        "Color" TEXT,
+        "SourceProjectID" TEXT,
+        FOREIGN KEY ("UserID") REFERENCES "Users" ("UserID"),
+        FOREIGN KEY ("ProductCategory") REFERENCES "ProductCategories" ("CategoryName")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Orders" (
+        "OrderID"           TEXT NOT NULL PRIMARY KEY,
+        "UserID"            TEXT NOT NULL,
+        "AddressID"         TEXT,
+        "PaymentID"         TEXT,
+        "SourceProjectID"   TEXT,
+
+        "OrderStatus"       TEXT NOT NULL DEFAULT 'ORDER_CREATED',
+        "OrderDate"         TEXT NOT NULL,
+        "OrderAmount"        INTEGER NOT NULL,
+
+        "PaymentStatus"     TEXT NOT NULL DEFAULT 'PENDING_PAYMENT',
+        "TransactionID"     TEXT,
+        "PaymentMethod"     TEXT,
+        "IsArchived"        INTEGER NOT NULL DEFAULT 0,
+
+        FOREIGN KEY ("UserID") REFERENCES "Users" ("UserID"),
+        FOREIGN KEY ("AddressID") REFERENCES "Addresses" ("AddressID"),
+        FOREIGN KEY ("PaymentID") REFERENCES "Payments" ("PaymentID"),
+        FOREIGN KEY ("SourceProjectID") REFERENCES "Projects" ("ProjectID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "ShoppingCarts" (
+        "CartID" TEXT NOT NULL PRIMARY KEY,  -- UUID als TEXT (mit Präfix wie "CART_")
+        "UserID" TEXT NOT NULL UNIQUE,       -- UserID des Benutzers
+        "DateCreated" TEXT NOT NULL,         -- Erstellungsdatum des Warenkorbs
+        FOREIGN KEY ("UserID") REFERENCES "Users" ("UserID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Users" (
+            "UserID" TEXT PRIMARY KEY,
+            "FirstName" TEXT NOT NULL,
+            "LastName" TEXT NOT NULL,
+            "Email" TEXT NOT NULL UNIQUE,
+            "Phone" TEXT,
+            "Gender" INTEGER,
+            "Username" TEXT NOT NULL UNIQUE,
+            "IsAdmin" INTEGER NOT NULL,
+            "IsActive" INTEGER NOT NULL
+        )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Addresses" (
+            "AddressID" TEXT NOT NULL PRIMARY KEY,
+            "UserID" TEXT NOT NULL,
+            "Street" TEXT,
+            "City" TEXT,
+            "Zipcode" TEXT,
+            "Country" TEXT,
+            "IsDefaultShipping" INTEGER DEFAULT 0,
+            FOREIGN KEY ("UserID") REFERENCES "Users"("UserID") ON DELETE CASCADE
+        )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Payments" (
+            "PaymentID" TEXT NOT NULL PRIMARY KEY,
+            "UserID" TEXT NOT NULL,
+            "Method" TEXT NOT NULL,
+            "Token" TEXT,
+            "LastIDDigits" TEXT,
+            "Expiry" TEXT,
+            "IsDefaultMethod" INTEGER DEFAULT 0,
+            FOREIGN KEY ("UserID") REFERENCES "Users"("UserID") ON DELETE CASCADE
+        )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Lathes" (
+        "LatheID" TEXT NOT NULL PRIMARY KEY,
+        "LatheName" TEXT NOT NULL,
+        "LatheStatus" TEXT DEFAULT 'online',
+        "ChuckleID" TEXT,
+        "ToolHolderID" TEXT,
+        "MaxLengthMM" REAL,
+        "MaxSwingMM" REAL,
+        "PowerKW" REAL,
+        "CostPerMin" REAL DEFAULT 0.00,
+        "RuntimeHours" REAL DEFAULT 0.0)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Mills" (
+        "MillID" TEXT NOT NULL PRIMARY KEY,
+        "MillName" TEXT NOT NULL,
+        "MillStatus" TEXT DEFAULT 'online',
+        "CuttingToolID" TEXT,
+        "DimX" REAL,
+        "DimY" REAL,
+        "DimZ" REAL,
+        "AxesCount" INTEGER DEFAULT 3,
+        "PowerKW" REAL,
+        "CostPerMin" REAL DEFAULT 0.00,
+        "RuntimeHours" REAL DEFAULT 0.0)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Moulds" (
+        "MouldID" TEXT NOT NULL PRIMARY KEY,
+        "MouldName" TEXT NOT NULL,
+        "MouldStatus" TEXT DEFAULT 'ready',
+        "CavityVolume" REAL,
+        "ClampForceKN" REAL,
+        "CostPerShot" REAL DEFAULT 0.00,
+        "CurrentShots" INTEGER DEFAULT 0)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Stoves" (
+        "StoveID" TEXT NOT NULL PRIMARY KEY,
+        "StoveName" TEXT NOT NULL,
+        "StoveStatus" TEXT DEFAULT 'ready',
+        "MaxTempC" REAL,
+        "ChamberVolumeL" REAL,
+        "CostPerMin" REAL DEFAULT 0.00,
+        "RuntimeHours" REAL DEFAULT 0.0)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "BankAccounts" (
+        "AccountID" TEXT NOT NULL PRIMARY KEY,
+        "IBAN" TEXT NOT NULL UNIQUE,
+       "AccountName" TEXT NOT NULL,
+       "BankName" TEXT NOT NULL,
+       "CurrentBalance" REAL NOT NULL DEFAULT 0.0,
+       "LastSync" DATETIME DEFAULT CURRENT_TIMESTAMP)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "BankBalanceHistories" (
+        "HistoryID" TEXT NOT NULL PRIMARY KEY,
+        "AccountID" TEXT NOT NULL,
+        "Date" TEXT NOT NULL,
+        "Balance" REAL NOT NULL,
+        FOREIGN KEY (AccountID) REFERENCES BankAccounts (AccountID)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "Materials" (
+        "MaterialID" TEXT NOT NULL PRIMARY KEY,
+        "MaterialName" TEXT NOT NULL,
+        "Category" TEXT,
+        "Color" TEXT,
+        "DensityCM3" REAL,
+        "Manufacturer" TEXT,
+        "CostPerKG" REAL NOT NULL,
+        "InStockKG" REAL NOT NULL DEFAULT 0.0)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "SpareParts" (
+        "PartID" TEXT PRIMARY KEY,
+        "PartName" TEXT,
+        "Category" TEXT,
+        "StockCount" INTEGER,
+        "Condition" TEXT,
+        "AssignedTo" TEXT DEFAULT 'Unassigned'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "BankTransactions" (
+        "TransactionID" TEXT NOT NULL PRIMARY KEY,
+        "AccountID" TEXT NOT NULL,
+        "Primanota" TEXT NOT NULL,
+        "BookingDate" TEXT NOT NULL,
+        "PartnerName" TEXT,
+        "Amount" REAL NOT NULL,                -- Positiv = Einnahme, Negativ = Ausgabe
+        "Currency" TEXT DEFAULT 'EUR',
+        "Purpose" TEXT,
+        FOREIGN KEY (AccountID) REFERENCES BankAccounts (AccountID)
+        )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "ProductionJobs" (
+        "JobID" TEXT NOT NULL PRIMARY KEY,
+        "SourceProjectID" TEXT NOT NULL,
+
+        "JobStatus" TEXT NOT NULL DEFAULT 'QUEUED',
+        "Priority" INTEGER DEFAULT 3,
+        "PartName" TEXT,
+
+        "FileID" TEXT,
+        "FileName" TEXT,
+
+        "MaterialID" TEXT,
+        "ProfileID" TEXT,
+        "Color" TEXT,
+        "NozzleDiam" REAL,
+        "PrintTimeMin" INTEGER,
+
+        "DimX" REAL,
+        "DimY" REAL,
+        "DimZ" REAL,
+
+        "PlannedStart" DATETIME,
+        "PlannedEnd" DATETIME,
+        "ActualStart" DATETIME,
+        "ActualEnd" DATETIME,
+
+        FOREIGN KEY ("SourceProjectID") REFERENCES "Projects" ("ProjectID"),
+        FOREIGN KEY ("MaterialID") REFERENCES "Materials" ("MaterialID"),
+        FOREIGN KEY ("ProfileID") REFERENCES "PrintProfiles" ("ProfileID")
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "AdminNotifications" (
+        "NotificationID" TEXT NOT NULL PRIMARY KEY,
+        "ProjectID" TEXT NOT NULL,
+        "AdminID" TEXT NOT NULL,
+        "Timestamp" DATETIME NOT NULL,
+        "Message" TEXT NOT NULL,
+        "IsRead" INTEGER NOT NULL,
+        FOREIGN KEY ("ProjectID") REFERENCES "Projects" ("ProjectID")
+
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "PrinterQueues" (
+        "QueueID" TEXT PRIMARY KEY,
+        "PrinterID" TEXT NOT NULL,
+        "JobID" TEXT NOT NULL,
+        "Position" INTEGER NOT NULL, -- 1 = aktueller Druck, 2 = nächster, 3 = übernächster...
+        "AssignedAt" DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY ("PrinterID") REFERENCES "Printers" ("PrinterID") ON DELETE CASCADE,
+        FOREIGN KEY ("JobID") REFERENCES "ProductionJobs" ("JobID") ON DELETE CASCADE
+    )
+    """,
+]
+
+# Version 2: Indizes für die heißen Lookup-Spalten der Manager
+HOT_LOOKUP_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS "idx_ProductPrices_ProductID_DateAdded" ON "ProductPrices" ("ProductID", "DateAdded")',
+    'CREATE INDEX IF NOT EXISTS "idx_Projects_UserID_Status" ON "Projects" ("UserID", "Status")',
+    'CREATE INDEX IF NOT EXISTS "idx_ProjectMessages_ProjectID_Timestamp" ON "ProjectMessages" ("ProjectID", "Timestamp")',
+    'CREATE INDEX IF NOT EXISTS "idx_Orders_UserID_OrderDate" ON "Orders" ("UserID", "OrderDate")',
+    'CREATE INDEX IF NOT EXISTS "idx_Orders_SourceProjectID" ON "Orders" ("SourceProjectID")',
+    'CREATE INDEX IF NOT EXISTS "idx_ProductionJobs_JobStatus_Priority" ON "ProductionJobs" ("JobStatus", "Priority")',
+    'CREATE INDEX IF NOT EXISTS "idx_PrinterQueues_PrinterID_Position" ON "PrinterQueues" ("PrinterID", "Position")',
+    'CREATE INDEX IF NOT EXISTS "idx_BankTransactions_AccountID_BookingDate_Amount" ON "BankTransactions" ("AccountID", "BookingDate", "Amount")',
+    'CREATE INDEX IF NOT EXISTS "idx_Products_SourceProjectID" ON "Products" ("SourceProjectID")',
+    'ANALYZE',
+]
+
+# Version 3: Projektion "aktueller Preis je Produkt"
+# Wird per Trigger bei jedem INSERT/UPDATE/DELETE auf ProductPrices nachgezogen –
+# damit sind alle schreibenden Pfade (finalize_product, create_product_from_project,
+# convert_project_to_product, delete_product) automatisch abgedeckt.
+# Bei gleichem DateAdded gewinnt der zuletzt eingefügte Preis.
+_RECOMPUTE_CURRENT_PRICE = """
+        DELETE FROM CurrentProductPrices WHERE ProductID = {ref}.ProductID;
+        INSERT INTO CurrentProductPrices (ProductID, PriceID, ProductPrice, DateAdded)
+        SELECT ProductID, PriceID, ProductPrice, DateAdded
+        FROM ProductPrices
+        WHERE ProductID = {ref}.ProductID
+        ORDER BY DateAdded DESC, rowid DESC
+        LIMIT 1;"""
+
+CURRENT_PRODUCT_PRICES = [
+    """
+    CREATE TABLE IF NOT EXISTS "CurrentProductPrices" (
+        "ProductID" TEXT NOT NULL PRIMARY KEY,
+        "PriceID" TEXT NOT NULL,
+        "ProductPrice" INTEGER NOT NULL,
+        "DateAdded" TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS "trg_ProductPrices_insert_current"
+    AFTER INSERT ON "ProductPrices"
+    BEGIN
+        INSERT INTO CurrentProductPrices (ProductID, PriceID, ProductPrice, DateAdded)
+        VALUES (NEW.ProductID, NEW.PriceID, NEW.ProductPrice, NEW.DateAdded)
+        ON CONFLICT (ProductID) DO UPDATE SET
+            PriceID = excluded.PriceID,
+            ProductPrice = excluded.ProductPrice,
+            DateAdded = excluded.DateAdded
+        WHERE excluded.DateAdded >= CurrentProductPrices.DateAdded;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_ProductPrices_update_current"
+    AFTER UPDATE ON "ProductPrices"
+    BEGIN{_RECOMPUTE_CURRENT_PRICE.format(ref='OLD')}{_RECOMPUTE_CURRENT_PRICE.format(ref='NEW')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_ProductPrices_delete_current"
+    AFTER DELETE ON "ProductPrices"
+    BEGIN{_RECOMPUTE_CURRENT_PRICE.format(ref='OLD')}
+    END
+    """,
+    # Backfill aus der bestehenden Preis-Historie
+    """
+    INSERT OR REPLACE INTO CurrentProductPrices (ProductID, PriceID, ProductPrice, DateAdded)
+    SELECT ProductID, PriceID, ProductPrice, DateAdded
+    FROM (
+        SELECT ProductID, PriceID, ProductPrice, DateAdded,
+               ROW_NUMBER() OVER (PARTITION BY ProductID ORDER BY DateAdded DESC, rowid DESC) AS rn
+        FROM ProductPrices
+    )
+    WHERE rn = 1
+    """,
+]
+
+# Version 4: Volltextindex für die Shop-Suche (FTS5)
+# Texte werden beim Schreiben umlaut-gefaltet (siehe search.py), der Tokenizer
+# entfernt übrige Diakritika; prefix='2 3' beschleunigt Präfixsuchen ("hal*").
+# Der Update-Trigger feuert nur bei Änderungen an den indexierten Spalten
+# (Lagerbestand / Sichtbarkeit ändern den Index nicht).
+_SEARCH_COLUMNS = ('ProductName', 'ProductDescription', 'ProductCategory', 'MaterialType')
+
+
+def _search_values(ref):
+    """Gefaltete Spaltenwerte eines Products-Datensatzes (NEW / Tabellenalias) für den Suchindex."""
+    return ', '.join(fold_umlauts_sql(f"COALESCE({ref}.{col}, '')") for col in _SEARCH_COLUMNS)
+
+
+PRODUCT_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS "ProductSearch" USING fts5(
+        ProductID UNINDEXED,
+        ProductName,
+        ProductDescription,
+        ProductCategory,
+        MaterialType,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_Products_insert_search"
+    AFTER INSERT ON "Products"
+    BEGIN
+        INSERT INTO ProductSearch (ProductID, {', '.join(_SEARCH_COLUMNS)})
+        VALUES (NEW.ProductID, {_search_values('NEW')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_Products_update_search"
+    AFTER UPDATE OF ProductID, {', '.join(_SEARCH_COLUMNS)} ON "Products"
+    BEGIN
+        DELETE FROM ProductSearch WHERE ProductID = OLD.ProductID;
+        INSERT INTO ProductSearch (ProductID, {', '.join(_SEARCH_COLUMNS)})
+        VALUES (NEW.ProductID, {_search_values('NEW')});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS "trg_Products_delete_search"
+    AFTER DELETE ON "Products"
+    BEGIN
+        DELETE FROM ProductSearch WHERE ProductID = OLD.ProductID;
+    END
+    """,
+    # Backfill aus dem bestehenden Katalog
+    'DELETE FROM ProductSearch',
+    f"""
+    INSERT INTO ProductSearch (ProductID, {', '.join(_SEARCH_COLUMNS)})
+    SELECT p.ProductID, {_search_values('p')}
+    FROM Products p
+    """,
+    "INSERT INTO ProductSearch (ProductSearch) VALUES ('optimize')",
+]
+
+# Version 5: Sortier-Indizes für die Keyset-Pagination des Shops
+# (Filter IsShopVisible/IsActive + Sortschlüssel + ProductID als Tiebreaker → kein Temp-B-Tree)
+SHOP_KEYSET_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS "idx_Products_Shop_CreatedAt" ON "Products" ("IsShopVisible", "IsActive", "CreatedAt", "ProductID")',
+    'CREATE INDEX IF NOT EXISTS "idx_Products_Shop_Name" ON "Products" ("IsShopVisible", "IsActive", "ProductName" COLLATE NOCASE, "ProductID")',
+]
+
+# Version 6: Persistente Mail-Warteschlange (siehe mail_manager.py)
+MAIL_OUTBOX = [
+    """
+    CREATE TABLE IF NOT EXISTS "MailOutbox" (
+        "OutboxID" TEXT NOT NULL PRIMARY KEY,
+        "Recipient" TEXT NOT NULL,
+        "Subject" TEXT NOT NULL,
+        "BodyHtml" TEXT NOT NULL,
+        "BodyPlain" TEXT NOT NULL,
+        "Status" TEXT NOT NULL DEFAULT 'PENDING',   -- PENDING, SENDING, SENT, FAILED
+        "Attempts" INTEGER NOT NULL DEFAULT 0,
+        "NextAttemptAt" TEXT NOT NULL,
+        "LastError" TEXT,
+        "CreatedAt" TEXT NOT NULL,
+        "SentAt" TEXT
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "idx_MailOutbox_Status_NextAttemptAt" ON "MailOutbox" ("Status", "NextAttemptAt")',
+]
+
+# Version 7: Datenversionen je Bereich (Cache-Schlüssel für Dashboard-Plots u.ä.)
+# Die Trigger zählen bei jeder relevanten Änderung hoch – egal ob sie aus der App,
+# dem Bank-Sync (eigene Verbindung) oder einem Skript kommt.
+_DATA_VERSION_TRIGGERS = (
+    # (Bereich, Tabelle, Trigger-Ereignis)
+    ('orders', 'Orders', 'INSERT'),
+    ('orders', 'Orders', 'UPDATE OF "OrderDate", "OrderAmount", "IsArchived"'),
+    ('orders', 'Orders', 'DELETE'),
+    ('bank', 'BankTransactions', 'INSERT'),
+    ('bank', 'BankTransactions', 'UPDATE OF "BookingDate", "Amount"'),
+    ('bank', 'BankTransactions', 'DELETE'),
+)
+
+def _data_version_trigger(name, table, event):
+    """Trigger, der bei event auf table den Versionszähler des Bereichs name erhöht."""
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_{table}_{event.split()[0].lower()}_version"
+    AFTER {event} ON "{table}"
+    BEGIN
+        UPDATE "DataVersions" SET "Version" = "Version" + 1 WHERE "Name" = '{name}';
+    END
+    """
+
+DATA_VERSIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS "DataVersions" (
+        "Name" TEXT NOT NULL PRIMARY KEY,
+        "Version" INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """INSERT OR IGNORE INTO "DataVersions" ("Name", "Version") VALUES ('orders', 0), ('bank', 0)""",
+] + [_data_version_trigger(*trigger) for trigger in _DATA_VERSION_TRIGGERS]
+
+# Version 8: Tages-Rollups für das Dashboard (Umsatz / Bank-Cashflow)
+# Wie bei CurrentProductPrices halten Trigger die Summen inkrementell aktuell:
+# jede neue Bestellung (alle INSERT-Pfade im OrderManager) und jeder Bank-Sync
+# (sync_bank_balance schreibt über eine eigene Verbindung) landen in derselben
+# Transaktion auch im Rollup. Beträge als Cent-INTEGER → keine Rundungsdrift:
+# OrderAmount ist bereits in Cent gespeichert (OrderManager: int(price * 100)) und wird
+# unverändert übernommen, Bank-Beträge (Amount, Euro) werden einzeln auf Cent gerundet.
+# Reparatur / Neuaufbau: python -m website.migrations --rebuild-rollups
+_ORDER_DAY = "substr({ref}.OrderDate, 1, 10)"   # "2026-02-11 17:42:01" → "2026-02-11"
+_AMOUNT_CENTS = "CAST(ROUND({ref}.Amount * 100) AS INTEGER)"
+
+_ADD_ORDER_REVENUE = f"""
+        INSERT INTO DailyOrderRevenue (Day, OrderCount, RevenueCents)
+        VALUES ({_ORDER_DAY.format(ref='NEW')}, 1, NEW.OrderAmount)
+        ON CONFLICT (Day) DO UPDATE SET
+            OrderCount = OrderCount + 1,
+            RevenueCents = RevenueCents + excluded.RevenueCents;"""
+
+_SUB_ORDER_REVENUE = f"""
+        UPDATE DailyOrderRevenue
+        SET OrderCount = OrderCount - 1, RevenueCents = RevenueCents - OLD.OrderAmount
+        WHERE Day = {_ORDER_DAY.format(ref='OLD')};
+        DELETE FROM DailyOrderRevenue WHERE Day = {_ORDER_DAY.format(ref='OLD')} AND OrderCount <= 0;"""
+
+_ADD_CASHFLOW = f"""
+        INSERT INTO DailyCashflow (Day, TransactionCount, InflowCents, OutflowCents)
+        VALUES (NEW.BookingDate, 1, max({_AMOUNT_CENTS.format(ref='NEW')}, 0), min({_AMOUNT_CENTS.format(ref='NEW')}, 0))
+        ON CONFLICT (Day) DO UPDATE SET
+            TransactionCount = TransactionCount + 1,
+            InflowCents = InflowCents + excluded.InflowCents,
+            OutflowCents = OutflowCents + excluded.OutflowCents;"""
+
+_SUB_CASHFLOW = f"""
+        UPDATE DailyCashflow
+        SET TransactionCount = TransactionCount - 1,
+            InflowCents = InflowCents - max({_AMOUNT_CENTS.format(ref='OLD')}, 0),
+            OutflowCents = OutflowCents - min({_AMOUNT_CENTS.format(ref='OLD')}, 0)
+        WHERE Day = OLD.BookingDate;
+        DELETE FROM DailyCashflow WHERE Day = OLD.BookingDate AND TransactionCount <= 0;"""
+
+# Kompletter Neuaufbau aus den Quelltabellen (Backfill der Migration + CLI-Reparatur)
+_ORDER_REVENUE_BACKFILL = [
+    'DELETE FROM "DailyOrderRevenue"',
+    f"""
+    INSERT INTO "DailyOrderRevenue" (Day, OrderCount, RevenueCents)
+    SELECT {_ORDER_DAY.format(ref='Orders')}, COUNT(*), SUM(OrderAmount)
+    FROM Orders
+    WHERE IsArchived = 0
+    GROUP BY 1
+    """,
+]
+
+ROLLUP_BACKFILL = _ORDER_REVENUE_BACKFILL + [
+    'DELETE FROM "DailyCashflow"',
+    f"""
+    INSERT INTO "DailyCashflow" (Day, TransactionCount, InflowCents, OutflowCents)
+    SELECT BookingDate, COUNT(*),
+           SUM(max({_AMOUNT_CENTS.format(ref='BankTransactions')}, 0)),
+           SUM(min({_AMOUNT_CENTS.format(ref='BankTransactions')}, 0))
+    FROM BankTransactions
+    GROUP BY BookingDate
+    """,
+]
+
+_ORDER_REVENUE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_Orders_insert_rollup"
+    AFTER INSERT ON "Orders"
+    WHEN NEW.IsArchived = 0
+    BEGIN{_ADD_ORDER_REVENUE}
+    END
+    """,
+    # Beim UPDATE: alten Beitrag abziehen, neuen addieren (z.B. Archivierung, Betragskorrektur)
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_Orders_update_rollup_old"
+    AFTER UPDATE OF "OrderDate", "OrderAmount", "IsArchived" ON "Orders"
+    WHEN OLD.IsArchived = 0
+    BEGIN{_SUB_ORDER_REVENUE}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_Orders_update_rollup_new"
+    AFTER UPDATE OF "OrderDate", "OrderAmount", "IsArchived" ON "Orders"
+    WHEN NEW.IsArchived = 0
+    BEGIN{_ADD_ORDER_REVENUE}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_Orders_delete_rollup"
+    AFTER DELETE ON "Orders"
+    WHEN OLD.IsArchived = 0
+    BEGIN{_SUB_ORDER_REVENUE}
+    END
+    """,
+]
+
+DAILY_ROLLUPS = [
+    """
+    CREATE TABLE IF NOT EXISTS "DailyOrderRevenue" (
+        "Day" TEXT NOT NULL PRIMARY KEY,              -- YYYY-MM-DD
+        "OrderCount" INTEGER NOT NULL DEFAULT 0,
+        "RevenueCents" INTEGER NOT NULL DEFAULT 0     -- nur nicht archivierte Bestellungen
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "DailyCashflow" (
+        "Day" TEXT NOT NULL PRIMARY KEY,              -- YYYY-MM-DD (BookingDate)
+        "TransactionCount" INTEGER NOT NULL DEFAULT 0,
+        "InflowCents" INTEGER NOT NULL DEFAULT 0,     -- Summe der Einnahmen (>= 0)
+        "OutflowCents" INTEGER NOT NULL DEFAULT 0     -- Summe der Ausgaben (<= 0)
+    )
+    """,
+] + _ORDER_REVENUE_TRIGGERS + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_BankTransactions_insert_rollup"
+    AFTER INSERT ON "BankTransactions"
+    BEGIN{_ADD_CASHFLOW}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_BankTransactions_update_rollup"
+    AFTER UPDATE OF "BookingDate", "Amount" ON "BankTransactions"
+    BEGIN{_SUB_CASHFLOW}{_ADD_CASHFLOW}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "trg_BankTransactions_delete_rollup"
+    AFTER DELETE ON "BankTransactions"
+    BEGIN{_SUB_CASHFLOW}
+    END
+    """,
+] + ROLLUP_BACKFILL
+
+# Version 9: Sync-Wasserstand je Bankkonto
+# sync_bank_balance holt nur noch das Delta ab LastBookingDate (minus kleiner Überlappung)
+# statt jedes Mal 30 Tage; LastSequenceNo ist die höchste vergebene NMSC-Primanota.
+# Der volle 30-Tage-Abgleich läuft als eigener, seltener Job (LastFullSync).
+BANK_SYNC_WATERMARK = [
+    'ALTER TABLE "BankAccounts" ADD COLUMN "LastBookingDate" TEXT',
+    'ALTER TABLE "BankAccounts" ADD COLUMN "LastSequenceNo" INTEGER NOT NULL DEFAULT 0',
+    'ALTER TABLE "BankAccounts" ADD COLUMN "LastFullSync" TEXT',
+    """
+    UPDATE "BankAccounts" SET
+        "LastBookingDate" = (
+            SELECT MAX(t.BookingDate) FROM BankTransactions t WHERE t.AccountID = BankAccounts.AccountID
+        ),
+        "LastSequenceNo" = COALESCE((
+            SELECT MAX(CAST(SUBSTR(t.Primanota, 6) AS INTEGER)) FROM BankTransactions t
+            WHERE t.AccountID = BankAccounts.AccountID AND t.Primanota LIKE 'NMSC-%'
+        ), 0)
+    """,
+]
+
+# Version 10: Job-Leases für Hintergrundjobs (Bank-Sync, Mail-Versand)
+# Eine Zeile pro Job: wer hält die Lease bis wann (prozessübergreifende Sperre,
+# egal wie viele Gunicorn-Worker / Worker-Prozesse laufen) + Status des letzten Laufs.
+JOB_LEASES = [
+    """
+    CREATE TABLE IF NOT EXISTS "JobLeases" (
+        "JobName" TEXT NOT NULL PRIMARY KEY,
+        "Owner" TEXT,                                 -- host:pid:lauf-id, NULL = frei
+        "LeaseUntil" TEXT NOT NULL DEFAULT '',        -- abgelaufene Leases dürfen übernommen werden
+        "LastStartedAt" TEXT,
+        "LastFinishedAt" TEXT,
+        "LastDurationMs" INTEGER,
+        "LastStatus" TEXT,                            -- OK, FAILED, ERROR
+        "LastError" TEXT,
+        "RunCount" INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+]
+
+# Version 11: Idempotente Job-Erzeugung aus der BOM
+# JobKey = deterministischer Schlüssel pro Stück einer BOM-Zeile; zusammen mit der
+# Projekt-ID eindeutig → erneutes generate_jobs legt keine Duplikate an.
+# Altbestand ohne JobKey bleibt NULL (NULL-Werte kollidieren im UNIQUE-Index nicht).
+PRODUCTION_JOB_KEYS = [
+    'ALTER TABLE "ProductionJobs" ADD COLUMN "JobKey" TEXT',
+    'CREATE UNIQUE INDEX IF NOT EXISTS "idx_ProductionJobs_Project_JobKey" ON "ProductionJobs" ("SourceProjectID", "JobKey")',
+]
+
+# Version 12: Stückzahl-Jobs (ein Job pro BOM-Zeile statt pro Stück)
+# Quantity/CompletedQuantity am Job; jeder Queue-Eintrag ist eine Druckplatte mit
+# Quantity Stück. Bestehende Zeilen sind Einzelstück-Jobs (Quantity = 1).
+BATCHED_PRODUCTION_JOBS = [
+    'ALTER TABLE "ProductionJobs" ADD COLUMN "Quantity" INTEGER NOT NULL DEFAULT 1',
+    'ALTER TABLE "ProductionJobs" ADD COLUMN "CompletedQuantity" INTEGER NOT NULL DEFAULT 0',
+    'ALTER TABLE "PrinterQueues" ADD COLUMN "Quantity" INTEGER NOT NULL DEFAULT 1',
+    # Summe der eingeplanten Stück je Job (offene Menge im Job-Pool)
+    'CREATE INDEX IF NOT EXISTS "idx_PrinterQueues_JobID" ON "PrinterQueues" ("JobID")',
+]
+
+# Version 13: Automatische Druckerplanung (website/print_scheduler.py)
+# Drucker: Düse und erlaubte Materialien (NULL = keine Einschränkung);
+# Queue-Einträge: geplante Start-/Endzeit der jeweiligen Druckplatte.
+PRINT_SCHEDULING = [
+    'ALTER TABLE "Printers" ADD COLUMN "NozzleDiam" REAL',
+    'ALTER TABLE "Printers" ADD COLUMN "Materials" TEXT',
+    'ALTER TABLE "PrinterQueues" ADD COLUMN "PlannedStart" DATETIME',
+    'ALTER TABLE "PrinterQueues" ADD COLUMN "PlannedEnd" DATETIME',
+]
+
+# Version 14: Dünn besetzte Queue-Ränge (website/queue_ranks.py)
+# Position ist ab jetzt ein Rang mit Lücken statt 1, 2, 3, ... → Einreihen,
+# Entfernen und Verschieben schreiben nur noch eine Zeile.
+SPARSE_QUEUE_RANKS = [
+    'UPDATE "PrinterQueues" SET "Position" = "Position" * 1024',
+]
+
+# Version 15: Versionszähler 'queue' für das Drucker-Board (ETag von /admin/get_printers)
+# Zählt bei jeder Änderung an Druckern, Queues oder den im Board angezeigten Jobfeldern.
+_QUEUE_VERSION_TRIGGERS = (
+    ('queue', 'PrinterQueues', 'INSERT'),
+    ('queue', 'PrinterQueues', 'UPDATE'),
+    ('queue', 'PrinterQueues', 'DELETE'),
+    ('queue', 'Printers', 'INSERT'),
+    ('queue', 'Printers', 'UPDATE'),
+    ('queue', 'Printers', 'DELETE'),
+    ('queue', 'ProductionJobs', 'UPDATE OF "PartName", "PrintTimeMin", "Quantity"'),
+)
+
+QUEUE_VERSION = [
+    """INSERT OR IGNORE INTO "DataVersions" ("Name", "Version") VALUES ('queue', 0)""",
+] + [_data_version_trigger(*trigger) for trigger in _QUEUE_VERSION_TRIGGERS]
+
+# Version 16: SHA-256 der hochgeladenen Dateien (wird beim Streamen berechnet, website/uploads.py)
+FILE_HASHES = [
+    'ALTER TABLE "Files" ADD COLUMN "SHA256" TEXT',
+    'CREATE INDEX IF NOT EXISTS "idx_Files_SHA256" ON "Files" ("SHA256")',
+]
+
+# Version 17: Umsatz-Rollup mit OrderAmount unverändert (bereits in Cent)
+# Eine Zwischenfassung von Version 8 hat OrderAmount zusätzlich mit 100 multipliziert →
+# Trigger neu anlegen und DailyOrderRevenue neu aufbauen (bei frischen DBs ohne Wirkung).
+ORDER_REVENUE_CENTS = [
+    'DROP TRIGGER IF EXISTS "trg_Orders_insert_rollup"',
+    'DROP TRIGGER IF EXISTS "trg_Orders_update_rollup_old"',
+    'DROP TRIGGER IF EXISTS "trg_Orders_update_rollup_new"',
+    'DROP TRIGGER IF EXISTS "trg_Orders_delete_rollup"',
+] + _ORDER_REVENUE_TRIGGERS + _ORDER_REVENUE_BACKFILL
+
+# (Version, Beschreibung, Statements) – aufsteigend sortiert
+MIGRATIONS = [
+    (1, "Basisschema", BASELINE_SCHEMA),
+    (2, "Indizes für Hot-Lookup-Spalten", HOT_LOOKUP_INDEXES),
+    (3, "CurrentProductPrices-Projektion inkl. Trigger", CURRENT_PRODUCT_PRICES),
+    (4, "FTS5-Suchindex ProductSearch inkl. Trigger", PRODUCT_SEARCH_INDEX),
+    (5, "Sortier-Indizes für die Shop-Pagination", SHOP_KEYSET_INDEXES),
+    (6, "Mail-Outbox", MAIL_OUTBOX),
+    (7, "Datenversionen für Dashboard-Caches", DATA_VERSIONS),
+    (8, "Tages-Rollups für Umsatz und Bank-Cashflow", DAILY_ROLLUPS),
+    (9, "Sync-Wasserstand für Bankkonten", BANK_SYNC_WATERMARK),
+    (10, "Job-Leases für Hintergrundjobs", JOB_LEASES),
+    (11, "Idempotente Job-Erzeugung (JobKey)", PRODUCTION_JOB_KEYS),
+    (12, "Stückzahl-Jobs und Teilmengen in der Drucker-Queue", BATCHED_PRODUCTION_JOBS),
+    (13, "Automatische Druckerplanung", PRINT_SCHEDULING),
+    (14, "Dünn besetzte Queue-Ränge", SPARSE_QUEUE_RANKS),
+    (15, "Datenversion für das Drucker-Board", QUEUE_VERSION),
+    (16, "SHA-256 für hochgeladene Dateien", FILE_HASHES),
+    (17, "Umsatz-Rollup: OrderAmount bereits in Cent", ORDER_REVENUE_CENTS),
+]
+
+
+# =================================================================
+# HOT QUERIES (EXPLAIN QUERY PLAN)
+# =================================================================
+# Die Prädikate stammen 1:1 aus den Managern. Fällt eine davon auf einen
+# Full-Table-Scan zurück (fehlender / nicht nutzbarer Index), schlägt check_query_plans() an.
+HOT_QUERIES = [
+    ("ProductPrices: aktueller Preis (Neuberechnung im Projektions-Trigger)",
+     "SELECT ProductID, PriceID, ProductPrice, DateAdded FROM ProductPrices WHERE ProductID = ? "
+     "ORDER BY DateAdded DESC, rowid DESC LIMIT 1", ('PROD_x',)),
+    ("CurrentProductPrices: Shop-Liste mit Preis",
+     "SELECT p.ProductID, lp.ProductPrice FROM Products p "
+     "LEFT JOIN CurrentProductPrices lp ON lp.ProductID = p.ProductID WHERE p.ProductID = ?", ('PROD_x',)),
+    ("Projects: Projekte eines Users nach Status",
+     "SELECT COUNT(ProjectID) FROM Projects WHERE UserID = ? AND Status = 'UNDER_REVIEW'", ('USER_x',)),
+    ("ProjectMessages: Verlauf eines Projekts",
+     "SELECT * FROM ProjectMessages WHERE ProjectID = ? ORDER BY Timestamp ASC", ('PROJ_x',)),
+    ("Orders: Bestellungen eines Users",
+     "SELECT * FROM Orders WHERE UserID = ? ORDER BY OrderDate DESC", ('USER_x',)),
+    ("Orders: Bestellung zu einem Projekt",
+     "SELECT OrderID, OrderStatus FROM Orders WHERE SourceProjectID = ? LIMIT 1", ('PROJ_x',)),
+    ("ProductionJobs: Jobs nach Status",
+     "SELECT JobID, Priority FROM ProductionJobs WHERE JobStatus = ? ORDER BY Priority ASC, JobID DESC", ('QUEUED',)),
+    ("PrinterQueues: vorderster Rang (queue_ranks.front_rank)",
+     "SELECT MIN(Position) AS Rank FROM PrinterQueues WHERE PrinterID = ?", ('PRNT_x',)),
+    ("PrinterQueues: hinterster Rang (queue_ranks.end_rank)",
+     "SELECT MAX(Position) AS Rank FROM PrinterQueues WHERE PrinterID = ?", ('PRNT_x',)),
+    ("PrinterQueues: Queue eines Druckers in Reihenfolge",
+     "SELECT QueueID FROM PrinterQueues WHERE PrinterID = ? ORDER BY Position", ('PRNT_x',)),
+    ("BankTransactions: Multimenge im Datumsfenster (Duplikat-Prüfung)",
+     "SELECT BookingDate, Amount, Purpose, COUNT(*) FROM BankTransactions "
+     "WHERE AccountID = ? AND BookingDate BETWEEN ? AND ? GROUP BY BookingDate, Amount, Purpose",
+     ('ACC_x', '2024-01-01', '2024-01-31')),
+    ("Products: Produkt zu einem Projekt",
+     "SELECT ProductID FROM Products WHERE SourceProjectID = ?", ('PROJ_x',)),
+    ("Products: Shop-Seite (neueste, Keyset)",
+     "SELECT p.ProductID FROM Products p WHERE p.IsShopVisible = 1 AND p.IsActive = 1 "
+     "AND (p.CreatedAt, p.ProductID) < (?, ?) ORDER BY p.CreatedAt DESC, p.ProductID DESC LIMIT 25",
+     ('2100-01-01', 'PROD_x')),
+]
+
+
+def get_applied_versions(db_path=None):
+    """Liefert die Menge der bereits angewendeten Schema-Versionen."""
+    conn = get_connection(db_path)
+    conn.execute(SCHEMA_VERSION_TABLE)
+    return {row[0] for row in conn.execute('SELECT Version FROM SchemaVersions')}
+
+
+def run_migrations(db_path=None):
+    """
+    Wendet alle noch fehlenden Migrationen in aufsteigender Reihenfolge an.
+    Jede Version läuft in einer eigenen Transaktion (inkl. Eintrag in SchemaVersions).
+
+    Returns:
+        Liste der in diesem Lauf neu angewendeten Versionen.
+    Raises:
+        sqlite3.Error – die fehlgeschlagene Version wird komplett zurückgerollt.
+    """
+    conn = get_connection(db_path)
+    applied = get_applied_versions(db_path)
+    newly_applied = []
+
+    for version, description, statements in MIGRATIONS:
+        if version in applied:
+            continue
+
+        try:
+            # IMMEDIATE: Schreibsperre sofort holen, damit parallel startende Prozesse
+            # (Reloader, Worker) dieselbe Version nicht doppelt anwenden
+            conn.execute("BEGIN IMMEDIATE")
+            already_done = conn.execute(
+                'SELECT 1 FROM SchemaVersions WHERE Version = ?', (version,)
+            ).fetchone()
+
+            if not already_done:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(
+                    'INSERT INTO SchemaVersions (Version, Description, AppliedAt) VALUES (?, ?, ?)',
+                    (version, description, datetime.datetime.now().isoformat())
+                )
+                newly_applied.append(version)
+
+            conn.commit()
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error(f"❌ Migration {version} ({description}) fehlgeschlagen: {e}")
+            raise
+
+        if not already_done:
+            logger.info(f"🗄️ Migration {version} angewendet: {description}")
+
+    return newly_applied
+
+
+def check_query_plans(db_path=None):
+    """
+    Prüft per EXPLAIN QUERY PLAN, dass keine Hot Query auf einen Full-Table-Scan zurückfällt.
+
+    Returns:
+        Liste von (Query-Name, Plan-Zeile) für jede Abfrage mit Full Scan (leer = alles ok).
+    """
+    conn = get_connection(db_path)
+    violations = []
+
+    for name, query, params in HOT_QUERIES:
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall():
+            detail = row['detail']
+            # "SCAN Orders" = Full Scan; "SEARCH/SCAN ... USING (COVERING) INDEX" sind ok.
+            # (SQLite meldet Min/Max-Lookups ohne Index als "SEARCH Tabelle" ohne USING.)
+            if detail.startswith(('SCAN ', 'SEARCH ')) and ' USING ' not in detail:
+                violations.append((name, detail))
+
+    return violations
+
+
+def rebuild_rollups(db_path=None):
+    """
+    Baut DailyOrderRevenue / DailyCashflow komplett neu aus Orders und BankTransactions auf
+    (Backfill, z.B. nach manuellen Korrekturen direkt in der DB).
+
+    Returns:
+        (Anzahl Umsatz-Tage, Anzahl Cashflow-Tage)
+    """
+    conn = get_connection(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for statement in ROLLUP_BACKFILL:
+            conn.execute(statement)
+        conn.commit()
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.rollback()
+        logger.error(f"❌ Neuaufbau der Rollups fehlgeschlagen: {e}")
+        raise
+
+    order_days = conn.execute('SELECT COUNT(*) FROM DailyOrderRevenue').fetchone()[0]
+    cashflow_days = conn.execute('SELECT COUNT(*) FROM DailyCashflow').fetchone()[0]
+    logger.info(f"📊 Rollups neu aufgebaut: {order_days} Umsatz-Tage, {cashflow_days} Cashflow-Tage")
+    return order_days, cashflow_days
+
+
+def main(argv=None):
+    """Kommandozeile: python -m website.migrations [--db PFAD] [--check | --rebuild-rollups]"""
+    parser = argparse.ArgumentParser(description="Schema-Migrationen der 3DButler-Datenbank")
+    parser.add_argument('--db', help="Pfad zur Datenbank (Standard: DB_PATH aus der .env)")
+    parser.add_argument('--check', action='store_true',
+                        help="Nur prüfen: fehlende Versionen und Full Scans in Hot Queries melden")
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help="Tages-Rollups (DailyOrderRevenue, DailyCashflow) komplett neu aufbauen")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    if args.rebuild_rollups:
+        run_migrations(args.db)
+        order_days, cashflow_days = rebuild_rollups(args.db)
+        print(f"Rollups neu aufgebaut: {order_days} Umsatz-Tage, {cashflow_days} Cashflow-Tage.")
+        return 0
+
+    if args.check:
+        pending = [v for v, _, _ in MIGRATIONS if v not in get_applied_versions(args.db)]
+        if pending:
+            # Ohne aktuelles Schema ist die Plan-Prüfung nicht aussagekräftig
+            print(f"Ausstehende Migrationen: {pending}")
+            return 1
+    else:
+        run_migrations(args.db)
+        pending = []
+
+    violations = check_query_plans(args.db)
+    for name, detail in violations:
+        print(f"FULL SCAN in '{name}': {detail}")
+
+    if violations:
+        return 1
+
+    print("Schema aktuell, alle Hot Queries nutzen einen Index.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,82 +1,11 @@
-import os
 import uuid
-import sqlite3
 from datetime import datetime
-# Importiere die Klasse, die die _execute_query-Methode implementiert (z.B. DatabaseManager)
+# Importiere die Klasse, die die _execute_query-Methode implementiert (DatabaseManager)
+from .database import DatabaseManager
 # TODO: alle  INSERTs in eine Transaktion packen (multi_queries=True), aktuell noch  separate _execute_query → Race-Condition möglich
-class OrderManager:
+class OrderManager(DatabaseManager):
     """Verwaltet alle Bestell- und Zahlungsvorgänge."""
 
-    def __init__(self):
-        self.db_path = os.getenv('DB_PATH')
-
-    def _execute_query(
-        self,
-        query,
-        params=(),
-        fetch=False,
-        get_lastrowid=False,
-        fetch_one=False,
-        multi_queries=False
-    ):
-        """
-        Erweiterte DB-Execution mit Unterstützung für mehrere Queries in einer Transaktion.
-    
-        Args:
-            query: 
-                - str → einzelner SQL-String
-                - list of (query_str, params_tuple) → mehrere Queries (nur bei multi_queries=True)
-            params: Parameter für einzelne Query (tuple)
-            fetch: Soll ein Resultset zurückgegeben werden? (SELECT)
-            get_lastrowid: Soll cursor.lastrowid zurückgegeben werden? (INSERT)
-            fetch_one: fetchone() statt fetchall()
-            multi_queries: True → query ist Liste von (query, params)-Tuplen
-    
-        Returns:
-            - Bei fetch: sqlite3.Row oder Liste von sqlite3.Row
-            - Bei get_lastrowid: int (lastrowid)
-            - Sonst: None
-            - Bei Fehler: wirft sqlite3.Error
-        """
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            # ── Wichtig: row_factory für dict-ähnlichen Zugriff ──
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-    
-            if multi_queries and isinstance(query, list):
-                # Mehrere Queries → Transaktion
-                cursor.execute("BEGIN TRANSACTION")
-                for q, p in query:
-                    cursor.execute(q, p)
-                conn.commit()
-            else:
-                # Einzelne Query
-                cursor.execute(query, params)
-                conn.commit()
-    
-            # Ergebnis abholen (nur bei SELECT relevant)
-            if fetch:
-                if fetch_one:
-                    return cursor.fetchone()           # → sqlite3.Row oder None
-                return cursor.fetchall()               # → Liste von sqlite3.Row
-    
-            # Letzte eingefügte ID (für INSERT)
-            if get_lastrowid:
-                return cursor.lastrowid
-    
-            # Standard-Rückgabe (UPDATE, DELETE, INSERT ohne ID-Interesse)
-            return None
-    
-        except sqlite3.Error as e:
-            if conn:
-                conn.rollback()
-            raise  # Fehler weiterwerfen – aufrufende Methode kann loggen/flashen
-        
-        finally:
-            if conn:
-                conn.close()
     # Hilfsfunktion (muss in der DB-Zugriffsklasse existieren)
     # Annahme: Holen der ersten gültigen Adresse und Zahlungsmethode des Kunden, da diese
     # auf der Checkout-Seite später ausgewählt werden.
@@ -466,10 +395,8 @@ class OrderManager:
             SELECT cp.ProductID, cp.Quantity, sc.CartID, pp.ProductPrice
             FROM CartPositions cp 
             JOIN ShoppingCarts sc ON cp.CartID = sc.CartID
-            JOIN ProductPrices pp ON cp.ProductID = pp.ProductID
-            WHERE sc.UserID = ? AND pp.DateAdded = (
-                SELECT MAX(DateAdded) FROM ProductPrices WHERE ProductID = pp.ProductID
-            )
+            JOIN CurrentProductPrices pp ON cp.ProductID = pp.ProductID
+            WHERE sc.UserID = ?
         """
         cart_items = self._execute_query(query_cart, (user_id,), fetch=True)
         if not cart_items:
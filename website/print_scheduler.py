@@ -0,0 +1,386 @@
+import uuid
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+from .database import DatabaseManager
+from .event_bus import publish
+from .queue_ranks import RANK_STEP
+
+logger = logging.getLogger(__name__)
+
+# =================================================================
+# DRUCKERPLANUNG: QUEUED-Jobs automatisch auf die Drucker verteilen
+# =================================================================
+# List-Scheduling mit LPT-Reihenfolge (Longest Processing Time first):
+#   1. offene Jobs nach Priorität (1 = dringend), innerhalb gleicher Priorität
+#      nach Restdruckzeit absteigend sortieren
+#   2. jede Druckplatte auf den passenden Drucker legen, der am frühesten frei ist
+#      (bei Gleichstand der günstigere nach CostPerMin)
+# "Passend" = Bauraum (XY auch um 90° gedreht), Düse und Material.
+#
+# Inkrementell: schedule_open_jobs() plant nur noch nicht eingeplante Stück und
+# hängt sie hinter das geplante Ende jeder Queue; bestehende Einträge und ihre
+# Zeiten bleiben unangetastet. refresh_timelines() rechnet nach manuellen
+# Änderungen (Einreihen, Entfernen, Platte fertig) nur die betroffenen Drucker neu.
+
+# Mindestabstand zwischen zwei Teilen auf der Druckplatte (für die Plattenbelegung)
+PLATE_SPACING_MM = 5
+
+# Drucker in diesem Status bekommen keine neuen Jobs
+UNAVAILABLE_PRINTER_STATUSES = {'offline', 'maintenance'}
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def units_per_plate(job, printer):
+    """
+    Wie viele Stück des Jobs passen nebeneinander auf die Druckplatte des Druckers?
+    Einfaches Raster mit PLATE_SPACING_MM Abstand; Teil wird bei Bedarf um 90° gedreht.
+    """
+    dx, dy = job['DimX'] or 0, job['DimY'] or 0
+    if dx <= 0 or dy <= 0:
+        return 1
+
+    def grid(part_x, part_y):
+        cols = int((printer['DimX'] + PLATE_SPACING_MM) // (part_x + PLATE_SPACING_MM))
+        rows = int((printer['DimY'] + PLATE_SPACING_MM) // (part_y + PLATE_SPACING_MM))
+        return cols * rows
+
+    return max(1, grid(dx, dy), grid(dy, dx))
+
+
+def fits_build_volume(job, printer):
+    """Passt ein Stück in den Bauraum (XY auch um 90° gedreht)? Fehlende Maße gelten als passend."""
+    dx, dy, dz = job['DimX'] or 0, job['DimY'] or 0, job['DimZ'] or 0
+    px, py, pz = printer['DimX'], printer['DimY'], printer['DimZ']
+    fits_xy = (dx <= px and dy <= py) or (dy <= px and dx <= py)
+    return fits_xy and dz <= pz
+
+
+def _parse_materials(materials):
+    """'PLA, petg' → {'PLA', 'PETG'}; leer/NULL → None (keine Einschränkung)."""
+    names = {m.strip().upper() for m in (materials or '').split(',') if m.strip()}
+    return names or None
+
+
+def is_compatible(job, printer):
+    """Bauraum, Düse und Material eines Jobs gegen einen Drucker prüfen."""
+    if not fits_build_volume(job, printer):
+        return False
+
+    nozzle = printer['NozzleDiam']
+    if nozzle and job['NozzleDiam'] and abs(job['NozzleDiam'] - nozzle) > 1e-6:
+        return False
+
+    allowed = printer['MaterialSet']
+    if allowed is not None and (job['MaterialName'] or '').upper() not in allowed:
+        return False
+
+    return True
+
+
+def plan_schedule(printers, jobs, ready_at):
+    """
+    Reine Planungsfunktion (ohne DB) – verteilt die offenen Stück auf die Drucker.
+
+    Args:
+        printers: Liste von dicts (PrinterID, DimX/Y/Z, CostPerMin, NozzleDiam, MaterialSet)
+        jobs:     Liste von dicts (JobID, Priority, PrintTimeMin, OpenQuantity, DimX/Y/Z,
+                  NozzleDiam, MaterialName)
+        ready_at: PrinterID → Minuten ab jetzt, ab denen der Drucker frei ist
+
+    Returns:
+        (plates, unschedulable)
+        plates:        Liste von (PrinterID, JobID, Stück, Start-Minute, End-Minute)
+        unschedulable: JobIDs, für die es keinen passenden Drucker gibt
+    """
+    ready = {p['PrinterID']: ready_at.get(p['PrinterID'], 0.0) for p in printers}
+    plates, unschedulable = [], []
+    # Viele Jobs teilen sich Maße/Düse/Material → Drucker-Kandidaten nur einmal ermitteln
+    candidates_cache = {}
+
+    # LPT: dringende zuerst, innerhalb einer Priorität die längsten Restzeiten zuerst
+    order = sorted(
+        jobs,
+        key=lambda j: (j['Priority'] or 3, -(j['PrintTimeMin'] or 0) * j['OpenQuantity'], j['JobID'])
+    )
+
+    for job in order:
+        key = (job['DimX'], job['DimY'], job['DimZ'], job['NozzleDiam'], job['MaterialName'])
+        candidates = candidates_cache.get(key)
+        if candidates is None:
+            candidates = [p for p in printers if is_compatible(job, p)]
+            candidates_cache[key] = candidates
+
+        if not candidates:
+            unschedulable.append(job['JobID'])
+            continue
+
+        open_qty = job['OpenQuantity']
+        while open_qty > 0:
+            # Drucker, der am frühesten frei ist (Gleichstand: günstiger)
+            printer = min(candidates, key=lambda p: (ready[p['PrinterID']], p['CostPerMin'] or 0))
+            printer_id = printer['PrinterID']
+
+            quantity = min(open_qty, units_per_plate(job, printer))
+            start = ready[printer_id]
+            end = start + (job['PrintTimeMin'] or 0) * quantity
+            ready[printer_id] = end
+
+            plates.append((printer_id, job['JobID'], quantity, start, end))
+            open_qty -= quantity
+
+    return plates, unschedulable
+
+
+class PrintScheduler(DatabaseManager):
+    """Datenbankseite der Druckerplanung (PrinterQueues, PlannedStart/PlannedEnd)."""
+
+    def _load_printers(self, cursor):
+        """Alle verfügbaren Drucker inkl. Fähigkeiten (Düse, Materialliste)."""
+        cursor.execute("""
+            SELECT PrinterID, PrinterStatus, DimX, DimY, DimZ, CostPerMin, NozzleDiam, Materials
+            FROM Printers
+        """)
+        printers = []
+        for row in cursor.fetchall():
+            if (row['PrinterStatus'] or '').lower() in UNAVAILABLE_PRINTER_STATUSES:
+                continue
+            printer = dict(row)
+            printer['MaterialSet'] = _parse_materials(row['Materials'])
+            printers.append(printer)
+        return printers
+
+    def _load_open_jobs(self, cursor):
+        """QUEUED-Jobs mit Stück, die weder gedruckt noch schon eingeplant sind."""
+        cursor.execute("""
+            SELECT j.JobID, j.Priority, j.PrintTimeMin, j.DimX, j.DimY, j.DimZ, j.NozzleDiam,
+                   m.MaterialName,
+                   j.Quantity - j.CompletedQuantity - COALESCE(q.AssignedQuantity, 0) AS OpenQuantity
+            FROM ProductionJobs j
+            LEFT JOIN Materials m ON m.MaterialID = j.MaterialID
+            LEFT JOIN (
+                SELECT JobID, SUM(Quantity) AS AssignedQuantity
+                FROM PrinterQueues
+                GROUP BY JobID
+            ) q ON q.JobID = j.JobID
+            WHERE j.JobStatus = 'QUEUED'
+              AND j.Quantity - j.CompletedQuantity - COALESCE(q.AssignedQuantity, 0) > 0
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def _compute_timelines(self, cursor, now, printer_ids=None):
+        """
+        Berechnet Start/Ende aller Queue-Einträge (Position aufsteigend) der Drucker.
+        Ein laufender Druck ganz vorne (PlannedStart <= jetzt < PlannedEnd) behält
+        seine Zeiten; alles danach schließt lückenlos an.
+
+        Returns:
+            (updates, ready_at, tails)
+            updates:  [(PlannedStart, PlannedEnd, QueueID), ...] – nur geänderte Einträge
+            ready_at: PrinterID → Minuten ab jetzt, ab denen der Drucker frei ist
+            tails:    PrinterID → höchster vergebener Rang (Position)
+        """
+        query = """
+            SELECT q.QueueID, q.PrinterID, q.Position, q.PlannedStart, q.PlannedEnd,
+                   COALESCE(j.PrintTimeMin, 0) * q.Quantity AS PlateTimeMin
+            FROM PrinterQueues q
+            JOIN ProductionJobs j ON j.JobID = q.JobID
+        """
+        params = ()
+        if printer_ids is not None:
+            query += f" WHERE q.PrinterID IN ({', '.join('?' for _ in printer_ids)})"
+            params = tuple(printer_ids)
+        cursor.execute(query + " ORDER BY q.PrinterID, q.Position", params)
+
+        now_str = now.strftime(_TIME_FORMAT)
+        updates, ready_at, tails = [], {}, {}
+
+        for row in cursor.fetchall():
+            printer_id = row['PrinterID']
+            offset = ready_at.get(printer_id)
+
+            if offset is None:
+                offset = 0.0
+                running = (row['PlannedStart'] and row['PlannedEnd']
+                           and row['PlannedStart'] <= now_str < row['PlannedEnd'])
+                if running:
+                    # Laufender Druck: Zeiten stehen lassen, Rest startet an seinem Ende
+                    end = datetime.strptime(row['PlannedEnd'], _TIME_FORMAT)
+                    ready_at[printer_id] = (end - now).total_seconds() / 60
+                    tails[printer_id] = row['Position']
+                    continue
+
+            end_offset = offset + row['PlateTimeMin']
+            planned = (_at(now, offset), _at(now, end_offset))
+            if planned != (row['PlannedStart'], row['PlannedEnd']):
+                updates.append(planned + (row['QueueID'],))
+            ready_at[printer_id] = end_offset
+            tails[printer_id] = row['Position']
+
+        return updates, ready_at, tails
+
+    def _queue_tails(self, cursor, now):
+        """
+        Ende jeder Queue laut bestehender Planung, ohne sie neu zu rechnen.
+
+        Returns:
+            (ready_at, tails, unplanned)
+            unplanned: Drucker mit Einträgen ohne Planzeiten (z.B. manuell eingereiht)
+        """
+        cursor.execute("""
+            SELECT PrinterID, MAX(Position) AS Tail, MAX(PlannedEnd) AS LastEnd,
+                   COUNT(*) - COUNT(PlannedEnd) AS Unplanned
+            FROM PrinterQueues
+            GROUP BY PrinterID
+        """)
+        ready_at, tails, unplanned = {}, {}, []
+        for row in cursor.fetchall():
+            if row['Unplanned'] or not row['LastEnd']:
+                unplanned.append(row['PrinterID'])
+                continue
+            last_end = datetime.strptime(row['LastEnd'], _TIME_FORMAT)
+            # Überzogene Planung (Ende liegt in der Vergangenheit) → ab jetzt weiter
+            ready_at[row['PrinterID']] = max(0.0, (last_end - now).total_seconds() / 60)
+            tails[row['PrinterID']] = row['Tail']
+        return ready_at, tails, unplanned
+
+    def _job_ids_on_printers(self, cursor, printer_ids):
+        """Alle Jobs, die mindestens eine Platte auf einem der Drucker haben."""
+        if not printer_ids:
+            return set()
+        cursor.execute(
+            f"SELECT DISTINCT JobID FROM PrinterQueues WHERE PrinterID IN ({', '.join('?' for _ in printer_ids)})",
+            tuple(printer_ids)
+        )
+        return {row['JobID'] for row in cursor.fetchall()}
+
+    def _sync_job_plans(self, cursor, job_ids):
+        """
+        Überträgt die Plattenzeiten auf ProductionJobs.PlannedStart/PlannedEnd
+        (frühester Start / spätestes Ende aller Platten eines Jobs) und setzt sie
+        bei QUEUED-Jobs zurück, die keine Platte mehr in einer Queue haben.
+        """
+        cursor.executemany("""
+            UPDATE ProductionJobs
+            SET PlannedStart = (SELECT MIN(q.PlannedStart) FROM PrinterQueues q WHERE q.JobID = ProductionJobs.JobID),
+                PlannedEnd = (SELECT MAX(q.PlannedEnd) FROM PrinterQueues q WHERE q.JobID = ProductionJobs.JobID)
+            WHERE JobID = ?
+        """, [(job_id,) for job_id in job_ids])
+
+        # Aus allen Queues entfernte, noch offene Jobs sind nicht mehr eingeplant
+        cursor.execute("""
+            UPDATE ProductionJobs SET PlannedStart = NULL, PlannedEnd = NULL
+            WHERE JobStatus = 'QUEUED' AND PlannedStart IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM PrinterQueues q WHERE q.JobID = ProductionJobs.JobID)
+        """)
+
+    def schedule_open_jobs(self):
+        """
+        Plant alle offenen Stück der QUEUED-Jobs automatisch ein (hinten an die Queues).
+
+        Returns:
+            (True, Ergebnis-dict) oder (False, Fehlermeldung)
+        """
+        now = datetime.now().replace(microsecond=0)
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            # Eine Schreibtransaktion: niemand reiht zwischen Lesen und Einplanen etwas ein
+            cursor.execute("BEGIN IMMEDIATE")
+
+            printers = self._load_printers(cursor)
+            jobs = self._load_open_jobs(cursor)
+
+            # Bestehende Planung übernehmen; nur Queues ohne vollständige Zeiten neu rechnen
+            ready_at, tails, unplanned = self._queue_tails(cursor, now)
+            timeline_updates = []
+            if unplanned:
+                timeline_updates, stale_ready, stale_tails = self._compute_timelines(cursor, now, unplanned)
+                ready_at.update(stale_ready)
+                tails.update(stale_tails)
+
+            plates, unschedulable = plan_schedule(printers, jobs, ready_at)
+
+            rows = []
+            for printer_id, job_id, quantity, start, end in plates:
+                # Hinten anhängen: nächster freier Rang (siehe queue_ranks)
+                tails[printer_id] = tails.get(printer_id, 0) + RANK_STEP
+                rows.append((
+                    f"QUEUE_{uuid.uuid4()}", printer_id, job_id, tails[printer_id], quantity,
+                    _at(now, start), _at(now, end)
+                ))
+
+            cursor.executemany(
+                "UPDATE PrinterQueues SET PlannedStart = ?, PlannedEnd = ? WHERE QueueID = ?",
+                timeline_updates
+            )
+            cursor.executemany("""
+                INSERT INTO PrinterQueues (QueueID, PrinterID, JobID, Position, Quantity, PlannedStart, PlannedEnd)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._sync_job_plans(
+                cursor, self._job_ids_on_printers(cursor, unplanned) | {row[2] for row in rows}
+            )
+
+            conn.commit()
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error(f"❌ Automatische Druckerplanung fehlgeschlagen: {e}")
+            return False, f"Datenbankfehler bei der Planung: {e}"
+        finally:
+            cursor.close()
+
+        # Makespan: wann ist der letzte Drucker mit allem fertig?
+        horizon = max([end for *_, end in plates] + list(ready_at.values()), default=None)
+        result = {
+            "plates_planned": len(plates),
+            "jobs_planned": len({job_id for _, job_id, *_ in plates}),
+            "unschedulable": unschedulable,
+            "planned_until": _at(now, horizon) if horizon is not None else None,
+        }
+        if plates or timeline_updates:
+            publish('queue', printer_ids=sorted({printer_id for printer_id, *_ in plates} | set(unplanned)))
+            publish('jobs', job_ids=sorted({job_id for _, job_id, *_ in plates}))
+        if unschedulable:
+            logger.warning(f"⚠️ {len(unschedulable)} Job(s) passen auf keinen verfügbaren Drucker.")
+        logger.info(f"🗓️ Druckerplanung: {result['plates_planned']} Platten für {result['jobs_planned']} Jobs eingeplant.")
+        return True, result
+
+    def refresh_timelines(self, printer_ids):
+        """
+        Inkrementelle Neuplanung nach einer manuellen Änderung: nur die Zeiten der
+        genannten Drucker (und ihrer Jobs) werden neu berechnet.
+        """
+        printer_ids = [p for p in printer_ids if p]
+        if not printer_ids:
+            return True
+
+        now = datetime.now().replace(microsecond=0)
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            updates, _, _ = self._compute_timelines(cursor, now, printer_ids)
+            cursor.executemany(
+                "UPDATE PrinterQueues SET PlannedStart = ?, PlannedEnd = ? WHERE QueueID = ?",
+                updates
+            )
+            self._sync_job_plans(cursor, self._job_ids_on_printers(cursor, printer_ids))
+            conn.commit()
+            if updates:
+                publish('queue', printer_ids=printer_ids)  # neue Planzeiten / ETA
+            return True
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error(f"❌ Neuplanung der Drucker {printer_ids} fehlgeschlagen: {e}")
+            return False
+        finally:
+            cursor.close()
+
+
+def _at(now, minutes):
+    """Minuten-Offset ab now → DATETIME-String."""
+    return (now + timedelta(minutes=minutes)).strftime(_TIME_FORMAT)
@@ -1,80 +1,54 @@
 import os
+import json
+import random
+import base64
+import binascii
 import sqlite3
 import uuid
 from datetime import datetime
 from typing import List
+from .database import DatabaseManager
+from .search import build_match_query, BM25_WEIGHTS
+from .cache import TTLCache
+
+# Sortierungen des Shop-Katalogs: Schlüssel → (SQL-Ausdruck, Richtung).
+# Der Ausdruck darf nicht NULL werden, sonst ist der Keyset-Vergleich nicht eindeutig.
+# Gleichstände werden immer über p.ProductID aufgelöst (stabile Reihenfolge).
+SHOP_SORTS = {
+    'newest': ('p.CreatedAt', 'DESC'),
+    'price': ('COALESCE(lp.ProductPrice, 1e18)', 'ASC'),   # "Preis auf Anfrage" ans Ende
+    'name': ('p.ProductName COLLATE NOCASE', 'ASC'),
+    'relevance': ('s.SearchRank', 'ASC'),                  # nur mit Suchbegriff (bm25)
+}
+DEFAULT_SHOP_SORT = 'newest'
+
+# Facetten-Raster (Kategorie × Material → Anzahl) je Suchbegriff, kurz gecacht.
+# Schreibende Produkt-Methoden leeren den Cache sofort, die TTL deckt den Rest ab
+# (andere Worker-Prozesse, Produkte aus create_product_from_project).
+FACET_CACHE_TTL = 30  # Sekunden
+_facet_cache = TTLCache(maxsize=256, ttl=FACET_CACHE_TTL)
+# Eigener Schlüssel für Suchbegriffe ohne suchbare Wörter (z.B. '!!!' → kein Treffer),
+# damit sie nicht mit "keine Suche" ('' = ganzer Katalog) kollidieren
+_NO_MATCH_FACET_KEY = ('no-match',)
+
+# Stichproben-Pool für die Startseiten-Slideshow (ersetzt ORDER BY RANDOM()).
+# Hält nur die IDs aller sichtbaren Produkte; wird nach Ablauf der TTL bzw. bei
+# Sichtbarkeitsänderungen neu geladen. Ziehen = random.sample über die IDs.
+SLIDESHOW_POOL_TTL = 300  # Sekunden
+_slideshow_pool = TTLCache(maxsize=1, ttl=SLIDESHOW_POOL_TTL)
 
-class ProductManager:
-    def __init__(self):
-        self.db_path = os.getenv('DB_PATH')
-        
-    def _execute_query(
-        self,
-        query,
-        params=(),
-        fetch=False,
-        get_lastrowid=False,
-        fetch_one=False,
-        multi_queries=False
-    ):
-        """
-        Erweiterte DB-Execution mit Unterstützung für mehrere Queries in einer Transaktion.
-    
-        Args:
-            query: 
-                - str → einzelner SQL-String
-                - list of (query_str, params_tuple) → mehrere Queries (nur bei multi_queries=True)
-            params: Parameter für einzelne Query (tuple)
-            fetch: Soll ein Resultset zurückgegeben werden? (SELECT)
-            get_lastrowid: Soll cursor.lastrowid zurückgegeben werden? (INSERT)
-            fetch_one: fetchone() statt fetchall()
-            multi_queries: True → query ist Liste von (query, params)-Tuplen
-    
-        Returns:
-            - Bei fetch: sqlite3.Row oder Liste von sqlite3.Row
-            - Bei get_lastrowid: int (lastrowid)
-            - Sonst: None
-            - Bei Fehler: wirft sqlite3.Error
-        """
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            # ── Wichtig: row_factory für dict-ähnlichen Zugriff ──
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-    
-            if multi_queries and isinstance(query, list):
-                # Mehrere Queries → Transaktion
-                cursor.execute("BEGIN TRANSACTION")
-                for q, p in query:
-                    cursor.execute(q, p)
-                conn.commit()
-            else:
-                # Einzelne Query
-                cursor.execute(query, params)
-                conn.commit()
-    
-            # Ergebnis abholen (nur bei SELECT relevant)
-            if fetch:
-                if fetch_one:
-                    return cursor.fetchone()           # → sqlite3.Row oder None
-                return cursor.fetchall()               # → Liste von sqlite3.Row
-    
-            # Letzte eingefügte ID (für INSERT)
-            if get_lastrowid:
-                return cursor.lastrowid
-    
-            # Standard-Rückgabe (UPDATE, DELETE, INSERT ohne ID-Interesse)
-            return None
-    
-        except sqlite3.Error as e:
-            if conn:
-                conn.rollback()
-            raise  # Fehler weiterwerfen – aufrufende Methode kann loggen/flashen
-        
-        finally:
-            if conn:
-                conn.close()
+
+def _invalidate_shop_caches():
+    """Verwirft alle prozesslokalen Shop-Caches nach Produkt-Schreibzugriffen."""
+    _facet_cache.clear()
+    _slideshow_pool.clear()
+
+
+def _has_unsearchable_terms(search_query):
+    """True, wenn ein Suchbegriff eingegeben wurde, aber build_match_query nichts Suchbares findet."""
+    return bool(search_query and search_query.strip()) and not build_match_query(search_query)
+
+class ProductManager(DatabaseManager):
 
 # --- 1. Admin-Workflow (Review-Queue) ---
 
@@ -93,7 +67,8 @@ class ProductManager:
     def get_product_by_id(self, product_id: str) -> sqlite3.Row:
         """
         Ruft ein einzelnes Produkt ab (P.*, CreatorName) und fügt den 
-        aktuell gültigen Preis über die Subquery-Logik hinzu.
+        aktuell gültigen Preis aus CurrentProductPrices hinzu.
+        Produkte ohne Preis liefern None (→ get_system_product_by_id).
         """
         query = """
                 SELECT 
@@ -102,20 +77,15 @@ class ProductManager:
                     pp.ProductPrice
                 FROM Products p
                 LEFT JOIN Users u ON p.UserID = u.UserID -- LEFT statt INNER
-                LEFT JOIN ProductPrices pp ON p.ProductID = pp.ProductID COLLATE NOCASE -- Auch hier LEFT sicherer
+                JOIN CurrentProductPrices pp ON pp.ProductID = p.ProductID
                 WHERE p.ProductID = ? COLLATE NOCASE
-            AND pp.DateAdded = (
-                SELECT MAX(DateAdded)
-                FROM ProductPrices 
-                WHERE ProductID = pp.ProductID
-            )
         """
         return self._execute_query(query, (product_id,), fetch=True, fetch_one=True)
     
     def get_system_product_by_id(self, product_id: str) -> sqlite3.Row:
         """
         Ruft ein einzelnes Produkt ab (P.*, CreatorName) und ergänzt den
-        aktuell gültigen Preis aus ProductPrices (neuester Eintrag nach DateAdded).
+        aktuell gültigen Preis aus CurrentProductPrices (neuester Eintrag nach DateAdded).
         Kann NULL sein, falls noch kein Preis hinterlegt wurde (z.B. System-Produkte).
         """
         query = """
@@ -125,15 +95,7 @@ class ProductManager:
                     pp.ProductPrice
                 FROM Products p
                 LEFT JOIN Users u ON p.UserID = u.UserID -- LEFT statt INNER
-                LEFT JOIN (
-                    SELECT ProductID, ProductPrice
-                    FROM ProductPrices
-                    WHERE (ProductID, DateAdded) IN (
-                        SELECT ProductID, MAX(DateAdded)
-                        FROM ProductPrices
-                        GROUP BY ProductID
-                    )
-                ) pp ON pp.ProductID = p.ProductID
+                LEFT JOIN CurrentProductPrices pp ON pp.ProductID = p.ProductID
                 WHERE p.ProductID = ? COLLATE NOCASE
             """
         return self._execute_query(query, (product_id,), fetch=True, fetch_one=True)
@@ -167,6 +129,7 @@ class ProductManager:
         insert_params = (price_id, product_id, final_price, current_datetime)
         
         self._execute_query(insert_price_query, insert_params)
+        _invalidate_shop_caches()
         
         # Da _execute_query intern commit() aufruft, sind beide Operationen 
         # (wenn sie erfolgreich waren) persistent.
@@ -181,6 +144,7 @@ class ProductManager:
             "UPDATE Products SET IsActive = ?, IsShopVisible = ? WHERE ProductID = ?",
             (status, status, product_id)
         )
+        _invalidate_shop_caches()
         return True
 # TODO: alle  INSERTs in eine Transaktion packen (multi_queries=True), aktuell noch  separate _execute_query → Race-Condition möglich
     def delete_product(self, product_id: str):
@@ -225,6 +189,7 @@ class ProductManager:
                 "DELETE FROM Products WHERE ProductID = ?",
                 (product_id,)
             )
+            _invalidate_shop_caches()
 
             return True
 
@@ -233,69 +198,264 @@ class ProductManager:
         
     # --- 2. Kunden-Shop-Logik (Slider/Shop-Ansicht) ---
     
+    def _get_slideshow_pool(self):
+        """IDs aller freigegebenen Shopartikel (aus dem Pool, bei Bedarf neu geladen)."""
+        pool = _slideshow_pool.get('ids')
+        if pool is None:
+            rows = self._execute_query("SELECT ProductID FROM Products WHERE IsShopVisible = 1", fetch=True)
+            pool = tuple(row[0] for row in rows)
+            _slideshow_pool.set('ids', pool)
+        return pool
+
     def get_random_shop_products(self, count: int = 5) -> List[sqlite3.Row]:
         """Ruft eine zufällige Auswahl an freigegebenen Shopartikeln ab."""
         
-        # Nutzen der ORDER BY RANDOM() Funktion von SQLite für zufällige Auswahl
-        query = """
+        # Zufallsauswahl aus dem vorab geladenen ID-Pool (pro Aufruf neu gezogen),
+        # danach nur noch count Primärschlüssel-Lookups statt Sortierung der ganzen Tabelle
+        pool = self._get_slideshow_pool()
+        sampled_ids = random.sample(pool, min(count, len(pool)))
+        if not sampled_ids:
+            return []
+
+        placeholders = ','.join(['?'] * len(sampled_ids))
+        query = f"""
         SELECT 
             ProductID, 
             ProductName, 
             ProductDescription, 
             ImagePath
         FROM Products 
-        WHERE IsShopVisible = 1 
-        ORDER BY RANDOM()
-        LIMIT ?
+        WHERE ProductID IN ({placeholders}) AND IsShopVisible = 1
         """
         # Wir übergeben nur die Felder, die für die Slideshow relevant sind
-        return self._execute_query(query, (count,), fetch=True)
+        rows = self._execute_query(query, sampled_ids, fetch=True)
+
+        # Zufällige Reihenfolge der Stichprobe beibehalten
+        order = {product_id: index for index, product_id in enumerate(sampled_ids)}
+        return sorted(rows, key=lambda row: order[row['ProductID']])
     
     # TODO: alle  INSERTs in eine Transaktion packen (multi_queries=True), aktuell noch  separate _execute_query → Race-Condition möglich
     def get_filter_options(self):
-        """Erhebt alle in der DB vorkommenden Kategorien und Materialien."""
-        categories = self._execute_query("SELECT DISTINCT ProductCategory FROM Products WHERE IsShopVisible = 1 AND IsActive = 1", fetch=True)
-        materials = self._execute_query("SELECT DISTINCT MaterialType FROM Products WHERE IsShopVisible = 1 AND IsActive = 1", fetch=True)
-        
+        """Erhebt alle in der DB vorkommenden Kategorien und Materialien (aus dem Facetten-Raster)."""
+        facets = self.get_facet_counts()
         return {
-            'categories': [c[0] for c in categories if c[0]],
-            'materials': [m[0] for m in materials if m[0]]
+            'categories': list(facets['categories']),
+            'materials': list(facets['materials'])
         }
 
-    def get_filtered_products(self, search_query=None, selected_categories=None, selected_materials=None):
-        """Führt die gefilterte Suche inklusive Preisen aus."""
-        
-        params = []
-        # Basis-Query (deine CTE Logik)
-        sql = """
-            WITH LatestPrices AS (
-                SELECT ProductID, ProductPrice, DateAdded as PriceDateAdded,
-                ROW_NUMBER() OVER(PARTITION BY ProductID ORDER BY DateAdded DESC) as rn
-                FROM ProductPrices
-            )
-            SELECT p.*, lp.ProductPrice AS FinalPrice, lp.PriceDateAdded
-            FROM Products p
-            LEFT JOIN LatestPrices lp ON p.ProductID = lp.ProductID AND lp.rn = 1
-            WHERE p.IsShopVisible = 1 AND p.IsActive = 1
+    def _get_facet_grid(self, search_query=None):
         """
-        
+        Zählt alle sichtbaren Produkte in EINER aggregierten Abfrage je
+        (Kategorie, Material) – für den aktuellen Suchbegriff, ohne Checkbox-Filter.
+        Ergebnis wird per TTL-Cache geteilt (Schlüssel = normalisierter Suchbegriff).
+        """
+        match_query = build_match_query(search_query)
+        if match_query:
+            cache_key = match_query
+        elif _has_unsearchable_terms(search_query):
+            cache_key = _NO_MATCH_FACET_KEY
+        else:
+            cache_key = ''
+        grid = _facet_cache.get(cache_key)
+        if grid is not None:
+            return grid
+
+        from_sql, where_sql, params, _ = self._build_shop_filter(search_query)
+        rows = self._execute_query(
+            "SELECT p.ProductCategory, p.MaterialType, COUNT(*)"
+            + from_sql + where_sql
+            + " GROUP BY p.ProductCategory, p.MaterialType",
+            params,
+            fetch=True
+        )
+        grid = [(row[0], row[1], row[2]) for row in rows]
+        _facet_cache.set(cache_key, grid)
+        return grid
+
+    def get_facet_counts(self, search_query=None, selected_categories=None, selected_materials=None):
+        """
+        Facetten-Zähler für die Shop-Sidebar aus einem einzigen Raster-Query.
+        Kategorie-Zähler berücksichtigen Suche + gewählte Materialien, Material-Zähler
+        Suche + gewählte Kategorien (die eigene Auswahl filtert die eigene Facette nicht,
+        damit weitere Optionen sichtbar bleiben).
+
+        Returns:
+            {'categories': {Name: Anzahl}, 'materials': {Name: Anzahl}, 'total': Anzahl mit allen Filtern}
+        """
+        selected_categories = set(selected_categories or [])
+        selected_materials = set(selected_materials or [])
+
+        category_counts = {category: 0 for category in selected_categories}
+        material_counts = {material: 0 for material in selected_materials}
+        total = 0
+
+        for category, material, count in self._get_facet_grid(search_query):
+            category_match = not selected_categories or category in selected_categories
+            material_match = not selected_materials or material in selected_materials
+
+            if category and material_match:
+                category_counts[category] = category_counts.get(category, 0) + count
+            if material and category_match:
+                material_counts[material] = material_counts.get(material, 0) + count
+            if category_match and material_match:
+                total += count
+
+        return {
+            'categories': dict(sorted(category_counts.items())),
+            'materials': dict(sorted(material_counts.items())),
+            'total': total
+        }
+
+    def _build_shop_filter(self, search_query=None, selected_categories=None, selected_materials=None):
+        """
+        Baut FROM- und WHERE-Teil des Shop-Katalogs für Suche + Filter
+        (gemeinsam genutzt von Liste, Keyset-Seite und COUNT).
+        Suchbegriffe laufen über den FTS5-Index ProductSearch (Präfixsuche, Umlaut-Faltung).
+
+        Returns:
+            (from_sql, where_sql, params, is_search)
+        """
+        params = []
+        match_query = build_match_query(search_query)
+
+        if match_query:
+            weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+            from_sql = f"""
+                FROM (
+                    SELECT ProductID, bm25(ProductSearch, {weights}) AS SearchRank
+                    FROM ProductSearch
+                    WHERE ProductSearch MATCH ?
+                ) s
+                JOIN Products p ON p.ProductID = s.ProductID
+            """
+            params.append(match_query)
+        else:
+            from_sql = " FROM Products p "
+
+        where_sql = " WHERE p.IsShopVisible = 1 AND p.IsActive = 1"
+
+        # Suchbegriff ohne suchbare Wörter (z.B. nur '!!!') → kein Treffer statt ganzer Katalog
+        if _has_unsearchable_terms(search_query):
+            where_sql += " AND 0"
+
         # Dynamische WHERE-Erweiterung
-        if search_query:
-            sql += " AND (p.ProductName LIKE ? OR p.ProductDescription LIKE ?)"
-            params.extend([f'%{search_query}%', f'%{search_query}%'])
-        
         if selected_categories:
             placeholders = ','.join(['?'] * len(selected_categories))
-            sql += f" AND p.ProductCategory IN ({placeholders})"
+            where_sql += f" AND p.ProductCategory IN ({placeholders})"
             params.extend(selected_categories)
 
         if selected_materials:
             placeholders = ','.join(['?'] * len(selected_materials))
-            sql += f" AND p.MaterialType IN ({placeholders})"
+            where_sql += f" AND p.MaterialType IN ({placeholders})"
             params.extend(selected_materials)
 
+        return from_sql, where_sql, params, bool(match_query)
+
+    def get_filtered_products(self, search_query=None, selected_categories=None, selected_materials=None):
+        """
+        Führt die gefilterte Suche inklusive Preisen aus (ohne Pagination).
+        Mit Suchbegriff nach bm25-Relevanz sortiert.
+        """
+        from_sql, where_sql, params, is_search = self._build_shop_filter(
+            search_query, selected_categories, selected_materials
+        )
+
+        # Aktueller Preis direkt aus der Projektion CurrentProductPrices
+        sql = (
+            "SELECT p.*, lp.ProductPrice AS FinalPrice, lp.DateAdded AS PriceDateAdded"
+            + from_sql
+            + " LEFT JOIN CurrentProductPrices lp ON lp.ProductID = p.ProductID"
+            + where_sql
+        )
+
+        if is_search:
+            sql += " ORDER BY s.SearchRank"  # bm25: kleiner = relevanter
+
         return self._execute_query(sql, params, fetch=True)
 
+    def get_shop_page(self, search_query=None, selected_categories=None, selected_materials=None,
+                      sort=None, cursor=None, page_size=24):
+        """
+        Liefert genau eine Seite des Shop-Katalogs per Keyset-Pagination.
+        Statt OFFSET wird ab der Position des Cursors weitergelesen → Kosten O(page_size).
+
+        Args:
+            sort: 'newest' | 'price' | 'name' | 'relevance' (nur mit Suchbegriff)
+            cursor: opaker Cursor aus einer vorherigen Seite (None = erste Seite)
+
+        Returns:
+            dict mit 'products' (sqlite3.Row-Liste), 'next_cursor' (None = letzte Seite)
+            und 'sort' (tatsächlich verwendete Sortierung)
+        """
+        from_sql, where_sql, params, is_search = self._build_shop_filter(
+            search_query, selected_categories, selected_materials
+        )
+
+        # Unbekannte / unpassende Sortierung → Standard (mit Suche: Relevanz)
+        if sort not in SHOP_SORTS or (sort == 'relevance' and not is_search):
+            sort = 'relevance' if is_search else DEFAULT_SHOP_SORT
+        sort_expr, direction = SHOP_SORTS[sort]
+
+        sql = (
+            f"SELECT p.*, lp.ProductPrice AS FinalPrice, lp.DateAdded AS PriceDateAdded, {sort_expr} AS SortKey"
+            + from_sql
+            + " LEFT JOIN CurrentProductPrices lp ON lp.ProductID = p.ProductID"
+            + where_sql
+        )
+
+        # Keyset: alles "hinter" dem letzten Eintrag der Vorseite (Row-Value-Vergleich)
+        position = self._decode_shop_cursor(cursor, sort)
+        if position:
+            operator = '<' if direction == 'DESC' else '>'
+            sql += f" AND ({sort_expr}, p.ProductID) {operator} (?, ?)"
+            params.extend(position)
+
+        # Ein Eintrag mehr als nötig → verrät, ob es eine weitere Seite gibt
+        sql += f" ORDER BY {sort_expr} {direction}, p.ProductID {direction} LIMIT ?"
+        params.append(page_size + 1)
+
+        rows = self._execute_query(sql, params, fetch=True)
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = self._encode_shop_cursor(sort, last['SortKey'], last['ProductID'])
+
+        return {'products': rows, 'next_cursor': next_cursor, 'sort': sort}
+
+    def count_filtered_products(self, search_query=None, selected_categories=None, selected_materials=None):
+        """Günstiges COUNT(*) für die Trefferzahl – ohne Preis-Join und ohne Sortierung."""
+        from_sql, where_sql, params, _ = self._build_shop_filter(
+            search_query, selected_categories, selected_materials
+        )
+        row = self._execute_query("SELECT COUNT(*)" + from_sql + where_sql, params, fetch=True, fetch_one=True)
+        return row[0] if row else 0
+
+    @staticmethod
+    def _encode_shop_cursor(sort, sort_value, product_id):
+        """Verpackt die Keyset-Position als opaken, URL-sicheren String."""
+        raw = json.dumps([sort, sort_value, product_id], separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def _decode_shop_cursor(cursor, sort):
+        """
+        Entpackt einen Cursor zu (sort_value, product_id).
+        Ungültige oder zu einer anderen Sortierung gehörende Cursor → None (= erste Seite).
+        """
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except (ValueError, TypeError, UnicodeError, binascii.Error):
+            return None
+
+        if not isinstance(data, list) or len(data) != 3 or data[0] != sort:
+            return None
+        return data[1], data[2]
+
     def map_row_to_dict(self, row):
         if not row:
             return None
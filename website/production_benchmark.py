@@ -0,0 +1,197 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+from .migrations import run_migrations
+from .database import DEFAULT_DB_PROFILE, apply_database_profile, close_connections, execute_query, get_connection
+
+# =================================================================
+# BENCHMARK: BOM → ProductionJobs
+# =================================================================
+# Misst ProjectManager._persist_production_jobs gegen eine frisch migrierte
+# Temp-Datenbank (WAL) mit einer synthetischen BOM:
+#   - Bulk:        eine Transaktion + executemany (aktueller Pfad)
+#   - Wiederholung: gleicher Aufruf nochmal → muss 0 Jobs anlegen (idempotent)
+#   - Gebündelt:   batched=True, ein Job pro BOM-Zeile mit Stückzahl
+#   - Einzeln:     Vergleich mit dem früheren Pfad (ein Autocommit-INSERT pro Job)
+#
+# Zusätzlich die automatische Druckerplanung (PrintScheduler) mit synthetischen
+# Jobs und Druckern: Erstplanung, ein neuer Job (inkrementell), Neuberechnung
+# eines Druckers nach manueller Änderung.
+#
+# Aufruf: python -m website.production_benchmark [--parts 50] [--quantity 200]
+#                                                [--schedule-jobs 3000] [--printers 8]
+
+_INSERT_SINGLE = """
+    INSERT INTO ProductionJobs (
+        JobID, SourceProjectID, JobStatus, Priority, PartName, FileID, FileName,
+        MaterialID, ProfileID, Color, NozzleDiam, PrintTimeMin, DimX, DimY, DimZ, Quantity, JobKey
+    ) VALUES (?, ?, 'QUEUED', 3, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def build_bom_parts(part_count, quantity):
+    """Synthetische, bereits gefilterte BOM-Teile (wie _extract_printable_parts sie liefert)."""
+    return [
+        {
+            'part_name': f"Bauteil {i:03d}",
+            'quantity': quantity,
+            'process': 'FDM_PRINT',
+            'file_id': f"FILE_bench_{i:03d}",
+            'file_name': f"bauteil_{i:03d}.stl",
+            'material_id': 'MAT_PLA',
+            'profile_id': 'PROF_STD',
+            'color': 'BLACK',
+            'nozzle': 0.4,
+            'print_time': 30 + i,
+            'dim_x': 40.0, 'dim_y': 30.0, 'dim_z': 10.0,
+        }
+        for i in range(part_count)
+    ]
+
+
+def run_benchmark(part_count, quantity):
+    """Führt die vier Varianten aus und gibt die Messwerte als Liste von dicts zurück."""
+    parts = build_bom_parts(part_count, quantity)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'production_benchmark.db')
+        env_backup = {key: os.environ.get(key) for key in ('DB_PATH', 'UPLOAD_DIR_PATH')}
+
+        try:
+            os.environ.update(DB_PATH=db_path, UPLOAD_DIR_PATH=tmp_dir)
+            apply_database_profile(DEFAULT_DB_PROFILE, db_path)
+            run_migrations(db_path)
+
+            # Import erst hier: project_manager liest UPLOAD_DIR_PATH beim Import
+            from .project_manager import ProjectManager
+            manager = ProjectManager()
+            manager.db_path = db_path
+
+            runs = (
+                ('Bulk (executemany)', 'PROJ_bench', False),
+                ('Wiederholung', 'PROJ_bench', False),
+                ('Gebündelt (Stückzahl)', 'PROJ_batch', True),
+            )
+            for label, project_id, batched in runs:
+                started = time.perf_counter()
+                created = manager._persist_production_jobs(project_id, parts, batched=batched)
+                elapsed = time.perf_counter() - started
+                results.append({'run': label, 'seconds': elapsed, 'rows': created})
+
+            # Vergleich: früheres Verhalten, ein Autocommit-INSERT (= ein fsync) pro Job
+            rows = manager._build_production_job_rows('PROJ_single', parts)
+            started = time.perf_counter()
+            for row in rows:
+                execute_query(_INSERT_SINGLE, row, db_path=db_path)
+            elapsed = time.perf_counter() - started
+            results.append({'run': 'Einzeln (Autocommit)', 'seconds': elapsed, 'rows': len(rows)})
+        finally:
+            close_connections()
+            for key, value in env_backup.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    for result in results:
+        result['rows_per_second'] = result['rows'] / result['seconds'] if result['seconds'] else float('inf')
+    return results
+
+
+def _insert_schedule_fixture(conn, job_count, printer_count, rng):
+    """Synthetische Drucker (verschiedene Bauräume/Düsen) und QUEUED-Jobs anlegen."""
+    conn.execute("BEGIN")
+    conn.execute("INSERT INTO Materials (MaterialID, MaterialName, CostPerKG) VALUES ('MAT_PLA', 'PLA', 20)")
+    conn.execute("INSERT INTO Materials (MaterialID, MaterialName, CostPerKG) VALUES ('MAT_PETG', 'PETG', 25)")
+    conn.executemany("""
+        INSERT INTO Printers (PrinterID, PrinterName, PrinterStatus, DimX, DimY, DimZ, CostPerMin,
+                              RuntimeHours, NozzleDiam, Materials)
+        VALUES (?, ?, 'online', ?, ?, 250, ?, 0, ?, ?)
+    """, [
+        (f"PRIN_bench_{i}", f"Drucker {i}", [220, 256, 350][i % 3], [220, 256, 350][i % 3],
+         0.01 * (1 + i % 4), [0.4, 0.6][i % 2], [None, None, None, 'PLA'][i % 4])
+        for i in range(printer_count)
+    ])
+    conn.executemany("""
+        INSERT INTO ProductionJobs (JobID, SourceProjectID, Priority, PartName, MaterialID, NozzleDiam,
+                                    PrintTimeMin, DimX, DimY, DimZ, Quantity, JobKey)
+        VALUES (?, 'PROJ_schedule', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (f"JOB_bench_{i}", rng.randint(1, 5), f"Teil {i}", rng.choice(['MAT_PLA', 'MAT_PETG']),
+         rng.choice([0.4, 0.6]), rng.randint(10, 600), rng.choice([20, 60, 150, 240]),
+         rng.choice([20, 60, 150]), rng.randint(5, 200), rng.choice([1, 1, 1, 4, 12]), f"bench:{i}")
+        for i in range(job_count)
+    ])
+    conn.execute("COMMIT")
+
+
+def run_schedule_benchmark(job_count, printer_count):
+    """Misst Erstplanung, inkrementelles Nachplanen und Neuberechnung eines Druckers."""
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'schedule_benchmark.db')
+        try:
+            apply_database_profile(DEFAULT_DB_PROFILE, db_path)
+            run_migrations(db_path)
+
+            from .print_scheduler import PrintScheduler
+            scheduler = PrintScheduler()
+            scheduler.db_path = db_path
+
+            conn = get_connection(db_path)
+            _insert_schedule_fixture(conn, job_count, printer_count, random.Random(42))
+
+            started = time.perf_counter()
+            _, plan = scheduler.schedule_open_jobs()
+            results.append(('Erstplanung', time.perf_counter() - started, plan))
+
+            # Ein neuer Job kommt dazu → nur dieser wird hinten angehängt
+            conn.execute("""
+                INSERT INTO ProductionJobs (JobID, SourceProjectID, PartName, PrintTimeMin, DimX, DimY, DimZ, JobKey)
+                VALUES ('JOB_bench_new', 'PROJ_schedule', 'Nachzügler', 45, 30, 30, 30, 'bench:new')
+            """)
+            started = time.perf_counter()
+            _, plan = scheduler.schedule_open_jobs()
+            results.append(('Neuer Job (inkrementell)', time.perf_counter() - started, plan))
+
+            started = time.perf_counter()
+            scheduler.refresh_timelines(['PRIN_bench_0'])
+            results.append(('Neuberechnung 1 Drucker', time.perf_counter() - started, None))
+        finally:
+            close_connections()
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark für die Job-Erzeugung aus einer BOM")
+    parser.add_argument('--parts', type=int, default=50, help="Anzahl druckbarer BOM-Zeilen")
+    parser.add_argument('--quantity', type=int, default=200, help="Stückzahl je BOM-Zeile")
+    parser.add_argument('--schedule-jobs', type=int, default=3000, help="Anzahl Jobs für den Planungs-Benchmark (0 = aus)")
+    parser.add_argument('--printers', type=int, default=8, help="Anzahl Drucker für den Planungs-Benchmark")
+    args = parser.parse_args(argv)
+
+    print(f"Job-Erzeugung: {args.parts} Teile x {args.quantity} = {args.parts * args.quantity} Stück")
+    for result in run_benchmark(args.parts, args.quantity):
+        print(f"  {result['run']:<22} {result['seconds'] * 1000:9.1f} ms  "
+              f"{result['rows']:7d} Jobs angelegt  {result['rows_per_second']:10.0f} Zeilen/s")
+
+    if args.schedule_jobs > 0:
+        print(f"Druckerplanung: {args.schedule_jobs} Jobs, {args.printers} Drucker")
+        for label, seconds, plan in run_schedule_benchmark(args.schedule_jobs, args.printers):
+            details = ''
+            if plan:
+                details = (f"  {plan['plates_planned']:6d} Platten  {len(plan['unschedulable']):4d} ohne Drucker  "
+                           f"fertig bis {plan['planned_until']}")
+            print(f"  {label:<26} {seconds * 1000:9.1f} ms{details}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,14 +4,27 @@ import uuid
 import sqlite3
 import re
 import struct
+import logging
 from flask import jsonify
 from werkzeug.utils import secure_filename
 from datetime import datetime
 
 from .calculation_manager import CalculationManager
+from .cache import TTLCache
+from .database import DatabaseManager
+from .event_bus import publish
+from .print_scheduler import units_per_plate
+from .uploads import StreamingUpload, SNIFF_BYTES
+from . import blob_store
+from . import queue_ranks
+
+logger = logging.getLogger(__name__)
 
 calculation_manager = CalculationManager()
 
+# Drucker-Board je Queue-Version: viele Tabs nach einem Ereignis → eine Board-Query
+_board_cache = TTLCache(maxsize=4, ttl=300)
+
 # Definieren Sie hier Ihre Konfigurationskonstanten (z.B. Dateipfade, Limits)
 # HINWEIS: Die Klasse wird den UPLOAD_FOLDER nun dynamisch übergeben bekommen,
 # aber wir behalten die Konstante für Fallbacks oder initiale Struktur bei.
@@ -19,86 +32,23 @@ TEMP_UPLOAD_FOLDER = os.getenv('UPLOAD_DIR_PATH')
 ALLOWED_EXTENSIONS = {'stl', 'step', 'obj', '3mf', 'pdf', 'png', 'jpg', 'jpeg', 'zip'}
 ALLOWED_CANCELLATION_STATUSES = ['UNDER_REVIEW','WAITING_FOR_QUOTE','QUOTED_AWAITING_CUSTOMER']
 
-class ProjectManager:
+class ProjectManager(DatabaseManager):
     def __init__(self):
-        self.db_path = os.getenv('DB_PATH')
+        super().__init__()
         # Erstellt den Standardordner, falls er nicht existiert (wichtig für Entwickler-Setup)
         os.makedirs(TEMP_UPLOAD_FOLDER, exist_ok=True)
 
-    def _execute_query(
-        self,
-        query,
-        params=(),
-        fetch=False,
-        get_lastrowid=False,
-        fetch_one=False,
-        multi_queries=False
-    ):
-        """
-        Erweiterte DB-Execution mit Unterstützung für mehrere Queries in einer Transaktion.
-
-        Args:
-            query: 
-                - str → einzelner SQL-String
-                - list of (query_str, params_tuple) → mehrere Queries (nur bei multi_queries=True)
-            params: Parameter für einzelne Query (tuple)
-            fetch: Soll ein Resultset zurückgegeben werden? (SELECT)
-            get_lastrowid: Soll cursor.lastrowid zurückgegeben werden? (INSERT)
-            fetch_one: fetchone() statt fetchall()
-            multi_queries: True → query ist Liste von (query, params)-Tuplen
-
-        Returns:
-            - Bei fetch: sqlite3.Row oder Liste von sqlite3.Row
-            - Bei get_lastrowid: int (lastrowid)
-            - Sonst: None
-            - Bei Fehler: wirft sqlite3.Error
-        """
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            # ── Wichtig: row_factory für dict-ähnlichen Zugriff ──
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-
-            if multi_queries and isinstance(query, list):
-                # Mehrere Queries → Transaktion
-                cursor.execute("BEGIN TRANSACTION")
-                for q, p in query:
-                    cursor.execute(q, p)
-                conn.commit()
-            else:
-                # Einzelne Query
-                cursor.execute(query, params)
-                conn.commit()
-
-            # Ergebnis abholen (nur bei SELECT relevant)
-            if fetch:
-                if fetch_one:
-                    return cursor.fetchone()           # → sqlite3.Row oder None
-                return cursor.fetchall()               # → Liste von sqlite3.Row
-
-            # Letzte eingefügte ID (für INSERT)
-            if get_lastrowid:
-                return cursor.lastrowid
-
-            # Standard-Rückgabe (UPDATE, DELETE, INSERT ohne ID-Interesse)
-            return None
-
-        except sqlite3.Error as e:
-            if conn:
-                conn.rollback()
-            raise  # Fehler weiterwerfen – aufrufende Methode kann loggen/flashen
-
-        finally:
-            if conn:
-                conn.close()
-
     def _detect_extension_by_content(self, file_storage):
-        # Lese den Anfang für ASCII/Blender/GCode
-        header = file_storage.read(2048)
-        file_storage.seek(0, 2) # Springe ans Ende
-        file_size = file_storage.tell() # Hole Dateigröße
-        file_storage.seek(0) # Zurück zum Anfang
+        if isinstance(file_storage.stream, StreamingUpload):
+            # Gestreamter Upload: Kopf und Größe wurden schon beim Empfang mitgeschrieben
+            header = file_storage.stream.header
+            file_size = file_storage.stream.size
+        else:
+            # Lese den Anfang für ASCII/Blender/GCode
+            header = file_storage.read(SNIFF_BYTES)
+            file_storage.seek(0, 2) # Springe ans Ende
+            file_size = file_storage.tell() # Hole Dateigröße
+            file_storage.seek(0) # Zurück zum Anfang
 
         # 1. Bekannte Header
         if header.startswith(b'BLENDER'): return 'blend'
@@ -245,6 +195,19 @@ class ProjectManager:
         except Exception as e:
             print (f"Fehler beim Setzen von {key}: {e}")
             return False
+    def _remove_unreferenced_blob(self, cursor, file_path, sha256, root):
+        """
+        Aufräumen nach fehlgeschlagenem INSERT: den Blob löschen, sofern keine andere
+        Files-Zeile auf ihn zeigt. Läuft noch innerhalb der (gleich zurückgerollten)
+        Schreibtransaktion, damit kein paralleler Upload dazwischen eine Referenz anlegt.
+        """
+        try:
+            cursor.execute("SELECT 1 FROM Files WHERE SHA256 = ? AND FilePath = ? LIMIT 1", (sha256, file_path))
+            if cursor.fetchone() is None:
+                blob_store.purge(blob_store.mark_for_deletion(root, [file_path]))
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"⚠️ Verwaister Blob {file_path} konnte nicht entfernt werden: {e}")
+
     # **********************************************
     # NEUE INTERNE HILFSFUNKTION FÜR DATEI-SPEICHERUNG
     # **********************************************
@@ -268,22 +231,41 @@ class ProjectManager:
             # 3. Einzigartige IDs für Datei und Pfad erstellen
             file_id = f"FILE_{str(uuid.uuid4())}"
 
-            # Sicherer Split: Da fixed_name validiert wurde, ist ein Punkt vorhanden
-            file_extension = safe_name.rsplit('.', 1)[1].lower()
-            new_filename = f"{file_id}.{file_extension}"
-            file_path = os.path.join(temp_upload_folder, new_filename)
-
-            # 4. Datei speichern
-            # WICHTIG: Deine Helper-Funktion MUSS am Ende ein .seek(0) gemacht haben!
-            uploaded_file.save(file_path)
-
-            # 5. Metadaten ermitteln
-            filesize_kb = int(round(os.path.getsize(file_path) / 1024))
-
-            # 6. Datenbank-Eintrag
-            file_insert_query = "INSERT INTO Files (FileID, FilePath, FileName, FileSizeKB, UserID) VALUES (?, ?, ?, ?, ?)"
-            # Wir speichern 'safe_name', damit der ursprüngliche Name (mit Endung) erhalten bleibt
-            self._execute_query(file_insert_query, (file_id, new_filename, safe_name, filesize_kb, user_id))
+            # 4. Datei in den Blob-Store übernehmen + 5. Metadaten
+            # Gestreamte Uploads liegen schon im Upload-Ordner, Größe und SHA-256 stammen
+            # aus demselben Durchlauf; andere werden einmal umkopiert
+            upload = uploaded_file.stream
+            if not isinstance(upload, StreamingUpload):
+                upload = StreamingUpload.from_file_storage(uploaded_file, temp_upload_folder)
+            filesize_kb = int(round(upload.size / 1024))
+
+            # 6. Datenbank-Eintrag – Blob ablegen und Files-Zeile anlegen unter EINER
+            # Schreibsperre, damit ein paralleles delete_project den Blob nicht dazwischen entfernt
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            file_path, deduplicated = None, False
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                file_path, deduplicated = blob_store.store(upload, temp_upload_folder)
+                # Wir speichern 'safe_name', damit der ursprüngliche Name (mit Endung) erhalten bleibt
+                cursor.execute(
+                    "INSERT INTO Files (FileID, FilePath, FileName, FileSizeKB, UserID, SHA256) VALUES (?, ?, ?, ?, ?, ?)",
+                    (file_id, file_path, safe_name, filesize_kb, user_id, upload.sha256)
+                )
+                conn.commit()
+            except Exception:
+                if file_path and not deduplicated:
+                    # Neu angelegter Blob ohne Files-Zeile würde nie referenzgezählt/gelöscht
+                    self._remove_unreferenced_blob(cursor, file_path, upload.sha256, temp_upload_folder)
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            finally:
+                cursor.close()
+                upload.discard()  # nur noch nicht übernommene Dateien (Fehlerfall)
+
+            if deduplicated:
+                logger.debug(f"Datei {safe_name} bereits vorhanden ({upload.sha256[:12]}…) – kein neuer Blob.")
 
             all_file_ids.append(file_id)
 
@@ -446,81 +428,75 @@ class ProjectManager:
         return True, f"{uploaded_count} Datei(en) erfolgreich hochgeladen und als Chat-Nachricht gespeichert."
 
     def delete_project(self, project_id):
-        
-     
+        """
+        Löscht ein Projekt samt Files-Einträgen. Blobs im Store (siehe blob_store) werden
+        nur entfernt, wenn keine andere Files-Zeile mehr auf denselben Inhalt zeigt.
+        Alles in EINER Schreibtransaktion; Dateien werden vor dem COMMIT nur umbenannt
+        und erst danach gelöscht (bei Rollback wieder zurückbenannt).
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
         try:
-            operations = []
+            cursor.execute("BEGIN IMMEDIATE")
 
-            select_query = """
-                SELECT 
-                    p.Status,
-                    p.FileIDs,
-                    COALESCE(GROUP_CONCAT(f.FilePath), '') AS FilePaths
-                FROM Projects p
-                LEFT JOIN Files f ON ',' || p.FileIDs || ',' LIKE '%,' || f.FileID || ',%'
-                WHERE p.ProjectID = ?
-                GROUP BY p.ProjectID
-            """
-            operations.append((select_query, (project_id,)))
-
-            operations.append(
-                ("DELETE FROM Projects WHERE ProjectID = ?", (project_id,))
-            )
+            cursor.execute("SELECT Status, FileIDs FROM Projects WHERE ProjectID = ?", (project_id,))
+            project = cursor.fetchone()
+            if not project:
+                conn.rollback()
+                return True, "Projekt existiert nicht oder wurde bereits gelöscht."
 
-            delete_files_query = """
-                DELETE FROM Files 
-                WHERE FileID IN (
-                    SELECT TRIM(value) 
-                    FROM (
-                        WITH RECURSIVE split(value, str) AS (
-                            SELECT '', ? || ','
-                            UNION ALL
-                            SELECT TRIM(SUBSTR(str, 1, INSTR(str, ',') - 1)), 
-                                   SUBSTR(str, INSTR(str, ',') + 1)
-                            FROM split
-                            WHERE str != ''
-                        )
-                        SELECT value FROM split WHERE value != ''
-                    )
-                )
-            """
-            operations.append((delete_files_query, (project_id,)))  # FileIDs-String wird als Parameter übergeben
+            current_status = project['Status']
+            if current_status not in ALLOWED_CANCELLATION_STATUSES:
+                conn.rollback()
+                return False, f"Löschen nicht möglich. Status war '{current_status}'."
 
-            # EINZIGER Aufruf – alles in einer Transaktion
-            result = self._execute_query(operations, multi_queries=True, fetch=True, fetch_one=True)
+            file_ids = [f.strip() for f in (project['FileIDs'] or '').split(',') if f.strip()]
+            placeholders = ', '.join('?' for _ in file_ids) or 'NULL'
 
-            if not result:
-                return True, "Projekt existiert nicht oder wurde bereits gelöscht."
+            cursor.execute(f"SELECT FilePath, SHA256 FROM Files WHERE FileID IN ({placeholders})", file_ids)
+            files = cursor.fetchall()
 
-            current_status = result['Status']
-            file_paths_string = result['FilePaths'] or ''
+            cursor.execute("DELETE FROM Projects WHERE ProjectID = ?", (project_id,))
+            cursor.execute(f"DELETE FROM Files WHERE FileID IN ({placeholders})", file_ids)
 
-            if current_status not in ALLOWED_CANCELLATION_STATUSES:
-                return False, f"Löschen nicht möglich. Status war '{current_status}'."
+            # Referenzzählung über die Files-Tabelle: verwaist ist ein Blob erst ohne jede Zeile
+            orphaned, shared = [], 0
+            for rel_path, sha256 in dict.fromkeys((row['FilePath'], row['SHA256']) for row in files):
+                if blob_store.is_blob_path(rel_path):
+                    cursor.execute("SELECT 1 FROM Files WHERE SHA256 = ? AND FilePath = ? LIMIT 1", (sha256, rel_path))
+                    if cursor.fetchone():
+                        shared += 1
+                        continue
+                orphaned.append(rel_path)
 
-            file_paths_list = [p.strip() for p in file_paths_string.split(',') if p.strip()]
+            marked = blob_store.mark_for_deletion(TEMP_UPLOAD_FOLDER, orphaned)
+            try:
+                conn.commit()
+            except sqlite3.Error:
+                blob_store.restore(marked)
+                raise
 
             # Physische Löschung
-            successful_deletes = 0
-            for rel_path in file_paths_list:
-                full_path = os.path.join(TEMP_UPLOAD_FOLDER, rel_path)
-                if os.path.exists(full_path):
-                    try:
-                        os.remove(full_path)
-                        successful_deletes += 1
-                    except Exception:
-                        pass
+            successful_deletes = blob_store.purge(marked)
 
             msg = "Projekt und DB-Einträge gelöscht."
-            if file_paths_list and successful_deletes < len(file_paths_list):
-                msg += f" (Nur {successful_deletes}/{len(file_paths_list)} Dateien physisch entfernt.)"
+            if orphaned and successful_deletes < len(orphaned):
+                msg += f" (Nur {successful_deletes}/{len(orphaned)} Dateien physisch entfernt.)"
+            if shared:
+                msg += f" {shared} Datei(en) bleiben erhalten, da sie noch anderweitig verwendet werden."
 
             return True, msg
 
         except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
             return False, f"Datenbankfehler beim Löschen: {e}"
         except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
             return False, f"Unerwarteter Fehler: {e}"
+        finally:
+            cursor.close()
 
     def send_review_message(self, project_id: str, message_text: str, skip_review_1: bool, request_file_upload: bool) -> tuple[bool, str]:
         """
@@ -654,9 +630,7 @@ class ProjectManager:
             raise Exception(f"Fehler beim Erstellen des Produkts: {e}")
 
     def get_files_by_id(self, project_id):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = self._get_connection().cursor()
 
         # 1. Hol zuerst den String mit den kommagetrennten IDs aus der Projects-Tabelle
         cursor.execute("SELECT FileIDs FROM Projects WHERE ProjectID = ?", (project_id,))
@@ -665,7 +639,6 @@ class ProjectManager:
         # Falls kein Projekt gefunden wurde oder das Feld leer ist
         if not project_row or not project_row['FileIDs']:
             cursor.close()
-            conn.close()
             return jsonify([]), 200
 
         # 2. Den String splitten und eine saubere Python-Liste aus IDs bauen
@@ -674,7 +647,6 @@ class ProjectManager:
 
         if not file_ids:
             cursor.close()
-            conn.close()
             return jsonify([]), 200
 
         # 3. Dynamische Platzhalter (?, ?, ?) für das "IN"-Statement generieren
@@ -691,7 +663,6 @@ class ProjectManager:
         rows = cursor.fetchall()
 
         cursor.close()
-        conn.close()
 
         # Umwandeln in eine Liste von Standard-Python-Dicts
         file_list = [dict(row) for row in rows]
@@ -703,24 +674,11 @@ class ProjectManager:
         Holt die Metadaten einer Datei anhand ihrer FileID aus der Datenbank.
         Gibt ein Dictionary mit den Spaltennamen als Keys zurück oder None.
         """
-        # Hinweis: Falls dein ProjectManager eine andere Verbindungsart nutzt (z. B. self.db),
-        # passe das Handling für den Cursor und die Connection entsprechend an.
-        import sqlite3
-
         query = "SELECT FileID, UserID, FilePath, FileName, FileSizeKB FROM Files WHERE FileID = ?"
 
         try:
-            # Hier nutzen wir den Pfad zu deiner zentralen Commerce.db
-            # Wenn dein Manager bereits eine Methode für Connections hat, nutze die.
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Erlaubt Zugriff via Spaltenname als Key
-            cursor = conn.cursor()
-
-            cursor.execute(query, (file_id,))
-            row = cursor.fetchone()
-
-            cursor.close()
-            conn.close()
+            # Gepoolte Verbindung (row_factory = sqlite3.Row → Zugriff via Spaltenname als Key)
+            row = self._execute_query(query, (file_id,), fetch=True, fetch_one=True)
 
             if row:
                 return dict(row)
@@ -747,11 +705,9 @@ class ProjectManager:
             return []
 
         projects = []
-        conn = None # Wird für die Spaltenabfrage benötigt
-
         try:
-            # 2. Spaltennamen dynamisch abrufen
-            conn = sqlite3.connect(self.db_path)
+            # 2. Spaltennamen dynamisch abrufen (gepoolte Verbindung)
+            conn = self._get_connection()
             # Verwenden von PRAGMA table_info, um die Spaltennamen zu erhalten
             cursor = conn.execute("PRAGMA table_info(Projects)")
             # Der Spaltenname ist das 2. Element (Index 1) im Tupel
@@ -770,10 +726,6 @@ class ProjectManager:
             print(f"Fehler beim Abrufen der Spaltennamen: {e}")
             return []
 
-        finally:
-            if conn:
-                conn.close()
-
     def get_project_details(self, project_id):
         # Explizites SELECT der Spalten, um die Reihenfolge zu garantieren
         query = "SELECT ProjectID, FileIDs, UserID, MaterialType, ProjectDescription, ProjectName, ProjectQuantity, Status, VolumeCM3, PrintTimeMin, EstimatedMaterialG, DateAdded, Priority, FinalQuotePrice FROM Projects WHERE ProjectID = ?"
@@ -812,10 +764,8 @@ class ProjectManager:
         Ruft alle Nachrichten eines Projekts ab und mappt sie auf Dictionaries.
         Nutzt nur eine Verbindung für PRAGMA und SELECT.
         """
-        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._get_connection().cursor()
     
             # 1. Spaltennamen holen (PRAGMA table_info)
             cursor.execute("PRAGMA table_info(ProjectMessages)")
@@ -837,10 +787,6 @@ class ProjectManager:
         except sqlite3.Error as e:
             print(f"Fehler beim Abrufen der Nachrichten: {e}")
             return []
-    
-        finally:
-            if conn:
-                conn.close()
 
     def update_project_status(self, project_id: str, new_status: str, volume_cm3: float, 
                               print_time: float, weight: float, 
@@ -1132,9 +1078,8 @@ class ProjectManager:
         if not result_rows:
             return []
 
-        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._get_connection()
             cursor = conn.execute("PRAGMA table_info(PrintProfiles)")
             columns = [col[1] for col in cursor.fetchall()]
 
@@ -1144,9 +1089,6 @@ class ProjectManager:
         except sqlite3.Error as e:
             print(f"Fehler beim Abrufen der PrintProfiles-Spaltennamen: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
 
     def get_all_materials(self):
         """Ruft alle Materialien als Liste von Dictionaries ab."""
@@ -1156,9 +1098,8 @@ class ProjectManager:
         if not result_rows:
             return []
 
-        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._get_connection()
             cursor = conn.execute("PRAGMA table_info(Materials)")
             columns = [col[1] for col in cursor.fetchall()]
 
@@ -1168,9 +1109,6 @@ class ProjectManager:
         except sqlite3.Error as e:
             print(f"Fehler beim Abrufen der Materials-Spaltennamen: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
 
     def get_calculation_context(self):
         try:
@@ -1276,19 +1214,18 @@ class ProjectManager:
         )
 
         # Ausführung beider Queries in einer Transaktion
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         try:
-            cursor.execute(project_update_query, project_update_params)
-            cursor.execute(product_query, product_params)
-            cursor.execute(price_query, price_params)
-            conn.commit()
+            self._execute_query(
+                [
+                    (project_update_query, project_update_params),
+                    (product_query, product_params),
+                    (price_query, price_params),
+                ],
+                multi_queries=True
+            )
             return product_id
         except sqlite3.Error as e:
-            conn.rollback()
             raise Exception(f"Fehler beim Erstellen des Produkts: {e}")
-        finally:
-            conn.close()
 
     def get_project_material_details(self, project_id):
 
@@ -1440,8 +1377,11 @@ class ProjectManager:
         bom_filename = f"BOM_{project_id}.json"
         return os.path.exists(os.path.join(TEMP_UPLOAD_FOLDER, bom_filename))
 
-    def process_bom_to_production(self, project_id):
-        """Zentrale Koordination: BOM finden, Preprocessing, Job-Erzeugung."""
+    def process_bom_to_production(self, project_id, batched=False):
+        """
+        Zentrale Koordination: BOM finden, Preprocessing, Job-Erzeugung.
+        batched=True legt einen Job pro BOM-Zeile mit Stückzahl an statt einen pro Stück.
+        """
 
         # 1. Datenbeschaffung (Kapselung der DB-Zustände)
         # Erst in Temp schauen, dann in Permanent
@@ -1452,8 +1392,12 @@ class ProjectManager:
         # 2. Preprocessing (Flachklopfen der Struktur)
         printable_parts = self._extract_printable_parts(bom_raw)
 
-        # 3. Job-Erzeugung
-        count = self._persist_production_jobs(project_id, printable_parts)
+        # 3. Job-Erzeugung (atomar; bereits erzeugte Jobs werden nicht dupliziert)
+        try:
+            count = self._persist_production_jobs(project_id, printable_parts, batched=batched)
+        except sqlite3.Error as e:
+            logger.error(f"❌ Fehler bei der Job-Erzeugung für {project_id}: {e}")
+            return False, f"Datenbankfehler bei der Job-Erzeugung: {e}"
 
         return True, count
 
@@ -1489,9 +1433,15 @@ class ProjectManager:
                       and p.get('file_id')])
         return parts
 
-    def _persist_production_jobs(self, project_id, parts_list):
-        """Schreibt die finalen Zeilen in ProductionJobs basierend auf dem neuen Schema."""
-        count = 0
+    def _build_production_job_rows(self, project_id, parts_list, batched=False):
+        """
+        Expandiert die BOM-Teile in Job-Zeilen (ein Job pro Stück) – komplett im Speicher.
+        Mit batched=True wird jede BOM-Zeile zu EINEM Job mit Quantity = Stückzahl.
+        Jede Zeile bekommt einen deterministischen JobKey, damit ein erneuter Lauf
+        dieselben Schlüssel erzeugt und bereits vorhandene Jobs nicht doppelt anlegt.
+        """
+        rows = []
+        occurrences = {}
         for part in parts_list:
             # Extraktion der technischen Daten aus der BOM
             qty = int(part.get('quantity', 1))
@@ -1508,32 +1458,18 @@ class ProjectManager:
             dy = part.get('dim_y', 0)
             dz = part.get('dim_z', 0)
 
-            for i in range(qty):
-                # Eindeutige JobID (kurz & knackig)
-                job_id = f"JOB_{uuid.uuid4()}"
-
-                query = """
-                    INSERT INTO ProductionJobs (
-                        JobID, 
-                        SourceProjectID, 
-                        JobStatus, 
-                        Priority, 
-                        PartName,
-                        FileID,
-                        FileName,
-                        MaterialID, 
-                        ProfileID,
-                        Color, 
-                        NozzleDiam, 
-                        PrintTimeMin,
-                        DimX, 
-                        DimY, 
-                        DimZ
-                    ) VALUES (?, ?, 'QUEUED', 3, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
+            # Gleiches Teil mehrfach in der BOM (z.B. in zwei Baugruppen) → eigene Zeilennummer
+            line_id = (file_id, part_name)
+            occurrence = occurrences.get(line_id, 0)
+            occurrences[line_id] = occurrence + 1
 
-                params = (
-                    job_id,
+            # Gebündelt: ein Job mit Stückzahl, sonst ein Job (Quantity 1) pro Stück
+            units = [('batch', qty)] if batched else [(unit, 1) for unit in range(qty)]
+
+            for unit, quantity in units:
+                job_key = f"{file_id}:{part_name}:{occurrence}:{unit}"
+                rows.append((
+                    f"JOB_{uuid.uuid4()}",
                     project_id,
                     part_name,
                     file_id,
@@ -1545,46 +1481,164 @@ class ProjectManager:
                     print_time,
                     dx,
                     dy,
-                    dz
-                )
+                    dz,
+                    quantity,
+                    job_key
+                ))
+        return rows
+
+    def _persist_production_jobs(self, project_id, parts_list, batched=False):
+        """
+        Schreibt die finalen Zeilen in ProductionJobs basierend auf dem neuen Schema.
+        Alle Jobs einer BOM gehen in EINER Transaktion per executemany in die DB
+        (alles oder nichts). Bereits vorhandene Jobs (gleicher JobKey) werden übersprungen.
+
+        Returns:
+            Anzahl der neu angelegten Jobs
+        """
+        rows = self._build_production_job_rows(project_id, parts_list, batched=batched)
+        if not rows:
+            return 0
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            # Altbestand von vor der JobKey-Einführung oder Jobs im jeweils anderen Modus
+            # (Stück- vs. Stückzahl-Jobs): Jobs existieren schon, nichts nachlegen
+            cursor.execute(
+                """
+                SELECT 1 FROM ProductionJobs
+                WHERE SourceProjectID = ? AND (JobKey IS NULL OR (JobKey LIKE '%:batch') != ?)
+                LIMIT 1
+                """,
+                (project_id, 1 if batched else 0)
+            )
+            if cursor.fetchone():
+                conn.commit()
+                return 0
+
+            cursor.executemany("""
+                INSERT INTO ProductionJobs (
+                    JobID, 
+                    SourceProjectID, 
+                    JobStatus, 
+                    Priority, 
+                    PartName,
+                    FileID,
+                    FileName,
+                    MaterialID, 
+                    ProfileID,
+                    Color, 
+                    NozzleDiam, 
+                    PrintTimeMin,
+                    DimX, 
+                    DimY, 
+                    DimZ,
+                    Quantity,
+                    JobKey
+                ) VALUES (?, ?, 'QUEUED', 3, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (SourceProjectID, JobKey) DO NOTHING
+            """, rows)
+            count = cursor.rowcount
 
-                self._execute_query(query, params)
-                count += 1
+            conn.commit()
+            if count:
+                publish('jobs', project_id=project_id, created=count, status='QUEUED')
+            return count
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
 
-        return count
+    # Spalten eines Queue-Eintrags im Board-Query (alles andere gehört zum Drucker)
+    _BOARD_QUEUE_COLUMNS = (
+        'QueueID', 'Position', 'Quantity', 'PlannedStart', 'PlannedEnd',
+        'JobID', 'PartName', 'PrintTimeMin', 'PlateTimeMin', 'JobQuantity'
+    )
+
+    def get_queue_version(self) -> int:
+        """Versionszähler des Drucker-Boards (DataVersions 'queue', per Trigger gepflegt)."""
+        row = self._execute_query(
+            "SELECT Version FROM DataVersions WHERE Name = 'queue'", fetch=True, fetch_one=True
+        )
+        return row['Version'] if row else 0
+
+    def get_printer_board(self):
+        """
+        (Queue-Version, Board) – das Board wird je Version einmal gebaut und geteilt,
+        damit ein Ereignis bei vielen offenen Tabs nur eine Board-Query auslöst.
+        """
+        version = self.get_queue_version()
+        printers = _board_cache.get(version)
+        if printers is None:
+            printers = self.get_all_printers_with_queue()
+            _board_cache.set(version, printers)
+        return version, printers
 
     def get_all_printers_with_queue(self) -> list:
         """
         Holt alle Drucker aus der Datenbank und ordnet ihnen ihre aktuell
         eingereihten Jobs aus der PrinterQueues-Tabelle zu (sortiert nach Position).
+        Eine Query (Drucker LEFT JOIN Queue), gruppiert in einem Durchlauf.
+
+        Pro Drucker zusätzlich:
+            QueueMinutes: Summe der Plattenzeiten (PrintTimeMin × Stück) der Queue
+            QueueETA:     geplantes Ende der Queue (PlannedEnd der letzten Platte),
+                          None solange nicht alle Einträge Planzeiten haben
+        Pro Job: StartOffsetMin = Minuten bis zum Start dieser Platte laut Queue.
         """
-        # 1. Alle Drucker abfragen
-        printers_query = "SELECT * FROM Printers"
-        printer_rows = self._execute_query(printers_query, fetch=True)
-        
-        # 2. Alle Queue-Jobs mit den zugehörigen Job-Details abfragen
-        queue_query = """
-            SELECT q.QueueID, q.PrinterID, q.Position, j.JobID, j.PartName, j.PrintTimeMin
-            FROM PrinterQueues q
-            JOIN ProductionJobs j ON q.JobID = j.JobID
-            ORDER BY q.PrinterID, q.Position ASC
-        """
-        queue_rows = self._execute_query(queue_query, fetch=True)
-        
-        # 3. Datenstruktur für das Frontend aufbereiten
+        query = """
+            SELECT p.*,
+                   q.QueueID, q.Position, q.Quantity, q.PlannedStart, q.PlannedEnd,
+                   j.JobID, j.PartName, j.PrintTimeMin,
+                   j.PrintTimeMin * q.Quantity AS PlateTimeMin, j.Quantity AS JobQuantity
+            FROM Printers p
+            LEFT JOIN PrinterQueues q ON q.PrinterID = p.PrinterID
+            LEFT JOIN ProductionJobs j ON j.JobID = q.JobID
+            ORDER BY p.rowid, q.Position ASC
+        """
+        rows = self._execute_query(query, fetch=True)
+        if not rows:
+            return []
+
+        # Spaltenindizes einmal bestimmen – Zugriff per Index statt per Name (sqlite3.Row)
+        columns = rows[0].keys()
+        printer_columns = [(i, key) for i, key in enumerate(columns) if key not in self._BOARD_QUEUE_COLUMNS]
+        queue_columns = [(columns.index(key), key) for key in self._BOARD_QUEUE_COLUMNS]
+        printer_index = columns.index('PrinterID')
+        queue_index = columns.index('QueueID')
+        plate_index = columns.index('PlateTimeMin')
+
         structured_printers = []
-        
-        for p_row in printer_rows:
-            printer_dict = dict(p_row)  # Konvertierung von sqlite3.Row zu dict
-            
-            # Alle Jobs filtern, die zu diesem spezifischen Drucker gehören
-            printer_dict['jobs'] = [
-                dict(q_row) for q_row in queue_rows 
-                if q_row['PrinterID'] == printer_dict['PrinterID']
-            ]
-            
-            structured_printers.append(printer_dict)
-            
+        printer_dict = None
+
+        for row in rows:
+            # Zeilen kommen nach Drucker sortiert → neuer Drucker beginnt, wenn die ID wechselt
+            if printer_dict is None or row[printer_index] != printer_dict['PrinterID']:
+                printer_dict = {key: row[i] for i, key in printer_columns}
+                printer_dict['jobs'] = []
+                printer_dict['QueueMinutes'] = 0
+                printer_dict['QueueETA'] = None
+                structured_printers.append(printer_dict)
+
+            if row[queue_index] is None:
+                continue  # Drucker ohne eingereihte Jobs
+
+            job = {key: row[i] for i, key in queue_columns}
+            job['PrinterID'] = row[printer_index]
+            job['StartOffsetMin'] = printer_dict['QueueMinutes']
+            printer_dict['QueueMinutes'] += row[plate_index] or 0
+            printer_dict['jobs'].append(job)
+
+        for printer_dict in structured_printers:
+            ends = [job['PlannedEnd'] for job in printer_dict['jobs']]
+            if ends and all(ends):
+                printer_dict['QueueETA'] = max(ends)
+
         return structured_printers
 
     def initialize_printer(self, printer_name, dim_x, dim_y, dim_z, cost_per_min):
@@ -1613,15 +1667,26 @@ class ProjectManager:
         ))
 
     def get_production_jobs_by_status(self, status):
-        """Holt alle Jobs eines bestimmten Status aus der DB."""
+        """
+        Holt alle Jobs eines bestimmten Status aus der DB.
+        OpenQuantity = Stück, die weder gedruckt noch in einer Drucker-Queue eingeplant sind.
+        """
         query = """
             SELECT 
-                JobID, SourceProjectID, JobStatus, Priority, PartName, FileID, FileName,
-                MaterialID, ProfileID, Color, NozzleDiam, PrintTimeMin, 
-                DimX, DimY, DimZ
-            FROM ProductionJobs 
-            WHERE JobStatus = ?
-            ORDER BY Priority ASC, JobID DESC
+                j.JobID, j.SourceProjectID, j.JobStatus, j.Priority, j.PartName, j.FileID, j.FileName,
+                j.MaterialID, j.ProfileID, j.Color, j.NozzleDiam, j.PrintTimeMin, 
+                j.DimX, j.DimY, j.DimZ,
+                j.Quantity, j.CompletedQuantity,
+                COALESCE(q.AssignedQuantity, 0) AS AssignedQuantity,
+                j.Quantity - j.CompletedQuantity - COALESCE(q.AssignedQuantity, 0) AS OpenQuantity
+            FROM ProductionJobs j
+            LEFT JOIN (
+                SELECT JobID, SUM(Quantity) AS AssignedQuantity
+                FROM PrinterQueues
+                GROUP BY JobID
+            ) q ON q.JobID = j.JobID
+            WHERE j.JobStatus = ?
+            ORDER BY j.Priority ASC, j.JobID DESC
         """
         # Nutze deinen DB-Wrapper, der Dicts zurückgibt
         rows = self._execute_query(query, (status,), fetch=True)
@@ -1631,64 +1696,179 @@ class ProjectManager:
         # Umwandlung: Jedes Row-Objekt wird zu einem Dict
         return [dict(row) for row in rows]
     
-    def assign_job_to_printer_queue(self, job_id: str, printer_id: str) -> tuple[bool, str]:
+    def assign_job_to_printer_queue(self, job_id: str, printer_id: str, quantity: int = None,
+                                    at_end: bool = False) -> tuple[bool, str]:
         """
-        Reiht einen Job nach dem LIFO-Prinzip auf Position 1 eines Druckers ein.
-        Nutzt die Multi-Query-Transaktionslogik des ProjectManagers.
+        Reiht einen Job (bzw. eine Teilmenge davon) nach dem LIFO-Prinzip auf Position 1
+        eines Druckers ein (at_end=True: ans Ende der Queue). Ohne quantity wird eine
+        volle Druckplatte eingeplant (so viele Stück, wie auf die Platte passen,
+        höchstens die offene Menge). Es wird genau eine Queue-Zeile geschrieben.
         """
-        queue_id = f"QUEUE_{uuid.uuid4()}"
-        
-        # Beide SQLs als atomare Transaktion vorbereiten
-        queries = [
-            (
-                "UPDATE PrinterQueues SET Position = Position + 1 WHERE PrinterID = ?", 
-                (printer_id,)
-            ),
-            (
-                "INSERT INTO PrinterQueues (QueueID, PrinterID, JobID, Position) VALUES (?, ?, ?, 1)", 
-                (queue_id, printer_id, job_id)
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            # Offene Menge prüfen und einreihen in EINER Schreibtransaktion (keine Doppelvergabe)
+            cursor.execute("BEGIN IMMEDIATE")
+
+            cursor.execute("""
+                SELECT j.Quantity - j.CompletedQuantity
+                       - COALESCE((SELECT SUM(q.Quantity) FROM PrinterQueues q WHERE q.JobID = j.JobID), 0) AS OpenQuantity,
+                       j.DimX, j.DimY
+                FROM ProductionJobs j
+                WHERE j.JobID = ?
+            """, (job_id,))
+            job = cursor.fetchone()
+            cursor.execute("SELECT DimX, DimY FROM Printers WHERE PrinterID = ?", (printer_id,))
+            printer = cursor.fetchone()
+
+            if not job or not printer:
+                conn.rollback()
+                return False, "Job oder Drucker nicht gefunden."
+
+            open_qty = job['OpenQuantity']
+            if open_qty <= 0:
+                conn.rollback()
+                return False, "Dieser Job ist bereits vollständig eingeplant."
+
+            if quantity is None:
+                quantity = min(open_qty, units_per_plate(job, printer))
+            elif quantity < 1 or quantity > open_qty:
+                conn.rollback()
+                return False, f"Ungültige Menge: {quantity} (offen: {open_qty})."
+
+            # Dünn besetzte Ränge: kein Verschieben der restlichen Queue nötig
+            if at_end:
+                rank = queue_ranks.end_rank(cursor, printer_id)
+            else:
+                rank = queue_ranks.front_rank(cursor, printer_id)
+            cursor.execute(
+                "INSERT INTO PrinterQueues (QueueID, PrinterID, JobID, Position, Quantity) VALUES (?, ?, ?, ?, ?)",
+                (f"QUEUE_{uuid.uuid4()}", printer_id, job_id, rank, quantity)
             )
-        ]
 
+            conn.commit()
+            publish('queue', printer_ids=[printer_id])
+            publish('jobs', job_ids=[job_id])
+            where = "ans Ende der Queue" if at_end else "an Position 1"
+            return True, f"{quantity} Stück erfolgreich {where} eingereiht."
+
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            return False, f"Datenbankfehler bei Zuweisung: {str(e)}"
+        finally:
+            cursor.close()
+
+    def complete_queue_entry(self, queue_id: str, printer_id: str) -> tuple[bool, str]:
+        """
+        Meldet eine Druckplatte als fertig: Queue-Eintrag entfernen und seine Stückzahl
+        auf CompletedQuantity des Jobs buchen. Sind alle Stück gedruckt → COMPLETED.
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
         try:
-            self._execute_query(queries, multi_queries=True)
-            return True, "Job erfolgreich an Position 1 eingereiht."
-            
+            cursor.execute("BEGIN IMMEDIATE")
+
+            cursor.execute(
+                "SELECT JobID, Quantity FROM PrinterQueues WHERE QueueID = ? AND PrinterID = ?",
+                (queue_id, printer_id)
+            )
+            entry = cursor.fetchone()
+            if not entry:
+                conn.rollback()
+                return False, "Job wurde in der Queue nicht gefunden."
+
+            cursor.execute("DELETE FROM PrinterQueues WHERE QueueID = ?", (queue_id,))
+            cursor.execute("""
+                UPDATE ProductionJobs
+                SET CompletedQuantity = MIN(Quantity, CompletedQuantity + ?),
+                    JobStatus = CASE WHEN CompletedQuantity + ? >= Quantity THEN 'COMPLETED' ELSE JobStatus END
+                WHERE JobID = ?
+            """, (entry['Quantity'], entry['Quantity'], entry['JobID']))
+
+            cursor.execute("SELECT JobStatus FROM ProductionJobs WHERE JobID = ?", (entry['JobID'],))
+            status = cursor.fetchone()['JobStatus']
+
+            conn.commit()
+            publish('queue', printer_ids=[printer_id])
+            publish('jobs', job_ids=[entry['JobID']], status=status)
+            return True, f"{entry['Quantity']} Stück als gedruckt gemeldet."
+
         except sqlite3.Error as e:
-            error_msg = str(e)
-            if "UNIQUE" in error_msg:
-                return False, "Dieser Job existiert bereits in der Warteschlange dieses Druckers."
-            return False, f"Datenbankfehler bei Zuweisung: {error_msg}"
-        
+            if conn.in_transaction:
+                conn.rollback()
+            return False, f"Datenbankfehler: {str(e)}"
+        finally:
+            cursor.close()
+
     def remove_job_from_printer_queue(self, queue_id: str, printer_id: str) -> tuple[bool, str]:
         try:
-            # 1. Position über die QueueID ermitteln
-            pos_query = "SELECT Position FROM PrinterQueues WHERE QueueID = ?"
-            row = self._execute_query(pos_query, (queue_id,), fetch=True, fetch_one=True)
-            
-            if not row:
+            # Dünn besetzte Ränge: nur diesen einen Eintrag löschen, nichts nachnummerieren
+            cursor = self._get_connection().execute(
+                "DELETE FROM PrinterQueues WHERE QueueID = ? AND PrinterID = ?",
+                (queue_id, printer_id)
+            )
+            if cursor.rowcount == 0:
                 return False, "Job wurde in der Queue nicht gefunden."
-    
-            removed_pos = row['Position']
-    
-            # 2. Präzise nur diesen einen Eintrag löschen
-            queries = [
-                (
-                    "DELETE FROM PrinterQueues WHERE QueueID = ?", 
-                    (queue_id,)
-                ),
-                (
-                    "UPDATE PrinterQueues SET Position = Position - 1 WHERE PrinterID = ? AND Position > ?", 
-                    (printer_id, removed_pos)
-                )
-            ]
-            
-            self._execute_query(queries, multi_queries=True)
+
+            publish('queue', printer_ids=[printer_id])
+            publish('jobs')  # Menge ist wieder offen
             return True, "Job erfolgreich entfernt."
     
         except sqlite3.Error as e:
             return False, f"Datenbankfehler: {str(e)}"
 
+    def reorder_printer_queue(self, printer_id: str, queue_ids: list):
+        """
+        Setzt die Reihenfolge der Queue eines Druckers (Drag & Drop im Drucker-Board).
+        queue_ids muss alle aktuellen Einträge des Druckers enthalten und darf Einträge
+        anderer Drucker enthalten – diese werden auf printer_id verschoben.
+        Geschrieben werden nur die Einträge, die ihren Rang wirklich ändern müssen.
+
+        Returns:
+            (True, Liste der betroffenen PrinterIDs) oder (False, Fehlermeldung)
+        """
+        if len(set(queue_ids)) != len(queue_ids):
+            return False, "Die neue Reihenfolge enthält doppelte Einträge."
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            placeholders = ', '.join('?' for _ in queue_ids) or 'NULL'
+            cursor.execute(
+                f"""
+                SELECT QueueID, PrinterID, Position FROM PrinterQueues
+                WHERE PrinterID = ? OR QueueID IN ({placeholders})
+                """,
+                (printer_id, *queue_ids)
+            )
+            entries = {row['QueueID']: row for row in cursor.fetchall()}
+
+            missing = [queue_id for queue_id in queue_ids if queue_id not in entries]
+            stale = [queue_id for queue_id, row in entries.items()
+                     if row['PrinterID'] == printer_id and queue_id not in queue_ids]
+            if missing or stale:
+                conn.rollback()
+                return False, "Die Queue wurde inzwischen geändert – bitte neu laden."
+
+            current_ranks = {queue_id: row['Position'] for queue_id, row in entries.items()
+                             if row['PrinterID'] == printer_id}
+            queue_ranks.apply_order(cursor, printer_id, queue_ids, current_ranks)
+
+            conn.commit()
+            affected = sorted({row['PrinterID'] for row in entries.values()} | {printer_id})
+            publish('queue', printer_ids=affected)
+            return True, affected
+
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            return False, f"Datenbankfehler: {str(e)}"
+        finally:
+            cursor.close()
+
     def get_paginated_transactions(self, limit: int, offset: int) -> list:
         """
         Holt Banktransaktionen sortiert nach Buchungsdatum, limitiert auf 'limit' 
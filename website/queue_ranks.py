@@ -0,0 +1,137 @@
+import bisect
+
+# =================================================================
+# QUEUE-RÄNGE: dünn besetzte Positionen in PrinterQueues
+# =================================================================
+# PrinterQueues.Position ist kein fortlaufender Zähler mehr, sondern ein Rang mit
+# Lücken (Schrittweite RANK_STEP). Sortiert wird weiterhin per ORDER BY Position.
+#   - vorne einreihen:  kleinster Rang - RANK_STEP          → 1 Zeile geschrieben
+#   - hinten anhängen:  größter Rang + RANK_STEP            → 1 Zeile geschrieben
+#   - verschieben:      Mitte zwischen den neuen Nachbarn   → 1 Zeile geschrieben
+#   - entfernen:        nur DELETE, kein Nachnummerieren
+# Ist zwischen zwei Nachbarn kein Platz mehr, wird die Queue dieses einen Druckers
+# neu verteilt (lazy rebalancing) – bei RANK_STEP = 1024 frühestens nach ~10
+# Einfügungen an derselben Stelle.
+#
+# Alle Funktionen arbeiten auf einem Cursor innerhalb einer offenen Transaktion.
+
+RANK_STEP = 1024
+
+
+def front_rank(cursor, printer_id):
+    """Rang für einen neuen Eintrag ganz vorne in der Queue."""
+    cursor.execute("SELECT MIN(Position) AS Rank FROM PrinterQueues WHERE PrinterID = ?", (printer_id,))
+    row = cursor.fetchone()
+    return RANK_STEP if row['Rank'] is None else row['Rank'] - RANK_STEP
+
+
+def end_rank(cursor, printer_id):
+    """Rang für einen neuen Eintrag ganz hinten in der Queue."""
+    cursor.execute("SELECT MAX(Position) AS Rank FROM PrinterQueues WHERE PrinterID = ?", (printer_id,))
+    row = cursor.fetchone()
+    return RANK_STEP if row['Rank'] is None else row['Rank'] + RANK_STEP
+
+
+def rebalance(cursor, printer_id, order=None):
+    """
+    Verteilt die Ränge einer Queue wieder gleichmäßig (RANK_STEP, 2*RANK_STEP, ...).
+    order: gewünschte Reihenfolge der QueueIDs, sonst die aktuelle.
+
+    Returns:
+        Anzahl geschriebener Zeilen
+    """
+    if order is None:
+        cursor.execute(
+            "SELECT QueueID FROM PrinterQueues WHERE PrinterID = ? ORDER BY Position",
+            (printer_id,)
+        )
+        order = [row['QueueID'] for row in cursor.fetchall()]
+
+    cursor.executemany(
+        "UPDATE PrinterQueues SET PrinterID = ?, Position = ? WHERE QueueID = ?",
+        [(printer_id, (index + 1) * RANK_STEP, queue_id) for index, queue_id in enumerate(order)]
+    )
+    return len(order)
+
+
+def _longest_increasing_run(ranks):
+    """
+    Indizes einer längsten streng steigenden Teilfolge von ranks (None wird übersprungen).
+    Diese Einträge behalten ihren Rang – nur die übrigen müssen neu geschrieben werden.
+    """
+    tails, tail_index, previous = [], [], {}
+    for index, rank in enumerate(ranks):
+        if rank is None:
+            continue
+        pos = bisect.bisect_left(tails, rank)
+        previous[index] = tail_index[pos - 1] if pos else None
+        if pos == len(tails):
+            tails.append(rank)
+            tail_index.append(index)
+        else:
+            tails[pos] = rank
+            tail_index[pos] = index
+
+    keep = set()
+    index = tail_index[-1] if tail_index else None
+    while index is not None:
+        keep.add(index)
+        index = previous[index]
+    return keep
+
+
+def _ranks_between(low, high, count):
+    """count ganzzahlige Ränge streng zwischen low und high (None = offen); None bei zu wenig Platz."""
+    if low is None and high is None:
+        return [(i + 1) * RANK_STEP for i in range(count)]
+    if low is None:
+        return [high - (count - i) * RANK_STEP for i in range(count)]
+    if high is None:
+        return [low + (i + 1) * RANK_STEP for i in range(count)]
+
+    spacing = (high - low) // (count + 1)
+    if spacing < 1:
+        return None
+    return [low + (i + 1) * spacing for i in range(count)]
+
+
+def apply_order(cursor, printer_id, order, current_ranks):
+    """
+    Bringt die Queue von printer_id in die Reihenfolge order (Liste von QueueIDs).
+    current_ranks: QueueID → aktueller Rang, nur für Einträge, die schon auf diesem
+    Drucker liegen (Einträge von anderen Druckern werden hierher verschoben).
+
+    Schreibt nur die Einträge, die nicht schon in richtiger relativer Reihenfolge
+    stehen – ein einzelnes Verschieben per Drag & Drop ist damit genau 1 Zeile.
+
+    Returns:
+        Anzahl geschriebener Zeilen
+    """
+    ranks = [current_ranks.get(queue_id) for queue_id in order]
+    keep = _longest_increasing_run(ranks)
+
+    updates = []
+    index = 0
+    while index < len(order):
+        if index in keep:
+            index += 1
+            continue
+
+        # Block aufeinanderfolgender Einträge, die einen neuen Rang brauchen
+        start = index
+        while index < len(order) and index not in keep:
+            index += 1
+        low = ranks[start - 1] if start > 0 else None
+        high = ranks[index] if index < len(order) else None
+
+        new_ranks = _ranks_between(low, high, index - start)
+        if new_ranks is None:
+            # Kein Platz mehr zwischen den Nachbarn → diese eine Queue neu verteilen
+            return rebalance(cursor, printer_id, order)
+
+        for offset, rank in enumerate(new_ranks):
+            ranks[start + offset] = rank
+            updates.append((printer_id, rank, order[start + offset]))
+
+    cursor.executemany("UPDATE PrinterQueues SET PrinterID = ?, Position = ? WHERE QueueID = ?", updates)
+    return len(updates)
@@ -0,0 +1,53 @@
+import re
+
+# =================================================================
+# VOLLTEXTSUCHE (FTS5) – Hilfsfunktionen
+# =================================================================
+# Der Suchindex ProductSearch (siehe migrations.py, Version 4) speichert Texte
+# bereits "gefaltet": Umlaute werden nach DIN 5007-2 ausgeschrieben (ä → ae, ß → ss).
+# Dieselbe Faltung wird auf die Suchanfrage angewendet, damit "Müller" und
+# "Mueller" gleich gefunden werden. Übrige Akzente (é, à, ...) entfernt der
+# Tokenizer selbst (unicode61 remove_diacritics 2).
+
+UMLAUT_FOLDING = (
+    ('ä', 'ae'), ('ö', 'oe'), ('ü', 'ue'),
+    ('Ä', 'Ae'), ('Ö', 'Oe'), ('Ü', 'Ue'),
+    ('ß', 'ss'),
+)
+
+# Gewichtung der FTS-Spalten für bm25 (Name > Kategorie/Material > Beschreibung)
+# Reihenfolge: ProductID (UNINDEXED), ProductName, ProductDescription, ProductCategory, MaterialType
+BM25_WEIGHTS = (0.0, 10.0, 1.0, 3.0, 3.0)
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def fold_umlauts(text):
+    """Faltet Umlaute in Python (für die Suchanfrage)."""
+    if not text:
+        return ''
+    for umlaut, replacement in UMLAUT_FOLDING:
+        text = text.replace(umlaut, replacement)
+    return text
+
+
+def fold_umlauts_sql(expression):
+    """Liefert denselben Faltungs-Ausdruck als SQL (für Trigger / Backfill des Suchindex)."""
+    for umlaut, replacement in UMLAUT_FOLDING:
+        expression = f"replace({expression}, '{umlaut}', '{replacement}')"
+    return expression
+
+
+def build_match_query(search_query):
+    """
+    Wandelt freie Nutzereingabe in einen sicheren FTS5-MATCH-Ausdruck um.
+    Jedes Wort wird gequotet (keine FTS-Syntax-Injection) und als Präfix gesucht,
+    alle Wörter müssen vorkommen (implizites AND): 'Halt Rot' → '"halt"* "rot"*'
+
+    Returns:
+        MATCH-String oder None, wenn die Eingabe keine suchbaren Wörter enthält.
+    """
+    tokens = _TOKEN_PATTERN.findall(fold_umlauts(search_query or '').lower())
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
@@ -0,0 +1,114 @@
+// Clientseitige Dashboard-Charts (DASHBOARD_CHART_MODE=client)
+// Holt spaltenweises JSON von /admin/api/metrics/* und zeichnet schlichte SVG-Charts.
+// Der Browser revalidiert per ETag → unveränderte Daten kommen als 304 ohne Body.
+
+const SVG_NS = 'http://www.w3.org/2000/svg';
+const WIDTH = 600;
+const HEIGHT = 350;
+const PADDING = { top: 20, right: 15, bottom: 55, left: 60 };
+
+const COLORS = {
+    line: '#1A237E',
+    positive: '#28a745',
+    negative: '#dc3545',
+    grid: '#dee2e6',
+    text: '#343a40',
+};
+
+function svgElement(tag, attrs = {}) {
+    const el = document.createElementNS(SVG_NS, tag);
+    Object.entries(attrs).forEach(([key, value]) => el.setAttribute(key, value));
+    return el;
+}
+
+function formatEuro(value) {
+    return value.toLocaleString('de-DE', { maximumFractionDigits: 0 }) + ' €';
+}
+
+function renderChart(container, dates, values, kind) {
+    container.innerHTML = '';
+    if (!dates.length) {
+        container.innerHTML = '<p class="text-muted small m-0">Keine Daten im gewählten Zeitraum.</p>';
+        return;
+    }
+
+    const svg = svgElement('svg', { viewBox: `0 0 ${WIDTH} ${HEIGHT}`, class: 'img-fluid' });
+    const plotW = WIDTH - PADDING.left - PADDING.right;
+    const plotH = HEIGHT - PADDING.top - PADDING.bottom;
+
+    // Wertebereich immer inkl. 0, damit Balken an der Nulllinie stehen
+    const minY = Math.min(0, ...values);
+    const maxY = Math.max(0, ...values);
+    const spanY = (maxY - minY) || 1;
+    const y = (v) => PADDING.top + plotH - ((v - minY) / spanY) * plotH;
+    const step = plotW / dates.length;
+    const x = (i) => PADDING.left + step * (i + 0.5);
+
+    // Hilfslinien + Y-Beschriftung
+    for (let t = 0; t <= 4; t++) {
+        const value = minY + (spanY * t) / 4;
+        svg.appendChild(svgElement('line', {
+            x1: PADDING.left, x2: WIDTH - PADDING.right, y1: y(value), y2: y(value),
+            stroke: COLORS.grid, 'stroke-dasharray': '4 3',
+        }));
+        const label = svgElement('text', {
+            x: PADDING.left - 6, y: y(value) + 4, 'text-anchor': 'end', 'font-size': 10, fill: COLORS.text,
+        });
+        label.textContent = formatEuro(value);
+        svg.appendChild(label);
+    }
+
+    if (kind === 'bar') {
+        svg.appendChild(svgElement('line', {
+            x1: PADDING.left, x2: WIDTH - PADDING.right, y1: y(0), y2: y(0), stroke: 'black', 'stroke-width': 0.8,
+        }));
+        values.forEach((value, i) => {
+            const top = Math.min(y(value), y(0));
+            svg.appendChild(svgElement('rect', {
+                x: x(i) - step * 0.4, y: top, width: step * 0.8, height: Math.abs(y(value) - y(0)),
+                fill: value >= 0 ? COLORS.positive : COLORS.negative, opacity: 0.85,
+            }));
+        });
+    } else {
+        const points = values.map((value, i) => `${x(i)},${y(value)}`).join(' ');
+        svg.appendChild(svgElement('polyline', {
+            points, fill: 'none', stroke: COLORS.line, 'stroke-width': 2,
+        }));
+    }
+
+    // X-Beschriftung: höchstens ~12 Labels, damit sich nichts überlappt
+    const labelEvery = Math.ceil(dates.length / 12);
+    dates.forEach((date, i) => {
+        if (i % labelEvery !== 0) return;
+        const label = svgElement('text', {
+            x: x(i), y: HEIGHT - PADDING.bottom + 14, 'font-size': 9, fill: COLORS.text,
+            'text-anchor': 'end', transform: `rotate(-30 ${x(i)} ${HEIGHT - PADDING.bottom + 14})`,
+        });
+        label.textContent = date;
+        svg.appendChild(label);
+    });
+
+    container.appendChild(svg);
+}
+
+async function loadChart(container, bucket) {
+    const url = `${container.dataset.metricUrl}?bucket=${encodeURIComponent(bucket)}`;
+    try {
+        const response = await fetch(url, { credentials: 'same-origin' });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const series = await response.json();
+        renderChart(container, series.dates, series[container.dataset.series], container.dataset.kind);
+    } catch (err) {
+        console.error('Chart konnte nicht geladen werden:', err);
+        container.innerHTML = '<p class="text-danger small m-0">Chart konnte nicht geladen werden.</p>';
+    }
+}
+
+function loadAllCharts() {
+    const bucketSelect = document.getElementById('chart-bucket');
+    const bucket = bucketSelect ? bucketSelect.value : 'day';
+    document.querySelectorAll('.dashboard-chart').forEach((container) => loadChart(container, bucket));
+}
+
+document.getElementById('chart-bucket')?.addEventListener('change', loadAllCharts);
+loadAllCharts();
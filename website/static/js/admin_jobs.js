@@ -69,6 +69,7 @@ function loadJobs(status) {
                         <span class="text-muted">X:</span>${job.DimX} <span class="text-muted">Y:</span>${job.DimY} <span class="text-muted">Z:</span>${job.DimZ}
                     </td>
                     <td>${job.PrintTimeMin} Min</td>
+                    <td>${renderQuantity(job)}</td>
                     <td>${renderStatusBadge(job.JobStatus)}</td>
                     <td class="text-end">
                         <button class="btn btn-sm btn-outline-primary" onclick="assignToPrinter('${job.JobID}')">
@@ -82,6 +83,17 @@ function loadJobs(status) {
             });
         });
 }
+/**
+ * Stückzahl eines Jobs: gedruckt / gesamt, darunter die noch nicht eingeplante Menge
+ */
+function renderQuantity(job) {
+    if (job.Quantity <= 1) return '<span class="text-muted small">1</span>';
+    return `
+        <div class="fw-bold">${job.CompletedQuantity} / ${job.Quantity}</div>
+        <div class="small text-muted">${job.OpenQuantity} offen</div>
+    `;
+}
+
 function renderStatusBadge(status) {
     const mapping = {
         'QUEUED': 'bg-secondary',
@@ -1,3 +1,28 @@
+// Live-Ereignisse (SSE, /admin/events): Board und Job-Pool laden nur nach einer Änderung neu.
+// Polling nur noch als Fallback – der Server antwortet per ETag mit 304, solange sich nichts geändert hat.
+const PRINTER_POLL_MS = 15000;          // ohne Live-Verbindung
+const PRINTER_SAFETY_POLL_MS = 60000;   // mit Live-Verbindung (Ereignisse anderer Worker-Prozesse)
+const EVENT_DEBOUNCE_MS = 300;          // mehrere Ereignisse einer Aktion → ein Fetch
+let lastPrinterEtag = null;
+let lastPrinterCheck = 0;
+let eventStreamOpen = false;
+
+/**
+ * Restlaufzeit einer Queue: geplantes Ende (Auto-Planung) oder jetzt + Summe der Plattenzeiten
+ */
+function renderQueueEta(p) {
+    if (!p.jobs || p.jobs.length === 0) return '<small class="text-muted">frei</small>';
+
+    const eta = p.QueueETA
+        ? new Date(p.QueueETA.replace(' ', 'T'))
+        : new Date(Date.now() + p.QueueMinutes * 60000);
+    const hours = Math.floor(p.QueueMinutes / 60);
+    const minutes = Math.round(p.QueueMinutes % 60);
+    const label = eta.toLocaleString('de-DE', { weekday: 'short', hour: '2-digit', minute: '2-digit' });
+
+    return `<small class="text-muted" title="${hours} h ${minutes} min Druckzeit in der Queue">ETA ${label}</small>`;
+}
+
 function renderPrinterCard(p) {
     const dbStatus = p.PrinterStatus;
     const filamentPct = p.FilamentPct || 100;
@@ -14,6 +39,7 @@ function renderPrinterCard(p) {
             <div class="notch-container notch-top d-flex justify-content-between align-items-center">
                 <h5 class="m-0 text-primary-custom">${p.PrinterName}</h5>
                 <div class="d-flex align-items-center gap-3">
+                    ${renderQueueEta(p)}
                     <span class="fs-4">${p.MaintenanceRequired === 1 ? '⚠️' : '✅'}</span>
                     <span class="badge bg-danger px-3 py-1">${dbStatus}</span>
                 </div>
@@ -31,15 +57,22 @@ function renderPrinterCard(p) {
                     </thead>
                     <tbody>
                         ${p.jobs && p.jobs.length > 0 ? p.jobs.map((job, index) => `
-                            <tr>
+                            <tr draggable="true" data-queue-id="${job.QueueID}" style="cursor: grab;"
+                                ondragstart="startQueueDrag(event, '${job.QueueID}')"
+                                ondragover="event.preventDefault();"
+                                ondrop="handleQueueDrop(event, '${p.PrinterID}', '${job.QueueID}');">
                                 <td class="ps-2">
                                     <span class="fw-bold fs-5">${index + 1}.</span>
                                 </td>
                                 <td class="small fw-bold text-truncate" style="max-width: 130px;" title="${job.PartName}">
-                                    ${job.PartName}
+                                    ${job.PartName}${job.Quantity > 1 ? ` <span class="badge bg-light text-dark border">×${job.Quantity}</span>` : ''}
                                 </td>
-                                <td class="small text-muted">${job.PrintTimeMin} Min</td>
-                                <td class="text-center">
+                                <td class="small text-muted">${job.PlateTimeMin} Min</td>
+                                <td class="text-center text-nowrap">
+                                    <button class="btn btn-sm btn-outline-success" title="Platte fertig"
+                                            onclick="completeQueueEntry('${job.QueueID}', '${p.PrinterID}')">
+                                        ✔
+                                    </button>
                                     <button class="btn btn-sm btn-outline-danger" 
                                             onclick="removeJobFromPrinter('${job.QueueID}', '${p.PrinterID}')">
                                         ✖
@@ -96,12 +129,17 @@ async function refreshPrinterDashboard() {
     const container = document.getElementById('printer_grid_container');
     if (!container) return;
 
+    lastPrinterCheck = Date.now();
     try {
-        const response = await fetch('/admin/get_printers');
+        // Browser-Cache revalidiert per If-None-Match; ein 304 kommt hier als 200 aus dem Cache an
+        const response = await fetch('/admin/get_printers', { cache: 'no-cache' });
         if (!response.ok) throw new Error(`Server-Fehler: ${response.status}`);
+
+        // Gleiche Queue-Version wie beim letzten Rendern → DOM nicht anfassen
+        const etag = response.headers.get('ETag');
+        if (etag && etag === lastPrinterEtag) return;
         
         const printers = await response.json(); 
-        console.log("Drucker Daten:", printers); // PRÜFUNG IN DER KONSOLE (F12)
 
         if (printers && printers.length > 0) {
             // Dies löscht den Spinner und setzt die Karten nebeneinander
@@ -109,6 +147,7 @@ async function refreshPrinterDashboard() {
         } else {
             container.innerHTML = '<div class="text-white p-5">Keine Drucker in der Datenbank.</div>';
         }
+        lastPrinterEtag = etag;
 
     } catch (err) {
         console.error("Dashboard Error:", err);
@@ -126,6 +165,12 @@ window.handleJobDrop = function(e, printerId) {
     const wrapper = document.querySelector(`[data-printer-id="${printerId}"]`);
     if (wrapper) wrapper.classList.remove('printer-drag-hover');
 
+    // Queue-Eintrag (statt Job aus dem Pool) auf die Karte gezogen → ans Ende dieser Queue
+    if (e.dataTransfer.getData('application/x-queue-id')) {
+        window.handleQueueDrop(e, printerId, null);
+        return;
+    }
+
     // JobID aus dem Datentransfer holen
     const jobId = e.dataTransfer.getData('text/plain');
     if (!jobId) return;
@@ -187,6 +232,125 @@ window.removeJobFromPrinter = function(queueId, printerId) {
     .catch(err => console.error("Netzwerkfehler beim Entfernen des Jobs:", err));
 };
 
+// Queue-Einträge per Drag & Drop umsortieren (auch zwischen Druckern)
+window.startQueueDrag = function(e, queueId) {
+    e.dataTransfer.setData('application/x-queue-id', queueId);
+    e.dataTransfer.effectAllowed = 'move';
+};
+
+window.handleQueueDrop = function(e, printerId, beforeQueueId) {
+    // Job aus dem Pool auf eine Queue-Zeile gezogen → normal an die Karte weiterreichen
+    const queueId = e.dataTransfer.getData('application/x-queue-id');
+    if (!queueId) return;
+
+    e.preventDefault();
+    e.stopPropagation();
+
+    const wrapper = document.querySelector(`[data-printer-id="${printerId}"]`);
+    wrapper.classList.remove('printer-drag-hover');
+    if (queueId === beforeQueueId) return;
+
+    // Neue Reihenfolge der Ziel-Queue: gezogenen Eintrag vor dem Ziel-Eintrag einfügen
+    const queueIds = Array.from(wrapper.querySelectorAll('tr[data-queue-id]'))
+        .map(row => row.dataset.queueId)
+        .filter(id => id !== queueId);
+    const index = beforeQueueId ? queueIds.indexOf(beforeQueueId) : queueIds.length;
+    queueIds.splice(index < 0 ? queueIds.length : index, 0, queueId);
+
+    fetch('/admin/reorder_printer_queue', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            printer_id: printerId,
+            queue_ids: queueIds
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) alert("Fehler beim Umsortieren: " + data.message);
+        refreshPrinterDashboard();
+    })
+    .catch(err => console.error("Netzwerkfehler beim Umsortieren der Queue:", err));
+};
+
+window.scheduleJobs = function() {
+    fetch('/admin/schedule_jobs', { method: 'POST' })
+    .then(response => response.json())
+    .then(data => {
+        alert(data.message);
+        if (data.success) {
+            if (typeof window.refreshJobPool === 'function') window.refreshJobPool();
+            refreshPrinterDashboard();
+        }
+    })
+    .catch(err => console.error("Netzwerkfehler bei der automatischen Planung:", err));
+};
+
+window.completeQueueEntry = function(queueId, printerId) {
+    fetch('/admin/complete_queue_entry', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            queue_id: queueId,
+            printer_id: printerId
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            if (typeof window.refreshJobPool === 'function') window.refreshJobPool();
+            refreshPrinterDashboard();
+        } else {
+            alert("Fehler beim Abschließen: " + data.message);
+        }
+    })
+    .catch(err => console.error("Netzwerkfehler beim Abschließen der Platte:", err));
+};
+
+function debounce(fn, ms) {
+    let timer = null;
+    return () => {
+        clearTimeout(timer);
+        timer = setTimeout(fn, ms);
+    };
+}
+
+/**
+ * Abonniert /admin/events. Der Browser verbindet nach Abbruch selbst neu (Last-Event-ID);
+ * nach einer Unterbrechung wird einmal komplett neu geladen, da Ereignisse fehlen können.
+ */
+function connectProductionEvents() {
+    if (!window.EventSource) return;
+
+    const refreshBoard = debounce(refreshPrinterDashboard, EVENT_DEBOUNCE_MS);
+    const refreshPool = debounce(() => {
+        if (typeof window.refreshJobPool === 'function') window.refreshJobPool();
+    }, EVENT_DEBOUNCE_MS);
+    let interrupted = false;
+
+    const source = new EventSource('/admin/events');
+    source.onopen = () => {
+        eventStreamOpen = true;
+        if (interrupted) { refreshBoard(); refreshPool(); }
+    };
+    source.onerror = () => {
+        eventStreamOpen = false;
+        interrupted = true;
+    };
+    source.addEventListener('queue', refreshBoard);
+    source.addEventListener('jobs', refreshPool);
+    source.addEventListener('resync', () => { refreshBoard(); refreshPool(); });
+}
+
 document.addEventListener('DOMContentLoaded', () => {
     refreshPrinterDashboard();
+    connectProductionEvents();
+    setInterval(() => {
+        const interval = eventStreamOpen ? PRINTER_SAFETY_POLL_MS : PRINTER_POLL_MS;
+        if (Date.now() - lastPrinterCheck >= interval) refreshPrinterDashboard();
+    }, PRINTER_POLL_MS);
 });
\ No newline at end of file
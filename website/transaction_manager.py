@@ -1,92 +1,31 @@
 import os
 import sqlite3
 import io
-import base64
 from datetime import datetime
+from .database import DatabaseManager
+from .cache import TTLCache
 
-# WICHTIG: Matplotlib auf Non-GUI (Agg) umstellen, bevor es importiert wird!
-# Verhindert Abstürze im Flask-Thread-Kontext.
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+# WICHTIG: Objektorientierte Matplotlib-API (Figure + Agg-Canvas) statt pyplot!
+# pyplot hält eine globale "aktuelle Figur" und ist damit nicht threadsicher;
+# eigene Figure-Objekte kommen ohne globalen Zustand aus.
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 TEMP_UPLOAD_FOLDER = os.getenv('UPLOAD_DIR_PATH')
 
+# Gerenderte Dashboard-Plots (PNG-Bytes), Schlüssel: (Plot-Name, Datenversion).
+# Ändern sich die Daten, zählt ein Trigger die Version hoch (Tabelle DataVersions,
+# migrations.py Version 7) → neuer Schlüssel, der alte Eintrag altert einfach aus.
+_plot_cache = TTLCache(maxsize=16, ttl=24 * 3600)
+_NOT_CACHED = object()
 
-class TransactionManager:
+
+class TransactionManager(DatabaseManager):
     def __init__(self):
-        self.db_path = os.getenv('DB_PATH')
+        super().__init__()
         # Erstellt den Standardordner, falls er nicht existiert (wichtig für Entwickler-Setup)
         os.makedirs(TEMP_UPLOAD_FOLDER, exist_ok=True)
 
-    def _execute_query(
-        self,
-        query,
-        params=(),
-        fetch=False,
-        get_lastrowid=False,
-        fetch_one=False,
-        multi_queries=False
-    ):
-        """
-        Erweiterte DB-Execution mit Unterstützung für mehrere Queries in einer Transaktion.
-
-        Args:
-            query: 
-                - str → einzelner SQL-String
-                - list of (query_str, params_tuple) → mehrere Queries (nur bei multi_queries=True)
-            params: Parameter für einzelne Query (tuple)
-            fetch: Soll ein Resultset zurückgegeben werden? (SELECT)
-            get_lastrowid: Soll cursor.lastrowid zurückgegeben werden? (INSERT)
-            fetch_one: fetchone() statt fetchall()
-            multi_queries: True → query ist Liste von (query, params)-Tuplen
-
-        Returns:
-            - Bei fetch: sqlite3.Row oder Liste von sqlite3.Row
-            - Bei get_lastrowid: int (lastrowid)
-            - Sonst: None
-            - Bei Fehler: wirft sqlite3.Error
-        """
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            # ── Wichtig: row_factory für dict-ähnlichen Zugriff ──
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-
-            if multi_queries and isinstance(query, list):
-                # Mehrere Queries → Transaktion
-                cursor.execute("BEGIN TRANSACTION")
-                for q, p in query:
-                    cursor.execute(q, p)
-                conn.commit()
-            else:
-                # Einzelne Query
-                cursor.execute(query, params)
-                conn.commit()
-
-            # Ergebnis abholen (nur bei SELECT relevant)
-            if fetch:
-                if fetch_one:
-                    return cursor.fetchone()           # → sqlite3.Row oder None
-                return cursor.fetchall()               # → Liste von sqlite3.Row
-
-            # Letzte eingefügte ID (für INSERT)
-            if get_lastrowid:
-                return cursor.lastrowid
-
-            # Standard-Rückgabe (UPDATE, DELETE, INSERT ohne ID-Interesse)
-            return None
-
-        except sqlite3.Error as e:
-            if conn:
-                conn.rollback()
-            raise  # Fehler weiterwerfen – aufrufende Methode kann loggen/flashen
-
-        finally:
-            if conn:
-                conn.close()
-
     def get_primary_bank_account(self):
         """Lädt das primäre Bankkonto aus BankAccounts für den CurrentBalance-Eintrag"""
         query = "SELECT AccountID, IBAN, AccountName, BankName, CurrentBalance, LastSync FROM BankAccounts LIMIT 1"
@@ -111,88 +50,193 @@ class TransactionManager:
             return []
         
 # =========================================================================
-    # MATPLOTLIB PLOT GENERIERUNG (Liefert Base64-Strings fürs Template)
+    # MATPLOTLIB PLOT GENERIERUNG (PNG-Bytes, gecacht pro Datenversion)
     # =========================================================================
 
-    def generate_order_plot(self):
-        """Generiert den Plot für Bestellumsätze aggregiert nach Datum"""
+    # Plot-Name → (Datenbereich in DataVersions, Render-Methode)
+    PLOTS = {
+        'orders': ('orders', '_render_order_plot'),
+        'bank': ('bank', '_render_bank_plot'),
+    }
+
+    # Maximal so viele Tage landen im Plot (die jüngsten) – unabhängig von der Historiengröße
+    PLOT_MAX_DAYS = 365
+
+    def get_daily_order_revenue(self, limit=PLOT_MAX_DAYS):
+        """Liest die jüngsten Tageswerte aus DailyOrderRevenue (aufsteigend nach Tag)."""
         query = """
-            SELECT OrderDate, OrderAmount 
-            FROM Orders 
-            WHERE IsArchived = 0 
-            ORDER BY OrderDate ASC
+            SELECT Day, OrderCount, RevenueCents
+            FROM (SELECT * FROM DailyOrderRevenue ORDER BY Day DESC LIMIT ?)
+            ORDER BY Day ASC
         """
+        return self._execute_query(query, (limit,), fetch=True)
+
+    def get_daily_cashflow(self, limit=PLOT_MAX_DAYS):
+        """Liest die jüngsten Tageswerte aus DailyCashflow (aufsteigend nach Tag)."""
+        query = """
+            SELECT Day, TransactionCount, InflowCents, OutflowCents
+            FROM (SELECT * FROM DailyCashflow ORDER BY Day DESC LIMIT ?)
+            ORDER BY Day ASC
+        """
+        return self._execute_query(query, (limit,), fetch=True)
+
+    def get_data_versions(self):
+        """Liest die aktuellen Versionszähler aller Datenbereiche (eine Mini-Query)."""
         try:
-            rows = self._execute_query(query, fetch=True)
+            rows = self._execute_query('SELECT Name, Version FROM DataVersions', fetch=True)
+            return {row['Name']: row['Version'] for row in rows}
+        except sqlite3.Error as e:
+            print(f"Fehler beim Lesen der Datenversionen: {e}")
+            return {}
+
+    def get_plot_png(self, name):
+        """
+        Liefert den Plot als PNG-Bytes (oder None, wenn keine Daten vorhanden sind).
+        Gerendert wird nur, wenn für die aktuelle Datenversion noch nichts im Cache liegt.
+
+        Returns:
+            tuple: (png_bytes oder None, version)
+        """
+        area, render_method = self.PLOTS[name]
+        version = self.get_data_versions().get(area, 0)
+        cache_key = (name, version)
+
+        png = _plot_cache.get(cache_key, _NOT_CACHED)
+        if png is _NOT_CACHED:
+            png = getattr(self, render_method)()
+            _plot_cache.set(cache_key, png)   # auch "keine Daten" (None) cachen
+        return png, version
+
+    def _render_order_plot(self):
+        """Rendert den Plot für Bestellumsätze aggregiert nach Datum"""
+        try:
+            # Vorab aggregierte Tageswerte (DailyOrderRevenue, per Trigger gepflegt)
+            rows = self.get_daily_order_revenue()
             if not rows:
                 return None
 
-            # Daten nach Tag (YYYY-MM-DD) aggregieren
-            daily_data = {}
-            for row in rows:
-                # Splittet "2026-02-11 17:42:01" auf "2026-02-11"
-                date_str = row['OrderDate'].split(' ')[0]
-                # OrderAmount von Cents in Euro umrechnen
-                amount_eur = row['OrderAmount'] / 100.0
-                daily_data[date_str] = daily_data.get(date_str, 0.0) + amount_eur
-
-            # Sortieren nach Datum für korrekte X-Achsen-Abfolge
-            sorted_dates = sorted(daily_data.keys())
-            amounts = [daily_data[d] for d in sorted_dates]
+            sorted_dates = [row['Day'] for row in rows]
+            # RevenueCents von Cents in Euro umrechnen
+            amounts = [row['RevenueCents'] / 100.0 for row in rows]
 
             # Plot erstellen
-            plt.figure(figsize=(6, 3.5))
-            plt.plot(sorted_dates, amounts, marker='o', color='#1A237E', linewidth=2)
-            plt.title('Umsatz nach Bestelldatum (in €)', fontsize=12, fontweight='bold', color='#343a40')
-            plt.grid(True, linestyle='--', alpha=0.5)
-            plt.xticks(rotation=30, ha='right', fontsize=8)
-            plt.tight_layout()
-
-            return self._convert_plot_to_base64()
-        except Exception:
+            fig = Figure(figsize=(6, 3.5))
+            ax = fig.add_subplot()
+            ax.plot(sorted_dates, amounts, marker='o', color='#1A237E', linewidth=2)
+            ax.set_title('Umsatz nach Bestelldatum (in €)', fontsize=12, fontweight='bold', color='#343a40')
+            ax.grid(True, linestyle='--', alpha=0.5)
+            ax.tick_params(axis='x', labelrotation=30, labelsize=8)
+            for label in ax.get_xticklabels():
+                label.set_horizontalalignment('right')
+            fig.tight_layout()
+
+            return self._figure_to_png(fig)
+        except Exception as e:
+            print(f"Fehler beim Rendern des Bestell-Plots: {e}")
             return None
 
-    def generate_bank_plot(self):
-        """Generiert den Plot für den Bank-Cashflow (Einnahmen/Ausgaben)"""
-        query = """
-            SELECT BookingDate, Amount 
-            FROM BankTransactions 
-            ORDER BY BookingDate ASC
-        """
+    def _render_bank_plot(self):
+        """Rendert den Plot für den Bank-Cashflow (Einnahmen/Ausgaben)"""
         try:
-            rows = self._execute_query(query, fetch=True)
+            # Vorab aggregierte Tageswerte (DailyCashflow, per Trigger gepflegt)
+            rows = self.get_daily_cashflow()
             if not rows:
                 return None
 
-            # Da Bankdaten bereits tagesgenau sind (YYYY-MM-DD), direkt aggregieren
-            daily_data = {}
-            for row in rows:
-                date_str = row['BookingDate']
-                daily_data[date_str] = daily_data.get(date_str, 0.0) + row['Amount']
-
-            sorted_dates = sorted(daily_data.keys())
-            cashflow = [daily_data[d] for d in sorted_dates]
+            sorted_dates = [row['Day'] for row in rows]
+            cashflow = [(row['InflowCents'] + row['OutflowCents']) / 100.0 for row in rows]
 
             # Plot erstellen
-            plt.figure(figsize=(6, 3.5))
+            fig = Figure(figsize=(6, 3.5))
+            ax = fig.add_subplot()
             # Balkendiagramm für Cashflow (Grün für positiv, Rot für negativ)
             colors = ['#28a745' if val >= 0 else '#dc3545' for val in cashflow]
-            plt.bar(sorted_dates, cashflow, color=colors, alpha=0.85)
-            plt.title('Bank-Cashflow nach Buchungstag (in €)', fontsize=12, fontweight='bold', color='#343a40')
-            plt.grid(True, linestyle='--', alpha=0.5)
-            plt.axhline(0, color='black', linewidth=0.8, linestyle='-') # Nulllinie
-            plt.xticks(rotation=30, ha='right', fontsize=8)
-            plt.tight_layout()
-
-            return self._convert_plot_to_base64()
-        except Exception:
+            ax.bar(sorted_dates, cashflow, color=colors, alpha=0.85)
+            ax.set_title('Bank-Cashflow nach Buchungstag (in €)', fontsize=12, fontweight='bold', color='#343a40')
+            ax.grid(True, linestyle='--', alpha=0.5)
+            ax.axhline(0, color='black', linewidth=0.8, linestyle='-') # Nulllinie
+            ax.tick_params(axis='x', labelrotation=30, labelsize=8)
+            for label in ax.get_xticklabels():
+                label.set_horizontalalignment('right')
+            fig.tight_layout()
+
+            return self._figure_to_png(fig)
+        except Exception as e:
+            print(f"Fehler beim Rendern des Bank-Plots: {e}")
             return None
 
-    def _convert_plot_to_base64(self):
-        """Hilfsmethode: Wandelt die aktuelle Fig in einen sauberen Base64-String um"""
+    def _figure_to_png(self, fig):
+        """Hilfsmethode: Rendert eine Figure über einen eigenen Agg-Canvas zu PNG-Bytes"""
         img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=150)
-        img_buffer.seek(0)
-        base64_string = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-        plt.close() # Speicher freigeben!
-        return base64_string
\ No newline at end of file
+        FigureCanvasAgg(fig)  # Canvas an die Figur hängen (kein globaler Backend-Zustand)
+        fig.savefig(img_buffer, format='png', dpi=150)
+        return img_buffer.getvalue()
+
+    # =========================================================================
+    # ZEITREIHEN-API (spaltenweises JSON für clientseitige Charts)
+    # =========================================================================
+
+    # Gruppierungsausdruck je Bucket – Wochen beginnen am Montag, Monate am Ersten
+    METRIC_BUCKETS = {
+        'day': "Day",
+        'week': "date(Day, 'weekday 0', '-6 days')",
+        'month': "substr(Day, 1, 7) || '-01'",
+    }
+
+    # Metrik → (Datenbereich in DataVersions, Rollup-Tabelle, Summen-Spalten)
+    METRICS = {
+        'orders': ('orders', 'DailyOrderRevenue', ('OrderCount', 'RevenueCents')),
+        'cashflow': ('bank', 'DailyCashflow', ('TransactionCount', 'InflowCents', 'OutflowCents')),
+    }
+
+    def get_metric_version(self, metric):
+        """Datenversion der Metrik (Grundlage des ETags der Zeitreihen-API)."""
+        area = self.METRICS[metric][0]
+        return self.get_data_versions().get(area, 0)
+
+    def get_metric_series(self, metric, date_from=None, date_to=None, bucket='day'):
+        """
+        Liefert eine Zeitreihe aus den Tages-Rollups, gruppiert nach bucket (day/week/month).
+        Spaltenweise statt zeilenweise: ein Array pro Kennzahl → kompaktes JSON.
+
+        Args:
+            metric: 'orders' oder 'cashflow'
+            date_from / date_to: 'YYYY-MM-DD' (inklusive) oder None für offen
+            bucket: Schlüssel aus METRIC_BUCKETS
+
+        Returns:
+            dict mit 'dates' und je Kennzahl einem gleich langen Werte-Array (Euro-Beträge)
+        """
+        _, table, columns = self.METRICS[metric]
+        bucket_expr = self.METRIC_BUCKETS[bucket]
+        sums = ', '.join(f'SUM({column}) AS {column}' for column in columns)
+
+        query = f"""
+            SELECT {bucket_expr} AS Bucket, {sums}
+            FROM {table}
+            WHERE Day >= ? AND Day <= ?
+            GROUP BY Bucket
+            ORDER BY Bucket ASC
+        """
+        rows = self._execute_query(
+            query, (date_from or '0000-01-01', date_to or '9999-12-31'), fetch=True
+        )
+
+        series = {
+            'metric': metric,
+            'bucket': bucket,
+            'from': date_from,
+            'to': date_to,
+            'dates': [row['Bucket'] for row in rows],
+        }
+        if metric == 'orders':
+            series['orders'] = [row['OrderCount'] for row in rows]
+            series['revenue'] = [round(row['RevenueCents'] / 100.0, 2) for row in rows]
+        else:
+            series['transactions'] = [row['TransactionCount'] for row in rows]
+            series['inflow'] = [round(row['InflowCents'] / 100.0, 2) for row in rows]
+            series['outflow'] = [round(row['OutflowCents'] / 100.0, 2) for row in rows]
+            series['net'] = [
+                round((row['InflowCents'] + row['OutflowCents']) / 100.0, 2) for row in rows
+            ]
+        return series
@@ -0,0 +1,153 @@
+import os
+import uuid
+import shutil
+import hashlib
+from flask import Request, current_app, flash, redirect, request, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# =================================================================
+# STREAMING-UPLOADS: Dateien direkt beim Empfang in den Upload-Ordner schreiben
+# =================================================================
+# Werkzeug puffert große Dateien im Multipart-Body standardmäßig in einer Temp-Datei,
+# die danach per FileStorage.save() noch einmal kopiert wird. Für die Upload-Routen
+# unten liefert UploadRequest._get_file_stream stattdessen ein StreamingUpload:
+#   - jeder Chunk landet sofort im Upload-Ordner (<UPLOAD_DIR_PATH>/UPLOAD_<uuid>.part)
+#   - im selben Durchlauf: SHA-256, Größe und die ersten SNIFF_BYTES für die Inhaltserkennung
+#   - das Upload-Budget (UPLOAD_LIMIT_MB, Summe aller Dateien) wird beim Schreiben geprüft
+# ProjectManager._save_files_and_metadata legt die Datei danach per Umbenennen im Blob-Store
+# ab (website/blob_store.py) oder verwirft sie, wenn der Inhalt schon vorhanden ist.
+# Nicht übernommene .part-Dateien räumt UploadRequest.close() am Request-Ende weg.
+
+UPLOAD_FOLDER = os.environ.get('UPLOAD_DIR_PATH') or os.path.join(os.getcwd(), 'temp_uploads')
+SNIFF_BYTES = 2048                  # so viel liest _detect_extension_by_content
+FORM_OVERHEAD_BYTES = 64 * 1024     # Formularfelder + Multipart-Grenzen zusätzlich zum Datei-Budget
+
+# Routen, deren Dateien gestreamt werden (alle speichern über _save_files_and_metadata)
+STREAMING_UPLOAD_ENDPOINTS = {
+    'views.start_project',
+    'views.upload_files',
+    'admin_views.start_project',
+}
+
+
+def upload_limit_bytes():
+    """Maximale Gesamtgröße aller Dateien eines Uploads (app.config UPLOAD_LIMIT_MB)."""
+    return int(current_app.config['UPLOAD_LIMIT_MB']) * 1024 * 1024
+
+
+class UploadBudget:
+    """Zählt die Dateibytes eines Requests mit und bricht beim Überschreiten sofort ab."""
+
+    def __init__(self, limit_bytes=None):
+        self.limit_bytes = limit_bytes   # None = unbegrenzt
+        self.used_bytes = 0
+
+    def consume(self, size):
+        self.used_bytes += size
+        if self.limit_bytes is not None and self.used_bytes > self.limit_bytes:
+            raise RequestEntityTooLarge(
+                f"Upload-Limit von {self.limit_bytes // (1024 * 1024)} MB überschritten."
+            )
+
+
+class StreamingUpload:
+    """
+    Schreibziel einer hochgeladenen Datei (Werkzeug-Stream-Factory): schreibt direkt
+    in den Upload-Ordner und berechnet dabei Größe, SHA-256 und den Dateikopf.
+    Lesen/Seeken wird an die Datei durchgereicht (FileStorage erwartet einen Stream).
+    """
+
+    def __init__(self, directory, budget=None):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"UPLOAD_{uuid.uuid4()}.part")
+        self.size = 0
+        self.header = b''
+        self.finalized = False
+        self._budget = budget or UploadBudget()
+        self._hash = hashlib.sha256()
+        self._file = open(self.path, 'w+b')
+
+    def write(self, data):
+        self._budget.consume(len(data))
+        if len(self.header) < SNIFF_BYTES:
+            self.header += data[:SNIFF_BYTES - len(self.header)]
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def __getattr__(self, name):
+        # read, readline, seek, tell, flush, close, closed, ... → echte Datei
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    @classmethod
+    def from_file_storage(cls, file_storage, directory):
+        """Nicht gestreamter Upload (z.B. Werkzeug-Temp-Datei): einmal umkopieren, gleiche Metadaten."""
+        upload = cls(directory)
+        file_storage.stream.seek(0)
+        shutil.copyfileobj(file_storage.stream, upload)
+        return upload
+
+    def finalize(self, target_path):
+        """Übernimmt die Datei unter target_path (gleiches Dateisystem → reines Umbenennen)."""
+        self._file.close()
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        shutil.move(self.path, target_path)
+        self.path = target_path
+        self.finalized = True
+
+    def discard(self):
+        """Verwirft eine nicht übernommene Datei (ungültig, abgebrochen, Limit überschritten)."""
+        self._file.close()
+        if not self.finalized and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class UploadRequest(Request):
+    """Request-Klasse der App: streamt Dateien der STREAMING_UPLOAD_ENDPOINTS direkt auf die Platte."""
+
+    _streaming_uploads = ()
+    _upload_budget = None
+
+    def _is_streaming_upload(self):
+        return self.endpoint in STREAMING_UPLOAD_ENDPOINTS
+
+    @property
+    def max_content_length(self):
+        # Bekannte Content-Length über dem Budget → 413, bevor auch nur ein Byte gelesen wird
+        if self._is_streaming_upload():
+            return upload_limit_bytes() + FORM_OVERHEAD_BYTES
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not self._is_streaming_upload():
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        if self._upload_budget is None:
+            self._upload_budget = UploadBudget(upload_limit_bytes())
+            self._streaming_uploads = []
+
+        upload = StreamingUpload(UPLOAD_FOLDER, self._upload_budget)
+        self._streaming_uploads.append(upload)
+        return upload
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            for upload in self._streaming_uploads:
+                if not upload.finalized:
+                    upload.discard()
+
+
+def handle_upload_too_large(error):
+    """413 (Upload-Budget überschritten) → Flash-Meldung statt nackter Fehlerseite."""
+    limit_mb = current_app.config['UPLOAD_LIMIT_MB']
+    flash(f"Die Dateien überschreiten das Upload-Limit von {limit_mb} MB.", 'danger')
+    return redirect(request.referrer or url_for('views.home'))
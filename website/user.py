@@ -1,8 +1,19 @@
 from functools import wraps
 from flask import session, redirect, url_for, flash
-from flask import current_app
+from flask import current_app, g
 
 
+def get_current_user_status(user_id):
+    """
+    Auth-Status (IsActive / IsAdmin) des Users – pro Request nur einmal ermittelt.
+    Stufe 1: flask.g (gestapelte Decorators teilen sich das Ergebnis),
+    Stufe 2: prozessweiter TTL-Cache im UserManager, erst dann die Datenbank.
+    """
+    statuses = g.setdefault('user_statuses', {})
+    if user_id not in statuses:
+        statuses[user_id] = current_app.user_manager.get_user_status(user_id)
+    return statuses[user_id]
+
 
 def login_required(f):
     """
@@ -18,7 +29,7 @@ def login_required(f):
 
 def check_active(f):
     """
-    Sichert Routen ab: Validiert den IsActive-Status direkt gegen die Datenbank.
+    Sichert Routen ab: Validiert den IsActive-Status gegen die Datenbank (gecacht).
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -29,9 +40,8 @@ def check_active(f):
             flash("Bitte melden Sie sich an.", "warning")
             return redirect(url_for('auth.login'))
 
-        # 2. Echtzeit-Check gegen die Datenbank
-        # Wir nutzen den user_manager, um den aktuellen Status zu ziehen
-        user_data = current_app.user_manager.find_user_by_id(user_id) 
+        # 2. Status-Check (Request-Memo + kurzlebiger Cache, siehe get_current_user_status)
+        user_data = get_current_user_status(user_id)
         
         if not user_data:
             session.clear()
@@ -51,7 +61,7 @@ def check_admin(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         user_id = session.get('user_id')
-        user = current_app.user_manager.find_user_by_id(user_id)
+        user = get_current_user_status(user_id)
         
         if not user or not (user.get('IsAdmin') == 1 and user.get('IsActive') == 1):
             flash("Admin-Rechte erforderlich!", "danger")
@@ -1,83 +1,22 @@
-import os
 import uuid
 import hashlib
 import sqlite3
 import bcrypt
 from datetime import datetime, timedelta
+from .database import DatabaseManager
+from .cache import TTLCache
 
-class UserManager:
+# Prozessweiter Cache für den Auth-Status (IsActive / IsAdmin) je UserID.
+# Wird bei Statusänderungen in diesem Prozess sofort invalidiert; andere
+# Worker-Prozesse sehen die Änderung spätestens nach Ablauf der TTL.
+USER_STATUS_CACHE_TTL = 15  # Sekunden
+_user_status_cache = TTLCache(maxsize=1024, ttl=USER_STATUS_CACHE_TTL)
+
+class UserManager(DatabaseManager):
     def __init__(self):
-        self.db_path = os.getenv('DB_PATH')
+        super().__init__()
         self.TOKEN_TYPE = 'PASSWORD_RESET'
 
-    def _execute_query(
-        self,
-        query,
-        params=(),
-        fetch=False,
-        get_lastrowid=False,
-        fetch_one=False,
-        multi_queries=False
-    ):
-        """
-        Erweiterte DB-Execution mit Unterstützung für mehrere Queries in einer Transaktion.
-    
-        Args:
-            query: 
-                - str → einzelner SQL-String
-                - list of (query_str, params_tuple) → mehrere Queries (nur bei multi_queries=True)
-            params: Parameter für einzelne Query (tuple)
-            fetch: Soll ein Resultset zurückgegeben werden? (SELECT)
-            get_lastrowid: Soll cursor.lastrowid zurückgegeben werden? (INSERT)
-            fetch_one: fetchone() statt fetchall()
-            multi_queries: True → query ist Liste von (query, params)-Tuplen
-    
-        Returns:
-            - Bei fetch: sqlite3.Row oder Liste von sqlite3.Row
-            - Bei get_lastrowid: int (lastrowid)
-            - Sonst: None
-            - Bei Fehler: wirft sqlite3.Error
-        """
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            # ── Wichtig: row_factory für dict-ähnlichen Zugriff ──
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-    
-            if multi_queries and isinstance(query, list):
-                # Mehrere Queries → Transaktion
-                cursor.execute("BEGIN TRANSACTION")
-                for q, p in query:
-                    cursor.execute(q, p)
-                conn.commit()
-            else:
-                # Einzelne Query
-                cursor.execute(query, params)
-                conn.commit()
-    
-            # Ergebnis abholen (nur bei SELECT relevant)
-            if fetch:
-                if fetch_one:
-                    return cursor.fetchone()           # → sqlite3.Row oder None
-                return cursor.fetchall()               # → Liste von sqlite3.Row
-    
-            # Letzte eingefügte ID (für INSERT)
-            if get_lastrowid:
-                return cursor.lastrowid
-    
-            # Standard-Rückgabe (UPDATE, DELETE, INSERT ohne ID-Interesse)
-            return None
-    
-        except sqlite3.Error as e:
-            if conn:
-                conn.rollback()
-            raise  # Fehler weiterwerfen – aufrufende Methode kann loggen/flashen
-        
-        finally:
-            if conn:
-                conn.close()
-
     def verify_login(self, username: str, password: str):
         """
         Verifies login credentials and returns user info if valid.
@@ -262,6 +201,7 @@ class UserManager:
 
         # User aktivieren: IsActive = 1
         self._execute_query("UPDATE Users SET IsActive = 1 WHERE UserID = ?", (user_id,))
+        self.invalidate_user_status(user_id)
 
         # Token aus der Tabelle löschen, da er verbraucht ist
         self._execute_query("DELETE FROM VerificationTokens WHERE TokenHash = ?", (token_hash,))
@@ -286,6 +226,22 @@ class UserManager:
         if result:
             return {'IsActive': result[0][0], 'IsAdmin': result[0][1]}
         return None
+
+    def get_user_status(self, user_id):
+        """
+        Wie find_user_by_id, aber über den prozessweiten TTL-Cache (für check_active / check_admin).
+        Nicht gefundene User werden nicht gecacht.
+        """
+        status = _user_status_cache.get(user_id)
+        if status is None:
+            status = self.find_user_by_id(user_id)
+            if status is not None:
+                _user_status_cache.set(user_id, status)
+        return status
+
+    def invalidate_user_status(self, user_id):
+        """Verwirft den gecachten Auth-Status eines Users (nach Statusänderung / Löschung)."""
+        _user_status_cache.pop(user_id)
     
     def find_user_by_email(self, email: str):
         """Find a user by email. Returns a dict with user fields or None if not found."""
@@ -350,8 +306,7 @@ class UserManager:
         Sucht einen Benutzer über den SHA256-Hash des Reset-Tokens in der VerificationTokens-Tabelle
         und prüft das Ablaufdatum.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._get_connection().cursor()
         print("CONN ESTABLISHED")
         # SQLite kann ISO-Strings vergleichen.
         current_time_str = datetime.now().isoformat()
@@ -373,7 +328,6 @@ class UserManager:
         user = query.fetchone()
         print(user)
         cursor.close()
-        conn.close()
 
         return user
 
@@ -382,7 +336,7 @@ class UserManager:
 
     def update_password(self, user_id, new_password):
         """Aktualisiert das Passwort und löscht das verwendete Token."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
@@ -391,6 +345,9 @@ class UserManager:
             hashed_password_bytes = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
             password = hashed_password_bytes
 
+            # Beide Änderungen atomar (Verbindung läuft im Autocommit-Modus)
+            cursor.execute("BEGIN TRANSACTION")
+
             # 1. Passwort aktualisieren
             cursor.execute(
                 'UPDATE Passwords SET Password = ? WHERE UserID = ?',
@@ -404,13 +361,14 @@ class UserManager:
             )
 
             conn.commit()
-            cursor.close()
             return True
         except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
             print(f"FEHLER: Fehler beim Aktualisieren des Passworts für {user_id}: {e}")
             return False
         finally:
-            conn.close()
+            cursor.close()
 
     def reset_password_with_token(self, token, new_password):
         """Setzt das Passwort zurück mit einem gültigen Reset-Token."""
@@ -461,6 +419,7 @@ class UserManager:
         new_status = 0 if user_status['IsActive'] == 1 else 1
         query = "UPDATE Users SET IsActive = ? WHERE UserID = ?"
         self._execute_query(query, (new_status, user_id)) # Falls _execute_query ein Commit kapselt, sonst commit() hinzufügen
+        self.invalidate_user_status(user_id)  # Deaktivierung sofort wirksam
 
     def delete_user(self, user_id):
         """
@@ -490,4 +449,5 @@ class UserManager:
 
         # 3. Credentials & Hauptdatensatz löschen (Addresses/Payments fallen über DB CASCADE, falls definiert)
         self._execute_query("DELETE FROM Passwords WHERE UserID = ?", (user_id,))
-        self._execute_query("DELETE FROM Users WHERE UserID = ?", (user_id,))
\ No newline at end of file
+        self._execute_query("DELETE FROM Users WHERE UserID = ?", (user_id,))
+        self.invalidate_user_status(user_id)
\ No newline at end of file
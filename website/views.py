@@ -1,4 +1,5 @@
-from flask import Blueprint,render_template, flash, session, url_for, redirect, request, abort
+from flask import Blueprint,render_template, flash, session, url_for, redirect, request, abort, jsonify, current_app
+import sqlite3
 import os
 import uuid
 from datetime import datetime
@@ -11,8 +12,11 @@ from .user import login_required
 from .user import check_active
 from .auth import send_system_email
 from .utils import require_csrf
+from . import database
 
 TEMP_UPLOAD_FOLDER = os.environ.get('UPLOAD_DIR_PATH') or os.path.join(os.getcwd(), 'temp_uploads')
+SHOP_PAGE_SIZE = 24        # Produkte pro Shop-Seite
+SHOP_MAX_PAGE_SIZE = 100   # Obergrenze für ?page_size= der JSON-API
 views = Blueprint('views', __name__, template_folder=os.path.join(os.path.dirname(__file__), 'templates'))  # Relative to blueprint file
 cart_manager = CartManager()
 project_manager = ProjectManager() 
@@ -367,43 +371,95 @@ def shop():
     search_query = request.args.get('search') or request.form.get('search')
     selected_categories = request.args.getlist('category[]')
     selected_materials = request.args.getlist('material[]')
+    sort = request.args.get('sort')
+    cursor = request.args.get('cursor')
 
-    # 2. Dynamische Filter-Optionen für die Sidebar laden
-    filter_options = product_manager.get_filter_options()
-    
-    # 3. Gefilterte Produkte abrufen
-    raw_products = product_manager.get_filtered_products(
+    # 2. Filter-Optionen inkl. Trefferzahlen für die Sidebar (ein aggregierter Query, gecacht)
+    facets = product_manager.get_facet_counts(
         search_query=search_query,
         selected_categories=selected_categories,
         selected_materials=selected_materials
     )
+    
+    # 3. Eine Seite gefilterter Produkte abrufen (Keyset-Pagination)
+    page = product_manager.get_shop_page(
+        search_query=search_query,
+        selected_categories=selected_categories,
+        selected_materials=selected_materials,
+        sort=sort,
+        cursor=cursor,
+        page_size=SHOP_PAGE_SIZE
+    )
 
-    # 4. Mapping (wie in deinem Code, am besten in eine Helper-Funktion im Manager auslagern)
-    products_list = []
-    for p in raw_products:
-        # Hier dein Dictionary-Mapping anwenden...
-        products_list.append(product_manager.map_row_to_dict(p))
+    # 4. Mapping nur für die aktuelle Seite
+    products_list = [product_manager.map_row_to_dict(p) for p in page['products']]
 
     return render_template(
         'shop.html', 
         products=products_list,
-        categories=filter_options['categories'],
-        materials=filter_options['materials'],
+        categories=list(facets['categories']),
+        materials=list(facets['materials']),
+        category_counts=facets['categories'],
+        material_counts=facets['materials'],
         selected_categories=selected_categories,
         selected_materials=selected_materials,
-        total_results_count=len(products_list),
-        current_results_count=len(products_list), # Später für Pagination relevant
+        search_query=search_query or '',
+        sort=page['sort'],
+        next_cursor=page['next_cursor'],
+        is_first_page=not cursor,
+        total_results_count=facets['total'],
+        current_results_count=len(products_list),
         logged_in=logged_in
     )
 
 
+@views.route('/api/shop/products', methods=['GET'])
+def shop_products_api():
+    """
+    JSON-Variante des Shop-Katalogs (gleiche Parameter wie /shop).
+    Weiterblättern: next_cursor als ?cursor= an die nächste Anfrage hängen.
+    """
+    search_query = request.args.get('search')
+    selected_categories = request.args.getlist('category[]')
+    selected_materials = request.args.getlist('material[]')
+
+    try:
+        page_size = int(request.args.get('page_size', SHOP_PAGE_SIZE))
+    except ValueError:
+        page_size = SHOP_PAGE_SIZE
+    page_size = max(1, min(page_size, SHOP_MAX_PAGE_SIZE))
+
+    page = product_manager.get_shop_page(
+        search_query=search_query,
+        selected_categories=selected_categories,
+        selected_materials=selected_materials,
+        sort=request.args.get('sort'),
+        cursor=request.args.get('cursor'),
+        page_size=page_size
+    )
+
+    response = {
+        "products": [product_manager.map_row_to_dict(p) for p in page['products']],
+        "next_cursor": page['next_cursor'],
+        "sort": page['sort'],
+    }
+    # Gesamtzahl nur auf der ersten Seite mitliefern (ändert sich beim Blättern nicht)
+    if not request.args.get('cursor'):
+        response["total"] = product_manager.count_filtered_products(
+            search_query=search_query,
+            selected_categories=selected_categories,
+            selected_materials=selected_materials
+        )
+
+    return jsonify(response), 200
+
+
 @views.route('/start_project', methods=['GET','POST'])
 @login_required
 @check_active
 @require_csrf
 def start_project():
-    #TODO: hier die db-abfrage hin die die configuratios ausliest, damit die upload_limit_mb dynamisch im Template verfügbar ist
-    upload_limit_mb = 25 # Beispielhafter Wert, in der Realität aus DB oder Config laden
+    upload_limit_mb = current_app.config['UPLOAD_LIMIT_MB'] # wird beim Upload serverseitig erzwungen (website/uploads.py)
     current_user_id = session['user_id']
     
     if request.method == 'POST':
@@ -904,3 +960,20 @@ def send_filaments():
 
     return render_template('send_filaments_FAQ.html'), 500
 
+@views.route('/health', methods=['GET'])
+def health():
+    """
+    Health-Check: prüft die DB-Verbindung und meldet die aktiven PRAGMA-Einstellungen
+    (journal_mode, synchronous, busy_timeout, ...) im Vergleich zum konfigurierten Profil.
+    """
+    try:
+        active = database.get_active_settings()
+    except (sqlite3.Error, RuntimeError) as e:
+        current_app.logger.error(f"Health-Check fehlgeschlagen: {e}")
+        return jsonify({"status": "error", "database": None}), 503
+
+    return jsonify({
+        "status": "ok",
+        "database": active,
+        "configured": current_app.config.get('DB_PROFILE')
+    }), 200
@@ -0,0 +1,97 @@
+import os
+import sys
+import signal
+import logging
+import argparse
+import threading
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# =================================================================
+# HINTERGRUND-WORKER: führt die Scheduler-Jobs außerhalb der Web-Prozesse aus
+# =================================================================
+# Betrieb: Web-Prozesse mit BACKGROUND_JOBS=worker starten (kein Scheduler im
+# Gunicorn-Worker) und daneben genau einen oder mehrere Worker:
+#
+#   python -m website.worker                  → Scheduler dauerhaft laufen lassen
+#   python -m website.worker --run bank_sync  → einen Job sofort einmal ausführen (Cron)
+#   python -m website.worker --status         → letzten Lauf je Job anzeigen
+#
+# Mehrere Worker sind unkritisch: jeder Lauf braucht die Job-Lease aus JobLeases.
+
+# Direkt ausführbare Jobs für --run (Name der Lease → Aufruf)
+ONE_SHOT_JOBS = ('bank_sync', 'bank_reconcile', 'mail_outbox')
+
+
+def _run_job_once(app, job_name):
+    """Führt einen Job einmal unter seiner Lease aus (für Cron / manuelle Läufe)."""
+    from .bank_service import sync_bank_balance
+    from .mail_manager import MailSender
+    from .job_manager import JobLeaseManager
+
+    job_leases = JobLeaseManager()
+    bank_lease = app.config['BANK_SYNC_LEASE_SECONDS']
+
+    with app.app_context():
+        if job_name == 'bank_sync':
+            return job_leases.run_exclusive('bank_sync', lambda: sync_bank_balance(app), bank_lease)
+        if job_name == 'bank_reconcile':
+            return job_leases.run_exclusive('bank_sync', lambda: sync_bank_balance(app, full=True), bank_lease)
+        return job_leases.run_exclusive('mail_outbox', MailSender().run_once, 120)
+
+
+def _print_status():
+    from .job_manager import JobLeaseManager
+
+    statuses = JobLeaseManager().get_job_statuses()
+    if not statuses:
+        print("Noch keine Jobläufe protokolliert.")
+        return
+
+    for status in statuses:
+        state = 'LÄUFT' if status['Running'] else (status['LastStatus'] or '-')
+        duration = f"{status['LastDurationMs']} ms" if status['LastDurationMs'] is not None else '-'
+        print(f"{status['JobName']:<14} {state:<7} letzter Lauf: {status['LastFinishedAt'] or '-':<19} "
+              f"Dauer: {duration:<10} Läufe: {status['RunCount']}"
+              + (f"  Fehler: {status['LastError']}" if status['LastError'] else ''))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hintergrund-Worker für Bank-Sync und Mail-Versand")
+    parser.add_argument('--run', choices=ONE_SHOT_JOBS, help="Einen Job sofort einmal ausführen und beenden")
+    parser.add_argument('--status', action='store_true', help="Status der letzten Jobläufe anzeigen")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    # Der Worker selbst darf im create_app() keinen zweiten Scheduler starten
+    os.environ['BACKGROUND_JOBS'] = 'worker'
+
+    from . import create_app, scheduler, register_background_jobs
+    app = create_app()
+
+    if args.status:
+        _print_status()
+        return 0
+
+    if args.run:
+        result = _run_job_once(app, args.run)
+        return 1 if result is False else 0
+
+    register_background_jobs(app)
+    scheduler.start()
+    logger.info("🛠️ Hintergrund-Worker gestartet (Bank-Sync, Mail-Outbox).")
+
+    # Hauptthread schlafen lassen, bis SIGINT/SIGTERM kommt; Jobs laufen im Scheduler-Thread
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    stop.wait()
+
+    logger.info("🛑 Hintergrund-Worker wird beendet...")
+    scheduler.shutdown(wait=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())